@@ -14,6 +14,8 @@ import os
 from datetime import timedelta
 from pathlib import Path
 
+from celery.schedules import crontab
+
 try:
     from dotenv import load_dotenv
 except ImportError:  # pragma: no cover
@@ -229,12 +231,44 @@ CACHES = {
     }
 }
 
-# Celery (in-memory broker/backend for dev/test)
-CELERY_BROKER_URL = 'memory://'
-CELERY_RESULT_BACKEND = 'cache+memory://'
+# Celery. With CELERY_BROKER_URL set (docker-compose uses Redis), tasks go to the
+# `worker` service and the schedule below runs in `beat`. Without a broker, tasks
+# run inline in the calling process, so approvals still write their PO and uploads
+# still get extracted; scheduled jobs then need cron (e.g. `manage.py reconcile_receipts`).
+CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL') or 'memory://'
+CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND') or 'cache+memory://'
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
+CELERY_TASK_ALWAYS_EAGER = os.environ.get(
+    'CELERY_TASK_ALWAYS_EAGER', str(CELERY_BROKER_URL == 'memory://')
+) == 'True'
+
+# Seconds between checks for edited approval steps (see procurement.services.policy)
+APPROVAL_POLICY_CHECK_SECONDS = float(os.environ.get('APPROVAL_POLICY_CHECK_SECONDS', 5))
+
+# Processes for multi-page PDF/image extraction (0 = one per CPU, at most 4)
+OCR_MAX_WORKERS = int(os.environ.get('OCR_MAX_WORKERS', 0))
+# Proforma extraction stops after this many pages or characters (0 = 30 pages / 200k chars)
+OCR_MAX_PAGES = int(os.environ.get('OCR_MAX_PAGES', 0))
+OCR_MAX_CHARS = int(os.environ.get('OCR_MAX_CHARS', 0))
+
+# Proforma extraction results cached by document hash (see procurement.services.extraction_cache)
+EXTRACTION_CACHE_MAX_ENTRIES = int(os.environ.get('EXTRACTION_CACHE_MAX_ENTRIES', 5000))
+EXTRACTION_CACHE_MAX_AGE_DAYS = int(os.environ.get('EXTRACTION_CACHE_MAX_AGE_DAYS', 30))
+# Combined size of the documents behind the cached results (default 2 GiB)
+EXTRACTION_CACHE_MAX_BYTES = int(os.environ.get('EXTRACTION_CACHE_MAX_BYTES', 2 * 1024 ** 3))
+CELERY_BEAT_SCHEDULE = {
+    'prune-extraction-cache': {
+        'task': 'procurement.tasks.prune_extraction_cache',
+        'schedule': 24 * 60 * 60,
+    },
+    # month-end receipt reconciliation (procurement.services.reconciliation)
+    'reconcile-receipts': {
+        'task': 'procurement.tasks.reconcile_receipts',
+        'schedule': crontab(day_of_month=1, hour=2, minute=0),
+    },
+}
 
 # DRF Spectacular (OpenAPI)
 SPECTACULAR_SETTINGS = {
@@ -248,15 +282,46 @@ AWS_ACCESS_KEY_ID = os.environ.get('AWS_ACCESS_KEY_ID')
 AWS_SECRET_ACCESS_KEY = os.environ.get('AWS_SECRET_ACCESS_KEY')
 AWS_STORAGE_BUCKET_NAME = os.environ.get('AWS_STORAGE_BUCKET_NAME')
 AWS_S3_REGION_NAME = os.environ.get('AWS_S3_REGION_NAME', 'us-east-1')
+# S3-compatible endpoint (MinIO, a local stand-in); unset for AWS itself
+AWS_S3_ENDPOINT_URL = os.environ.get('AWS_S3_ENDPOINT_URL') or None
+# Lifetime of presigned download URLs; each is reused until shortly before it expires
+DOWNLOAD_PRESIGN_SECONDS = int(os.environ.get('DOWNLOAD_PRESIGN_SECONDS', 3600))
 
 if AWS_STORAGE_BUCKET_NAME and AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY:
     DEFAULT_FILE_STORAGE = 'storages.backends.s3boto3.S3Boto3Storage'
     # optional extras
     AWS_S3_SIGNATURE_VERSION = os.environ.get('AWS_S3_SIGNATURE_VERSION', 's3v4')
 
+# HEAD probes for external attachment URLs (see procurement.services.attachments)
+ATTACHMENT_PROBE_WORKERS = int(os.environ.get('ATTACHMENT_PROBE_WORKERS', 8))
+ATTACHMENT_PROBE_TIMEOUT = float(os.environ.get('ATTACHMENT_PROBE_TIMEOUT', 3))
+ATTACHMENT_PROBE_CACHE_SECONDS = int(os.environ.get('ATTACHMENT_PROBE_CACHE_SECONDS', 300))
+
+# On-disk LRU cache of proxied external attachments (see procurement.services.attachment_cache)
+ATTACHMENT_CACHE_DIR = os.environ.get('ATTACHMENT_CACHE_DIR', str(BASE_DIR / 'cache' / 'attachments'))
+ATTACHMENT_CACHE_MAX_BYTES = int(os.environ.get('ATTACHMENT_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+ATTACHMENT_CACHE_MAX_OBJECT_BYTES = int(os.environ.get('ATTACHMENT_CACHE_MAX_OBJECT_BYTES', 50 * 1024 * 1024))
+ATTACHMENT_CACHE_FRESH_SECONDS = int(os.environ.get('ATTACHMENT_CACHE_FRESH_SECONDS', 300))
+ATTACHMENT_CACHE_TIMEOUT = float(os.environ.get('ATTACHMENT_CACHE_TIMEOUT', 15))
+
+# Local file downloads: '' streams from Django (with Range support); 'x-accel-redirect'
+# (nginx, internal location DOWNLOAD_ACCEL_PREFIX aliased to MEDIA_ROOT) or 'x-sendfile'
+# hands the transfer to the front proxy (see procurement.services.delivery)
+DOWNLOAD_OFFLOAD = os.environ.get('DOWNLOAD_OFFLOAD', '')
+DOWNLOAD_ACCEL_PREFIX = os.environ.get('DOWNLOAD_ACCEL_PREFIX', '/protected/')
+
 # Optional LLM extraction settings
 OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY')
 USE_LLM_EXTRACT = os.environ.get('USE_LLM_EXTRACT', 'False') == 'True'
+# Client limits for LLM extraction (see procurement.services.llm)
+LLM_API_URL = os.environ.get('LLM_API_URL', 'https://api.openai.com/v1/chat/completions')
+LLM_MODEL = os.environ.get('LLM_MODEL', 'gpt-4o-mini')
+LLM_TIMEOUT = float(os.environ.get('LLM_TIMEOUT', 15))
+LLM_MAX_CONCURRENCY = int(os.environ.get('LLM_MAX_CONCURRENCY', 4))
+LLM_CACHE_SECONDS = int(os.environ.get('LLM_CACHE_SECONDS', 7 * 24 * 60 * 60))
+LLM_PROMPT_MAX_CHARS = int(os.environ.get('LLM_PROMPT_MAX_CHARS', 4000))
+LLM_BREAKER_FAILURES = int(os.environ.get('LLM_BREAKER_FAILURES', 5))
+LLM_BREAKER_RESET_SECONDS = int(os.environ.get('LLM_BREAKER_RESET_SECONDS', 60))
 
 
 # Logging
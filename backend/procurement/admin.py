@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 
-from .models import Approval, PurchaseRequest, User
+from .models import Approval, ApprovalStep, PurchaseRequest, User
 
 
 @admin.register(User)
@@ -28,3 +28,8 @@ class PurchaseRequestAdmin(admin.ModelAdmin):
 class ApprovalAdmin(admin.ModelAdmin):
     list_display = ("purchase_request", "approver", "level", "decision", "decided_at")
     list_filter = ("decision", "level")
+
+
+@admin.register(ApprovalStep)
+class ApprovalStepAdmin(admin.ModelAdmin):
+    list_display = ("level", "role", "min_amount", "max_amount")
@@ -0,0 +1,58 @@
+"""
+Conditional GET support (ETag / Last-Modified) for purchase request reads.
+
+``PurchaseRequest.updated_at`` is the version of a request: saving the request
+bumps it, and the signal handlers in ``procurement.signals`` bump it whenever an
+approval, attachment or finance comment changes. A list page is versioned by
+the ``(id, updated_at)`` of the rows on it plus whatever else the page shows
+about the rest of the set (next link, totals), so it costs nothing beyond
+fetching the page itself.
+"""
+
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+# Bump when the serialized representation changes shape
+REPRESENTATION_VERSION = "3"
+
+
+def make_etag(request, *parts):
+    """Strong ETag over the resource version, the caller and the query string."""
+    key = "|".join(
+        [REPRESENTATION_VERSION, str(request.user.pk), request.get_full_path(), *map(str, parts)]
+    )
+    return '"%s"' % hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def page_version(rows, *parts) -> str:
+    """Digest of the ``(id, updated_at)`` of ``rows`` and any other ``parts`` the page depends on."""
+    digest = hashlib.sha1()
+    for row in rows:
+        digest.update(f"{row.pk}:{row.updated_at.isoformat()};".encode("utf-8"))
+    for part in parts:
+        digest.update(f"|{part}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def not_modified(request, etag, last_modified=None):
+    """Return a 304 response when the client's validators still match, else ``None``."""
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=int(last_modified.timestamp()) if last_modified else None,
+    )
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified=None):
+    response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified.timestamp())
+    # Clients must revalidate every time; responses differ per user
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ["Authorization"])
+    return response
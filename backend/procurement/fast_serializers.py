@@ -0,0 +1,189 @@
+"""
+Precompiled read-only serialization for hot list endpoints.
+
+``compile_serializer`` walks a DRF serializer class once and turns every field
+into a ``(name, getter, converter)`` step. Serializing a row then runs those
+steps directly, skipping DRF's per-field ``get_attribute`` dispatch, method
+lookups and ``ReturnDict`` bookkeeping. The output renders to the same JSON as
+the DRF serializer it was compiled from.
+
+Rows may be model instances (with relations prefetched) or ``values()``-style
+dicts. Dict rows are read by field source, with related lookups joined by
+``__``; nested serializers expect a dict (or list of dicts) under their field
+name.
+"""
+
+import decimal
+from functools import lru_cache
+from operator import attrgetter
+
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.settings import ISO_8601, api_settings
+
+# step kinds
+_VALUE, _METHOD, _ONE, _MANY = range(4)
+
+
+class _MappingRow:
+    """Attribute access over a ``values()`` row, for ``SerializerMethodField`` calls."""
+
+    __slots__ = ("_row",)
+
+    def __init__(self, row):
+        self._row = row
+
+    def __getattr__(self, name):
+        return self._row.get(name)
+
+
+def _int(value, ctx):
+    return int(value)
+
+
+def _str(value, ctx):
+    return str(value)
+
+
+def _passthrough(value, ctx):
+    return value
+
+
+def _datetime_converter(field):
+    output_format = getattr(field, "format", api_settings.DATETIME_FORMAT)
+    if output_format is None or output_format.lower() != ISO_8601 or hasattr(field, "timezone"):
+        return lambda value, ctx: field.to_representation(value)
+
+    def convert(value, ctx):
+        tz = ctx[1]
+        if isinstance(value, str) or tz is None or value.tzinfo is None:
+            return field.to_representation(value)
+        value = value.astimezone(tz).isoformat()
+        if value.endswith("+00:00"):
+            value = value[:-6] + "Z"
+        return value
+
+    return convert
+
+
+def _decimal_converter(field):
+    coerce = getattr(field, "coerce_to_string", api_settings.COERCE_DECIMAL_TO_STRING)
+    if not coerce or field.localize or field.normalize_output or field.decimal_places is None:
+        return lambda value, ctx: field.to_representation(value)
+    exponent = decimal.Decimal(".1") ** field.decimal_places
+    context = decimal.getcontext().copy()
+    if field.max_digits is not None:
+        context.prec = field.max_digits
+    rounding = field.rounding
+
+    def convert(value, ctx):
+        if not isinstance(value, decimal.Decimal):
+            value = decimal.Decimal(str(value).strip())
+        return "{:f}".format(value.quantize(exponent, rounding=rounding, context=context))
+
+    return convert
+
+
+def _file_converter(field):
+    if not getattr(field, "use_url", api_settings.UPLOADED_FILES_USE_URL):
+        return lambda value, ctx: value.name if value else None
+
+    def convert(value, ctx):
+        if not value:
+            return None
+        try:
+            url = value.url
+        except AttributeError:
+            return None
+        request = ctx[0]
+        return request.build_absolute_uri(url) if request is not None else url
+
+    return convert
+
+
+def _converter(field):
+    # exact type checks: subclasses may override to_representation
+    kind = type(field)
+    if kind is serializers.IntegerField:
+        return _int
+    if kind in (serializers.CharField, serializers.EmailField, serializers.URLField, serializers.SlugField):
+        return _str
+    if kind is serializers.JSONField and not field.binary:
+        return _passthrough
+    if kind is serializers.DateTimeField:
+        return _datetime_converter(field)
+    if kind is serializers.DecimalField:
+        return _decimal_converter(field)
+    if isinstance(field, serializers.FileField) and kind in (serializers.FileField, serializers.ImageField):
+        return _file_converter(field)
+    return lambda value, ctx: field.to_representation(value)
+
+
+class CompiledSerializer:
+    """A read-only serialization plan compiled from a DRF serializer instance."""
+
+    def __init__(self, serializer):
+        self.steps = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if isinstance(field, serializers.SerializerMethodField):
+                self.steps.append((name, None, None, _METHOD, getattr(serializer, field.method_name)))
+                continue
+            if field.source == "*":
+                raise ValueError(f"Field '{name}' with source='*' cannot be compiled")
+            if isinstance(field, serializers.ListSerializer):
+                kind, handler = _MANY, CompiledSerializer(field.child)
+            elif isinstance(field, serializers.BaseSerializer):
+                kind, handler = _ONE, CompiledSerializer(field)
+            else:
+                kind, handler = _VALUE, _converter(field)
+            source = field.source_attrs
+            self.steps.append((name, attrgetter(".".join(source)), "__".join(source), kind, handler))
+
+    def to_representation(self, row, ctx):
+        ret = {}
+        is_mapping = isinstance(row, dict)
+        for name, get_attr, key, kind, handler in self.steps:
+            if kind == _METHOD:
+                ret[name] = handler(_MappingRow(row) if is_mapping else row)
+                continue
+            value = row.get(key) if is_mapping else get_attr(row)
+            if value is None:
+                ret[name] = None
+            elif kind == _VALUE:
+                ret[name] = handler(value, ctx)
+            elif kind == _ONE:
+                ret[name] = handler.to_representation(value, ctx)
+            else:
+                items = value.all() if isinstance(value, models.manager.BaseManager) else value
+                ret[name] = [handler.to_representation(item, ctx) for item in items]
+        return ret
+
+    def serialize(self, row, request=None):
+        return self.to_representation(row, self._context(request))
+
+    def serialize_many(self, rows, request=None):
+        ctx = self._context(request)
+        return [self.to_representation(row, ctx) for row in rows]
+
+    @staticmethod
+    def _context(request):
+        return (request, timezone.get_current_timezone() if settings.USE_TZ else None)
+
+
+@lru_cache(maxsize=64)
+def compile_serializer(serializer_class, fields=None):
+    """
+    Return a cached ``CompiledSerializer`` for ``serializer_class``.
+
+    ``fields`` is an optional frozenset restricting the output, as produced by
+    ``SparseFieldsetMixin.requested_fields``.
+    """
+    serializer = serializer_class(context={})
+    if fields is not None:
+        for name in set(serializer.fields) - fields:
+            serializer.fields.pop(name)
+    return CompiledSerializer(serializer)
@@ -0,0 +1,44 @@
+import io
+import time
+
+from django.core.management.base import BaseCommand
+
+from procurement.utils.ocr import extract_text_from_pdf, shutdown_pool
+from procurement.utils.sample_pdf import build_text_pdf
+
+
+class Command(BaseCommand):
+    help = 'Time multi-page PDF text extraction with 1/2/4/8 worker processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, default=50)
+        parser.add_argument('--lines', type=int, default=60, help='text lines per page')
+        parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        pages = [
+            [f'{line + 1}. Item {page}-{line} - Qty: {line % 9 + 1} - Unit Price: ${line * 3.25:.2f}' for line in range(options['lines'])]
+            for page in range(options['pages'])
+        ]
+        document = build_text_pdf(pages)
+        self.stdout.write(f"{options['pages']} pages, {len(document) / 1024:.0f} KiB")
+
+        baseline = expected = None
+        for workers in options['workers']:
+            # warm the pool so process start-up is not timed
+            text = extract_text_from_pdf(io.BytesIO(document), workers=workers)
+            if expected is None:
+                expected = text
+            timings = []
+            for _ in range(options['repeat']):
+                start = time.perf_counter()
+                extract_text_from_pdf(io.BytesIO(document), workers=workers)
+                timings.append(time.perf_counter() - start)
+            best = min(timings)
+            baseline = baseline or best
+            self.stdout.write(
+                f'{workers:>3} workers  {best * 1000:>9.1f} ms  {options["pages"] / best:>8.1f} pages/s  '
+                f'speedup {baseline / best:.2f}x  identical={text == expected}'
+            )
+        shutdown_pool()
@@ -0,0 +1,54 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from procurement.utils.ocr import ProformaParser
+
+FILLER = [
+    'Goods remain the property of the vendor until paid in full',
+    'Bank: Bank of Kigali   Account: 000400012345   Swift: BKIGRWRW',
+    'Prices are quoted in USD and valid for 30 days',
+    'Delivery within 5 working days of the purchase order',
+]
+
+
+def sample_pages(pages, lines):
+    """A proforma header followed by item and boilerplate lines, OCR'd page by page."""
+    document = []
+    for page in range(pages):
+        body = [f'Page {page + 1} of {pages}']
+        if page == 0:
+            body += ['PROFORMA INVOICE', 'Vendor: Acme Office Supplies Ltd', 'Payment Terms: 30 days']
+        for line in range(lines - len(body)):
+            if line % 3:
+                body.append(FILLER[line % len(FILLER)])
+            else:
+                body.append(f'{line + 1}. Item {page}-{line} – Qty: {line % 9 + 1} – Unit Price: ${line * 3.25:,.2f}')
+        document.append('\n'.join(body))
+    document[-1] += '\nSubtotal: $9,876.50\nGrand Total: $11,654.27'
+    return document
+
+
+class Command(BaseCommand):
+    help = 'Measure proforma text parsing throughput in lines/sec'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, default=50)
+        parser.add_argument('--lines', type=int, default=60, help='text lines per page')
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        pages = sample_pages(options['pages'], options['lines'])
+        timings = []
+        for _ in range(options['repeat']):
+            start = time.perf_counter()
+            parser = ProformaParser()
+            for text in pages:
+                parser.feed(text)
+            result = parser.result()
+            timings.append(time.perf_counter() - start)
+        best = min(timings)
+        self.stdout.write(
+            f'{options["pages"]} pages, {parser.lines_seen} lines  {best * 1000:.2f} ms/document  '
+            f'{parser.lines_seen / best:,.0f} lines/s  {len(result["items"])} items'
+        )
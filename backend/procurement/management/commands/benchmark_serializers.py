@@ -0,0 +1,67 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from procurement.fast_serializers import compile_serializer
+from procurement.models import Approval, Attachment, FinanceComment, PurchaseRequest
+from procurement.serializers import PurchaseRequestSerializer
+
+
+class Command(BaseCommand):
+    help = 'Compare rows/sec of PurchaseRequestSerializer and its compiled fast path (data is rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000])
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        for rows in options['rows']:
+            with transaction.atomic():
+                self._run(rows, options['repeat'])
+                transaction.set_rollback(True)
+
+    def _run(self, rows, repeat):
+        User = get_user_model()
+        staff = User.objects.create(username='bench_staff', role=User.Role.STAFF)
+        approver = User.objects.create(username='bench_approver', role=User.Role.APPROVER_LEVEL_1)
+        requests = PurchaseRequest.objects.bulk_create(
+            PurchaseRequest(title=f'Bench {i}', description='desc', amount='1234.50', created_by=staff)
+            for i in range(rows)
+        )
+        Approval.objects.bulk_create(
+            Approval(purchase_request=pr, approver=approver, level=1, decision=Approval.Decision.APPROVED)
+            for pr in requests
+        )
+        Attachment.objects.bulk_create(
+            Attachment(purchase_request=pr, external_url='https://example.com/a.pdf') for pr in requests
+        )
+        FinanceComment.objects.bulk_create(
+            FinanceComment(purchase_request=pr, user=approver, comment='ok') for pr in requests
+        )
+
+        objs = list(
+            PurchaseRequestSerializer.setup_eager_loading(PurchaseRequest.objects.filter(created_by=staff))
+        )
+        plan = compile_serializer(PurchaseRequestSerializer)
+
+        drf = self._best(repeat, lambda: PurchaseRequestSerializer(objs, many=True).data)
+        fast = self._best(repeat, lambda: plan.serialize_many(objs))
+        renderer = JSONRenderer()
+        identical = renderer.render(PurchaseRequestSerializer(objs, many=True).data) == renderer.render(plan.serialize_many(objs))
+
+        self.stdout.write(
+            f'{rows:>7} rows  drf {rows / drf:>10.0f} rows/s  compiled {rows / fast:>10.0f} rows/s  '
+            f'speedup {drf / fast:.1f}x  identical={identical}'
+        )
+
+    @staticmethod
+    def _best(repeat, fn):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from procurement.serializers import ExportFilterSerializer
+from procurement.services.export import DEFAULT_CHUNK_SIZE, export_rows, render
+
+
+class Command(BaseCommand):
+    help = 'Export purchase requests as CSV or NDJSON, streamed from the database in constant memory'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', dest='file_format', choices=['csv', 'ndjson'], default='csv')
+        parser.add_argument('--status', action='append', help='repeat to export several statuses')
+        parser.add_argument('--created-after', help='ISO date or datetime, inclusive')
+        parser.add_argument('--created-before', help='ISO date or datetime, exclusive')
+        parser.add_argument('--output', '-o', help='file to write (default: stdout)')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        data = {key: options[key] for key in ('file_format', 'status', 'created_after', 'created_before') if options[key]}
+        filters = ExportFilterSerializer(data=data)
+        if not filters.is_valid():
+            raise CommandError(filters.errors)
+        criteria = filters.validated_data
+        rows = export_rows(
+            criteria.get('status'),
+            criteria.get('created_after'),
+            criteria.get('created_before'),
+            chunk_size=options['chunk_size'],
+        )
+        blocks = render(rows, criteria['file_format'])
+        if not options['output']:
+            for block in blocks:
+                self.stdout.write(block, ending='')
+            return
+        with open(options['output'], 'w', encoding='utf-8', newline='') as out:
+            out.writelines(blocks)
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from procurement.services.extraction_cache import prune
+
+
+class Command(BaseCommand):
+    help = 'Delete extraction cache entries from old parser versions, past the age limit or over the size limit'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-entries', type=int, default=None)
+        parser.add_argument('--max-age-days', type=int, default=None)
+        parser.add_argument('--max-bytes', type=int, default=None)
+
+    def handle(self, *args, **options):
+        deleted = prune(
+            max_entries=options['max_entries'], max_age_days=options['max_age_days'], max_bytes=options['max_bytes']
+        )
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} extraction cache entries'))
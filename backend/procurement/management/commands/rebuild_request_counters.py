@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from procurement.services.counters import rebuild_counters
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the dashboard request counters from the purchase requests table'
+
+    def handle(self, *args, **options):
+        rows = rebuild_counters()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {rows} request counter rows'))
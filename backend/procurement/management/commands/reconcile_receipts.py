@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from procurement.models import ReconciliationSweep
+from procurement.services.reconciliation import DEFAULT_CHUNK_SIZE, resumable_sweep, run_sweep
+
+
+class Command(BaseCommand):
+    help = 'Check every approved request with a receipt against its PO total, resuming an interrupted sweep'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument('--restart', action='store_true', help='start a new sweep instead of resuming')
+
+    def handle(self, *args, **options):
+        sweep = ReconciliationSweep.objects.create() if options['restart'] else resumable_sweep()
+        if sweep.last_request_id:
+            self.stdout.write(f'Resuming sweep {sweep.id} after request {sweep.last_request_id}')
+
+        def progress(sweep):
+            self.stdout.write(f'  {sweep.checked} checked, up to request {sweep.last_request_id}')
+
+        start = time.perf_counter()
+        sweep = run_sweep(sweep, chunk_size=options['chunk_size'], on_chunk=progress)
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f'Sweep {sweep.id}: {sweep.checked} checked, {sweep.matched} matched, {sweep.mismatched} mismatched, '
+            f'{sweep.unread} unread, {sweep.updated} updated in {elapsed:.1f}s'
+        ))
@@ -0,0 +1,38 @@
+# Generated by Django 5.1.4 on 2026-10-16 23:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('procurement', '0006_purchaserequest_proforma_extracted_data_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='purchaserequest',
+            name='proforma',
+            field=models.URLField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='approval',
+            index=models.Index(fields=['approver', '-decided_at'], name='approval_approver_decided_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchaserequest',
+            index=models.Index(fields=['-created_at', '-id'], name='pr_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchaserequest',
+            index=models.Index(fields=['status', '-created_at', '-id'], name='pr_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchaserequest',
+            index=models.Index(condition=models.Q(('status', 'PENDING')), fields=['current_level', '-created_at', '-id'], name='pr_pending_level_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchaserequest',
+            index=models.Index(fields=['created_by', '-created_at', '-id'], name='pr_creator_created_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.4 on 2026-10-16 23:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('procurement', '0007_purchase_request_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='approval',
+            name='approval_approver_decided_idx',
+        ),
+        migrations.AddIndex(
+            model_name='approval',
+            index=models.Index(fields=['approver', '-decided_at', '-id'], name='approval_approver_history_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.1.4 on 2026-10-16 23:41
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def populate_counters(apps, schema_editor):
+    PurchaseRequest = apps.get_model('procurement', 'PurchaseRequest')
+    RequestCounter = apps.get_model('procurement', 'RequestCounter')
+    rows = (
+        PurchaseRequest.objects.order_by()
+        .values('created_by_id', 'status', 'current_level')
+        .annotate(count=Count('pk'), amount_total=Sum('amount'))
+    )
+    RequestCounter.objects.bulk_create(RequestCounter(**row) for row in rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('procurement', '0008_approval_history_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('APPROVED', 'Approved'), ('REJECTED', 'Rejected')], max_length=16)),
+                ('current_level', models.PositiveSmallIntegerField()),
+                ('count', models.IntegerField(default=0)),
+                ('amount_total', models.DecimalField(decimal_places=2, default=0, max_digits=18)),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='request_counters', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('created_by', 'status', 'current_level'), name='request_counter_unique')],
+            },
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.1.4 on 2026-10-16 23:49
+
+import django.core.validators
+from django.db import migrations, models
+
+
+def seed_default_chain(apps, schema_editor):
+    # the two-level chain that used to be hardcoded in services/workflows.py
+    ApprovalStep = apps.get_model('procurement', 'ApprovalStep')
+    ApprovalStep.objects.bulk_create([
+        ApprovalStep(level=1, role='approver_level_1'),
+        ApprovalStep(level=2, role='approver_level_2'),
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('procurement', '0010_purchaserequest_claim'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ApprovalStep',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('level', models.PositiveSmallIntegerField(unique=True, validators=[django.core.validators.MinValueValidator(1)])),
+                ('role', models.CharField(choices=[('staff', 'Staff'), ('approver_level_1', 'Approver Level 1'), ('approver_level_2', 'Approver Level 2'), ('finance', 'Finance')], max_length=32)),
+                ('min_amount', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('max_amount', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+            ],
+            options={
+                'ordering': ['level'],
+            },
+        ),
+        migrations.RunPython(seed_default_chain, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.1.4 on 2026-10-16 23:53
+
+from django.db import migrations, models
+
+
+def mark_existing_documents_ready(apps, schema_editor):
+    PurchaseRequest = apps.get_model('procurement', 'PurchaseRequest')
+    PurchaseRequest.objects.filter(status='APPROVED').exclude(purchase_order_file='').exclude(
+        purchase_order_file__isnull=True
+    ).update(purchase_order_status='READY')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('procurement', '0011_approval_steps'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='purchaserequest',
+            name='purchase_order_status',
+            field=models.CharField(blank=True, choices=[('PENDING', 'Pending'), ('READY', 'Ready'), ('FAILED', 'Failed')], default='', max_length=16),
+        ),
+        migrations.RunPython(mark_existing_documents_ready, migrations.RunPython.noop),
+    ]
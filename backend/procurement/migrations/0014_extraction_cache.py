@@ -0,0 +1,35 @@
+# Generated by Django 5.1.4 on 2026-10-17 00:03
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('procurement', '0013_document_jobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='documentjob',
+            name='content_sha256',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.CreateModel(
+            name='ExtractionCacheEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_sha256', models.CharField(max_length=64)),
+                ('parser_version', models.CharField(max_length=32)),
+                ('result', models.JSONField()),
+                ('document_size', models.PositiveIntegerField()),
+                ('hits', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('content_sha256', 'parser_version'), name='extraction_cache_key')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.4 on 2026-10-17 00:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('procurement', '0014_extraction_cache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='purchaserequest',
+            name='receipt_reconciliation',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='purchaserequest',
+            name='receipt_status',
+            field=models.CharField(blank=True, choices=[('PENDING', 'Pending'), ('MATCHED', 'Matched'), ('MISMATCH', 'Mismatch'), ('FAILED', 'Failed')], default='', max_length=16),
+        ),
+        migrations.AlterField(
+            model_name='documentjob',
+            name='kind',
+            field=models.CharField(choices=[('PROFORMA', 'Proforma'), ('RECEIPT', 'Receipt')], max_length=16),
+        ),
+        migrations.AddIndex(
+            model_name='purchaserequest',
+            index=models.Index(condition=models.Q(('receipt_status', 'MISMATCH')), fields=['-created_at', '-id'], name='pr_receipt_mismatch_idx'),
+        ),
+    ]
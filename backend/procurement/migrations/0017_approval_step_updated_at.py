@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-17 00:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('procurement', '0016_reconciliation_sweep'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='approvalstep',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -1,3 +1,5 @@
+import uuid
+
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MinValueValidator
@@ -30,12 +32,46 @@ class User(AbstractUser):
         return f"{self.username} ({self.role})"
 
 
+class ApprovalStep(models.Model):
+    """
+    One level of the approval chain, compiled by ``services.policy``.
+
+    A step applies to a request when ``min_amount <= amount < max_amount``
+    (either bound may be empty); a request visits its applicable levels in
+    ascending order.
+    """
+
+    level = models.PositiveSmallIntegerField(unique=True, validators=[MinValueValidator(1)])
+    role = models.CharField(max_length=32, choices=User.Role.choices)
+    min_amount = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    max_amount = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    # with the row count, the policy version every process polls for changes
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["level"]
+
+    def __str__(self):
+        return f"L{self.level} - {self.role}"
+
+
 class PurchaseRequest(models.Model):
     class Status(models.TextChoices):
         PENDING = "PENDING", "Pending"
         APPROVED = "APPROVED", "Approved"
         REJECTED = "REJECTED", "Rejected"
 
+    class DocumentStatus(models.TextChoices):
+        PENDING = "PENDING", "Pending"
+        READY = "READY", "Ready"
+        FAILED = "FAILED", "Failed"
+
+    class Reconciliation(models.TextChoices):
+        PENDING = "PENDING", "Pending"
+        MATCHED = "MATCHED", "Matched"
+        MISMATCH = "MISMATCH", "Mismatch"
+        FAILED = "FAILED", "Failed"
+
     title = models.CharField(max_length=255)
     description = models.TextField()
     amount = models.DecimalField(max_digits=12, decimal_places=2, validators=[MinValueValidator(0)])
@@ -49,11 +85,41 @@ class PurchaseRequest(models.Model):
     proforma_extracted_data = models.JSONField(null=True, blank=True)
     purchase_order_file = models.FileField(upload_to=po_upload_path, null=True, blank=True)
     purchase_order_metadata = models.JSONField(default=dict, blank=True)
+    # the PO file is written by a background job after the final approval commits
+    purchase_order_status = models.CharField(max_length=16, choices=DocumentStatus.choices, blank=True, default="")
     receipt = models.URLField(blank=True, null=True, )
+    # receipt total checked against the PO by a background job (services.documents.run_receipt_job)
+    receipt_status = models.CharField(max_length=16, choices=Reconciliation.choices, blank=True, default="")
+    receipt_reconciliation = models.JSONField(null=True, blank=True)
     supplier = models.CharField(max_length=255, null=True, blank=True)
+    # review lease handed out by the claim queue (see services.workflows.claim_requests)
+    claimed_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="claimed_requests"
+    )
+    claim_expires_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # Default ordering and the (created_at, id) keyset used for paging
+            models.Index(fields=["-created_at", "-id"], name="pr_created_idx"),
+            # Finance queues: approved / rejected / finance-pending
+            models.Index(fields=["status", "-created_at", "-id"], name="pr_status_created_idx"),
+            # Approver pending queue, only PENDING rows are indexed
+            models.Index(
+                fields=["current_level", "-created_at", "-id"],
+                condition=models.Q(status="PENDING"),
+                name="pr_pending_level_idx",
+            ),
+            # Staff "my requests" listing
+            models.Index(fields=["created_by", "-created_at", "-id"], name="pr_creator_created_idx"),
+            # Finance receipt mismatch queue, only mismatched rows are indexed
+            models.Index(
+                fields=["-created_at", "-id"],
+                condition=models.Q(receipt_status="MISMATCH"),
+                name="pr_receipt_mismatch_idx",
+            ),
+        ]
 
     def mark_approved(self, metadata=None):
         self.status = self.Status.APPROVED
@@ -83,6 +149,10 @@ class Approval(models.Model):
     class Meta:
         unique_together = ("purchase_request", "level")
         ordering = ["level"]
+        indexes = [
+            # Approver history (my-approvals): filter, date range and keyset order
+            models.Index(fields=["approver", "-decided_at", "-id"], name="approval_approver_history_idx"),
+        ]
 
     def __str__(self):
         return f"{self.purchase_request_id} - L{self.level} - {self.decision}"
@@ -118,3 +188,106 @@ class FinanceComment(models.Model):
 
     def __str__(self):
         return f"FinanceComment {self.id} on PR {self.purchase_request_id} by {self.user_id}"
+
+
+class RequestCounter(models.Model):
+    """
+    Running count and amount total of purchase requests per creator, status
+    and level, kept in step by ``services.counters`` so dashboard stats never
+    scan ``PurchaseRequest``.
+    """
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="request_counters")
+    status = models.CharField(max_length=16, choices=PurchaseRequest.Status.choices)
+    current_level = models.PositiveSmallIntegerField()
+    count = models.IntegerField(default=0)
+    amount_total = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["created_by", "status", "current_level"], name="request_counter_unique"),
+        ]
+
+    def __str__(self):
+        return f"{self.created_by_id} {self.status} L{self.current_level}: {self.count}"
+
+
+class DocumentJob(models.Model):
+    """An uploaded document processed in the background by ``procurement.tasks``."""
+
+    class Kind(models.TextChoices):
+        PROFORMA = "PROFORMA", "Proforma"
+        RECEIPT = "RECEIPT", "Receipt"
+
+    class Status(models.TextChoices):
+        QUEUED = "QUEUED", "Queued"
+        RUNNING = "RUNNING", "Running"
+        SUCCEEDED = "SUCCEEDED", "Succeeded"
+        FAILED = "FAILED", "Failed"
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    purchase_request = models.ForeignKey(PurchaseRequest, on_delete=models.CASCADE, related_name="document_jobs")
+    kind = models.CharField(max_length=16, choices=Kind.choices)
+    status = models.CharField(max_length=16, choices=Status.choices, default=Status.QUEUED)
+    source_url = models.URLField(max_length=1000)
+    # SHA-256 of the downloaded document, the key into ExtractionCacheEntry
+    content_sha256 = models.CharField(max_length=64, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="document_jobs")
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.kind} job {self.id} for PR {self.purchase_request_id}: {self.status}"
+
+
+class ExtractionCacheEntry(models.Model):
+    """
+    Extraction result for one document's bytes under one parser version,
+    maintained by ``services.extraction_cache``.
+    """
+    content_sha256 = models.CharField(max_length=64)
+    parser_version = models.CharField(max_length=32)
+    result = models.JSONField()
+    document_size = models.PositiveIntegerField()
+    hits = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["content_sha256", "parser_version"], name="extraction_cache_key"),
+        ]
+
+    def __str__(self):
+        return f"{self.content_sha256[:12]} v{self.parser_version} ({self.hits} hits)"
+
+
+class ReconciliationSweep(models.Model):
+    """
+    Progress of one receipt-vs-PO sweep over approved requests, run by
+    ``services.reconciliation``. Requests are visited in id order and
+    ``last_request_id`` is saved with every chunk, so an interrupted sweep
+    resumes where it stopped.
+    """
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    last_request_id = models.BigIntegerField(default=0)
+    checked = models.PositiveIntegerField(default=0)
+    matched = models.PositiveIntegerField(default=0)
+    mismatched = models.PositiveIntegerField(default=0)
+    # approved requests with a receipt whose total was never extracted
+    unread = models.PositiveIntegerField(default=0)
+    # requests whose stored reconciliation changed
+    updated = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["-started_at"]
+
+    def __str__(self):
+        state = "finished" if self.finished_at else f"at request {self.last_request_id}"
+        return f"Sweep {self.id} ({state}): {self.mismatched}/{self.checked} mismatched"
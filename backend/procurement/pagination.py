@@ -0,0 +1,183 @@
+"""Pagination classes for the procurement API."""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+def estimate_count(queryset) -> int:
+    """
+    Return a cheap row-count estimate for ``queryset``.
+
+    On PostgreSQL the planner's row estimate is read from ``EXPLAIN`` so no
+    rows are scanned; other backends fall back to an exact ``COUNT(*)``.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return queryset.count()
+    sql, params = queryset.order_by().values("pk").query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class KeysetPagination(BasePagination):
+    """
+    Forward-only keyset pagination over ``(ordering_field, id)``, newest first.
+
+    Each page is fetched with ``WHERE (ordering_field, id) < cursor LIMIT n`` so
+    deep pages cost the same as the first one and no ``COUNT(*)`` is issued.
+    Pass ``?include_total=true`` to get an ``estimated_total`` in the response.
+    """
+
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    total_query_param = "include_total"
+    ordering_field = "created_at"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+
+        queryset = queryset.order_by(f"-{self.ordering_field}", "-pk")
+        position = self.decode_cursor(request)
+        if position is not None:
+            value, pk = position
+            queryset = queryset.filter(
+                Q(**{f"{self.ordering_field}__lt": value})
+                | Q(**{self.ordering_field: value, "pk__lt": pk})
+            )
+
+        self.estimated_total = None
+        if self._include_total(request):
+            self.estimated_total = estimate_count(queryset)
+
+        results = list(queryset[: self.page_size + 1])
+        self.has_next = len(results) > self.page_size
+        self.page = results[: self.page_size]
+        return self.page
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                return _positive_int(
+                    request.query_params[self.page_size_query_param],
+                    strict=True,
+                    cutoff=self.max_page_size,
+                )
+            except (KeyError, ValueError):
+                pass
+        return self.page_size
+
+    def _include_total(self, request):
+        return request.query_params.get(self.total_query_param, "").lower() in {"1", "true", "yes"}
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(encoded.encode("ascii")).decode("ascii")
+            value, pk = raw.rsplit("|", 1)
+            return datetime.fromisoformat(value), int(pk)
+        except (TypeError, ValueError, UnicodeError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, obj):
+        value = getattr(obj, self.ordering_field)
+        raw = f"{value.isoformat()}|{obj.pk}"
+        encoded = base64.urlsafe_b64encode(raw.encode("ascii")).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1])
+
+    def version_parts(self):
+        """What the response shows beyond the page rows, for its ETag."""
+        return self.get_next_link(), self.estimated_total
+
+    def get_paginated_response(self, data):
+        payload = {"next": self.get_next_link(), "results": data}
+        if self.estimated_total is not None:
+            payload["estimated_total"] = self.estimated_total
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "estimated_total": {"type": "integer"},
+                "results": schema,
+            },
+        }
+
+
+class ApprovalHistoryPagination(KeysetPagination):
+    """Keyset pagination over ``(decided_at, id)`` for an approver's history."""
+
+    ordering_field = "decided_at"
+
+
+class PurchaseRequestPagination(PageNumberPagination):
+    """
+    Page-number pagination for ``/requests/`` with an opt-in keyset mode.
+
+    Keyset mode is used when the client sends ``?cursor=`` or when the view
+    lists the current action in ``keyset_actions`` (the queue endpoints).
+    """
+
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    keyset_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.use_keyset(request, view):
+            self.keyset = self.keyset_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def use_keyset(self, request, view=None):
+        if self.keyset_class.cursor_query_param in request.query_params:
+            return True
+        return getattr(view, "action", None) in getattr(view, "keyset_actions", ())
+
+    def version_parts(self):
+        if self.keyset is not None:
+            return self.keyset.version_parts()
+        return self.page.paginator.count, self.get_next_link(), self.get_previous_link()
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_next_link(self):
+        if self.keyset is not None:
+            return self.keyset.get_next_link()
+        return super().get_next_link()
+
+    def get_previous_link(self):
+        if self.keyset is not None:
+            return None
+        return super().get_previous_link()
@@ -1,8 +1,12 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
+from django.db import transaction
+from django.db.models import Prefetch
 from rest_framework import serializers
 
-from .models import Approval, PurchaseRequest, Attachment
+from .models import Approval, DocumentJob, PurchaseRequest, Attachment, FinanceComment
+from .services import counters
+from .services.policy import get_policy
 
 User = get_user_model()
 
@@ -64,7 +68,65 @@ class ApprovalSerializer(serializers.ModelSerializer):
         read_only_fields = fields
 
 
-class PurchaseRequestSerializer(serializers.ModelSerializer):
+class SparseFieldsetMixin:
+    """
+    Trim serializer output to the fields requested on the query string.
+
+    ``?fields=a,b`` keeps only the listed fields, ``?view=summary`` keeps
+    ``summary_fields`` and ``?expand=x,y`` adds nested relations, which are
+    otherwise left out whenever a selection is made. Without any of these
+    parameters every field is returned.
+    """
+    summary_fields = ()
+    expandable_fields = ()
+
+    @classmethod
+    def requested_fields(cls, query_params):
+        fields = _split_param(query_params.get("fields"))
+        expand = _split_param(query_params.get("expand"))
+        summary = query_params.get("view") == "summary"
+        if not (fields or expand or summary):
+            return None
+
+        declared = set(cls.Meta.fields)
+        unknown = (fields | expand) - declared
+        if unknown:
+            raise serializers.ValidationError({"fields": f"Unknown fields: {', '.join(sorted(unknown))}"})
+
+        if fields:
+            selected = set(fields)
+        elif summary:
+            selected = set(cls.summary_fields)
+        else:
+            selected = declared - set(cls.expandable_fields)
+        return selected | expand | {"id"}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        if request is None:
+            return
+        selected = self.requested_fields(request.query_params)
+        if selected is None:
+            return
+        for name in set(self.fields) - selected:
+            self.fields.pop(name)
+
+
+def _split_param(value):
+    return {part.strip() for part in (value or "").split(",") if part.strip()}
+
+
+class PurchaseRequestSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    summary_fields = ("id", "title", "amount", "status", "current_level", "created_at")
+    expandable_fields = ("created_by", "approvals", "attachments", "finance_comments")
+    # model columns read by computed fields, used to build .only() selections
+    field_sources = {
+        "proforma_url": ("proforma",),
+        "receipt_url": ("receipt",),
+        "purchase_order_file_url": ("purchase_order_file",),
+    }
+
     created_by = UserSerializer(read_only=True)
     approvals = ApprovalSerializer(many=True, read_only=True)
     attachments = serializers.SerializerMethodField()
@@ -73,6 +135,33 @@ class PurchaseRequestSerializer(serializers.ModelSerializer):
     proforma_url = serializers.SerializerMethodField()
     receipt_url = serializers.SerializerMethodField()
 
+    @classmethod
+    def setup_eager_loading(cls, queryset, fields=None):
+        """
+        Load every relation this serializer walks up front.
+
+        With a sparse ``fields`` selection only the matching columns are
+        selected and only the requested nested relations are prefetched.
+        """
+        relations = {
+            "approvals": Prefetch("approvals", queryset=Approval.objects.select_related("approver")),
+            "attachments": Prefetch("attachments"),
+            "finance_comments": Prefetch("finance_comments", queryset=FinanceComment.objects.select_related("user")),
+        }
+        # proforma_extracted_data is never serialized and can be large
+        queryset = queryset.defer("proforma_extracted_data")
+        if fields is None:
+            return queryset.select_related("created_by").prefetch_related(*relations.values())
+
+        # created_at is the keyset pagination key, updated_at versions the page
+        columns = {"id", "created_at", "updated_at"}
+        for name in fields - set(relations):
+            columns.update(cls.field_sources.get(name, (name,)))
+        queryset = queryset.only(*columns)
+        if "created_by" in fields:
+            queryset = queryset.select_related("created_by")
+        return queryset.prefetch_related(*(prefetch for name, prefetch in relations.items() if name in fields))
+
     def get_attachments(self, obj):
         attachments_qs = getattr(obj, 'attachments', None)
         if attachments_qs is None:
@@ -135,9 +224,12 @@ class PurchaseRequestSerializer(serializers.ModelSerializer):
             "proforma_url",
             "receipt",
             "receipt_url",
+            "receipt_status",
+            "receipt_reconciliation",
             "purchase_order_file",
             "purchase_order_file_url",
             "purchase_order_metadata",
+            "purchase_order_status",
             "supplier",
             "attachments",
             "finance_comments",
@@ -153,8 +245,11 @@ class PurchaseRequestSerializer(serializers.ModelSerializer):
             "approved_at",
             "proforma",
             "receipt",
+            "receipt_status",
+            "receipt_reconciliation",
             "purchase_order_file",
             "purchase_order_metadata",
+            "purchase_order_status",
             "approvals",
             "attachments",
             "finance_comments",
@@ -164,6 +259,45 @@ class PurchaseRequestSerializer(serializers.ModelSerializer):
         )
 
 
+class ApprovalHistorySerializer(serializers.ModelSerializer):
+    request = PurchaseRequestSerializer(source="purchase_request", read_only=True)
+
+    class Meta:
+        model = Approval
+        fields = ("id", "request", "decision", "comments", "level", "decided_at")
+        read_only_fields = fields
+
+
+class ApprovalHistoryFilterSerializer(serializers.Serializer):
+    """Optional ``decided_at`` range for the my-approvals history."""
+    decided_after = serializers.DateTimeField(required=False, input_formats=["iso-8601", "%Y-%m-%d"])
+    decided_before = serializers.DateTimeField(required=False, input_formats=["iso-8601", "%Y-%m-%d"])
+
+    def validate(self, data):
+        after = data.get("decided_after")
+        before = data.get("decided_before")
+        if after and before and after >= before:
+            raise serializers.ValidationError("'decided_after' must be earlier than 'decided_before'.")
+        return data
+
+
+class ExportFilterSerializer(serializers.Serializer):
+    """Format, statuses and ``created_at`` range for the purchase request export."""
+    file_format = serializers.ChoiceField(choices=["csv", "ndjson"], default="csv")
+    status = serializers.ListField(
+        child=serializers.ChoiceField(choices=PurchaseRequest.Status.choices), required=False
+    )
+    created_after = serializers.DateTimeField(required=False, input_formats=["iso-8601", "%Y-%m-%d"])
+    created_before = serializers.DateTimeField(required=False, input_formats=["iso-8601", "%Y-%m-%d"])
+
+    def validate(self, data):
+        after = data.get("created_after")
+        before = data.get("created_before")
+        if after and before and after >= before:
+            raise serializers.ValidationError("'created_after' must be earlier than 'created_before'.")
+        return data
+
+
 class PurchaseRequestCreateSerializer(serializers.ModelSerializer):
     supplier = serializers.CharField(required=False, allow_blank=True)
 
@@ -176,10 +310,15 @@ class PurchaseRequestCreateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Amount is required.")
         return value
 
+    @transaction.atomic
     def create(self, validated_data):
         request = self.context["request"]
         supplier = validated_data.pop('supplier', None)
-        pr = PurchaseRequest.objects.create(created_by=request.user, supplier=supplier, **validated_data)
+        first_level = get_policy().first_level(validated_data["amount"])
+        pr = PurchaseRequest.objects.create(
+            created_by=request.user, supplier=supplier, current_level=first_level, **validated_data
+        )
+        counters.record_created(pr)
         return pr
 
 
@@ -196,6 +335,20 @@ class PurchaseRequestUpdateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("You do not own this request.")
         return attrs
 
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        # an approval may have moved the request on since it was loaded
+        instance = PurchaseRequest.objects.select_for_update().get(pk=instance.pk)
+        if instance.status != PurchaseRequest.Status.PENDING:
+            raise serializers.ValidationError("Only pending requests can be updated.")
+        before = counters.counter_state(instance)
+        if "amount" in validated_data:
+            # a new amount may add or drop levels still ahead of the request
+            instance.current_level = get_policy().resume_level(validated_data["amount"], instance.current_level)
+        instance = super().update(instance, validated_data)
+        counters.record_change(before, instance)
+        return instance
+
 
 class FileUploadSerializer(serializers.Serializer):
     file = serializers.FileField()
@@ -248,8 +401,48 @@ class AttachmentUploadSerializer(serializers.Serializer):
         return value
 
 
+class AttachmentUrlsSerializer(serializers.Serializer):
+    """External URLs (e.g., Cloudinary) to attach alongside any uploaded files."""
+    external_urls = serializers.ListField(child=serializers.URLField(max_length=200), required=False, default=list)
+
+
 class ApprovalDecisionSerializer(serializers.Serializer):
     decision = serializers.ChoiceField(choices=Approval.Decision.choices)
     comments = serializers.CharField(required=False, allow_blank=True)
 
 
+class BulkDecisionItemSerializer(serializers.Serializer):
+    id = serializers.IntegerField(min_value=1)
+    decision = serializers.ChoiceField(choices=Approval.Decision.choices)
+    comments = serializers.CharField(required=False, allow_blank=True, default="")
+
+
+class BulkDecisionSerializer(serializers.Serializer):
+    decisions = BulkDecisionItemSerializer(many=True, allow_empty=False, max_length=500)
+
+
+class ClaimSerializer(serializers.Serializer):
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=10)
+
+
+class DocumentJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DocumentJob
+        fields = (
+            "id",
+            "kind",
+            "status",
+            "purchase_request",
+            "result",
+            "error",
+            "created_at",
+            "started_at",
+            "finished_at",
+        )
+        read_only_fields = fields
+
+
+class ReleaseClaimSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=500)
+
+
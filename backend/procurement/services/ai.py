@@ -54,11 +54,19 @@ def extract_text(file_obj) -> str:
     return _extract_text_with_ocr(file_bytes)
 
 
+# An optionally currency-prefixed amount: 1,234.56, 1234.5 or 1234
+CURRENCY_AMOUNT_PATTERN = re.compile(
+    r"(?:USD|KES|UGX|ZAR|GBP|EUR|R|\$)?\s?(\d{1,3}(?:,\d{3})+(?:\.\d{1,2})?|\d+(?:\.\d{1,2})?)"
+)
+# Receipts differ from PO amounts by rounding at most
+RECEIPT_TOLERANCE = Decimal("1.00")
+
+
 def _parse_currency_candidates(text: str) -> List[Decimal]:
     amounts = []
-    for match in re.findall(r"(?:USD|R|KES|UGX|ZAR|GBP|EUR)?\\s?([0-9]+(?:\\.[0-9]{2})?)", text):
+    for match in CURRENCY_AMOUNT_PATTERN.findall(text):
         try:
-            amounts.append(Decimal(match))
+            amounts.append(Decimal(match.replace(",", "")))
         except Exception:  # pragma: no cover
             continue
     return amounts
@@ -70,8 +78,8 @@ def extract_proforma_data(file_obj) -> Dict:
     Falls back to heuristic parsing when AI services are unavailable.
     """
     text = extract_text(file_obj)
-    vendor = re.search(r"Vendor[:\\s]+(.+)", text)
-    items = re.findall(r"(?:Item|Product)[:\\s]+(.+)", text)
+    vendor = re.search(r"Vendor[:\s]+(.+)", text)
+    items = re.findall(r"(?:Item|Product)[:\s]+(.+)", text)
     totals = _parse_currency_candidates(text)
 
     result = {
@@ -100,49 +108,17 @@ def llm_refine_extraction(raw_text: str) -> Dict:
     """
     Optionally call an LLM (OpenAI-compatible) to refine extracted fields.
     Controlled via settings: set `USE_LLM_EXTRACT = True` and `OPENAI_API_KEY`.
+    Calls go through the pooled, cached client in `services.llm`.
     Returns a dict with possible keys: vendor, items, total_estimate
     """
     if not getattr(settings, 'USE_LLM_EXTRACT', False):
         return {}
-    api_key = getattr(settings, 'OPENAI_API_KEY', None)
-    if not api_key or requests is None:
+    if not getattr(settings, 'OPENAI_API_KEY', None) or requests is None:
         return {}
 
-    prompt = (
-        "Extract vendor name, list of items (as short descriptions), and total amount "
-        "from the following document text. Return a JSON object with keys: vendor, items, total_estimate.\n\n" + raw_text
-    )
+    from .llm import get_client
 
-    try:
-        resp = requests.post(
-            "https://api.openai.com/v1/chat/completions",
-            headers={
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json",
-            },
-            json={
-                "model": "gpt-4o-mini",
-                "messages": [{"role": "user", "content": prompt}],
-                "temperature": 0.0,
-                "max_tokens": 500,
-            },
-            timeout=15,
-        )
-        resp.raise_for_status()
-        data = resp.json()
-        text = data['choices'][0]['message']['content']
-        # try to parse JSON from the assistant
-        j = re.search(r"\{[\s\S]*\}", text)
-        if j:
-            parsed = json.loads(j.group(0))
-            return {
-                'vendor': parsed.get('vendor'),
-                'items': parsed.get('items'),
-                'total_estimate': parsed.get('total_estimate'),
-            }
-    except Exception:
-        return {}
-    return {}
+    return get_client().refine_extraction(raw_text)
 
 
 def generate_purchase_order_metadata(purchase_request, vendor_data=None) -> Dict:
@@ -158,26 +134,34 @@ def generate_purchase_order_metadata(purchase_request, vendor_data=None) -> Dict
 
 
 def compare_receipt_to_po(purchase_request, receipt_data: Dict) -> Dict:
-    po_total = Decimal(purchase_request.purchase_order_metadata.get("total_estimate", "0"))
+    # requests without PO metadata yet are reconciled against the requested amount
+    po_total = Decimal(
+        (purchase_request.purchase_order_metadata or {}).get("total_estimate") or purchase_request.amount
+    )
     receipt_total = Decimal(receipt_data.get("total", "0"))
     difference = receipt_total - po_total
     return {
         "po_total": str(po_total),
         "receipt_total": str(receipt_total),
         "difference": str(difference),
-        "matches": abs(difference) <= Decimal("1.00"),
+        "matches": abs(difference) <= RECEIPT_TOLERANCE,
     }
 
 
-def extract_receipt_data(file_obj) -> Dict:
-    text = extract_text(file_obj)
-    totals = _parse_currency_candidates(text)
+def parse_receipt_text(text: str) -> Dict:
+    """The receipt total: the last amount on the last "total" line, else the last amount in the text."""
+    total_lines = [line for line in text.splitlines() if "total" in line.lower()]
+    totals = (total_lines and _parse_currency_candidates(total_lines[-1])) or _parse_currency_candidates(text)
     return {
         "total": str(totals[-1]) if totals else "0.00",
         "raw_text": text[:5000],
     }
 
 
+def extract_receipt_data(file_obj) -> Dict:
+    return parse_receipt_text(extract_text(file_obj))
+
+
 def serialize_metadata(metadata: Dict) -> bytes:
     return json.dumps(metadata, indent=2).encode("utf-8")
 
@@ -0,0 +1,236 @@
+"""
+On-disk cache for external document bodies proxied by the download actions.
+
+Each cached URL has a metadata file (content type, size, validators, when it
+was last checked) and a body file named after the URL and its validator, so a
+changed upstream object never overwrites a body that is still being served.
+Within ``ATTACHMENT_CACHE_FRESH_SECONDS`` of the last check an entry is served
+without contacting the origin; after that it is revalidated with a
+conditional GET and only re-downloaded if the origin reports a change.
+
+Misses for the same URL are single-flight: the fetch runs under an exclusive
+lock, and callers that waited on it find the entry already stored. URLs are
+hashed onto ``LOCK_STRIPES`` thread locks and lock files (under ``locks/``,
+never evicted), so the number of locks stays fixed. Every request for an
+entry touches its metadata file, and once the bodies exceed
+``ATTACHMENT_CACHE_MAX_BYTES`` the least recently used entries are removed.
+Bodies larger than ``ATTACHMENT_CACHE_MAX_OBJECT_BYTES`` are not cached, and
+neither is anything while the cache directory cannot be written;
+``open_cached`` returns ``None`` and the caller streams from the origin.
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import requests
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:  # not POSIX; fall back to in-process locking only
+    fcntl = None
+
+CONNECT_TIMEOUT = 3
+CHUNK_SIZE = 64 * 1024
+LOCK_STRIPES = 64
+
+_locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+
+
+def cache_dir() -> Path:
+    path = Path(getattr(settings, "ATTACHMENT_CACHE_DIR", None) or Path(tempfile.gettempdir()) / "attachment-cache")
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def max_bytes() -> int:
+    return getattr(settings, "ATTACHMENT_CACHE_MAX_BYTES", None) or 512 * 1024 * 1024
+
+
+def max_object_bytes() -> int:
+    return getattr(settings, "ATTACHMENT_CACHE_MAX_OBJECT_BYTES", None) or 50 * 1024 * 1024
+
+
+def fresh_seconds() -> float:
+    return getattr(settings, "ATTACHMENT_CACHE_FRESH_SECONDS", None) or 300
+
+
+def _key(url: str) -> str:
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+
+def _meta_path(key: str) -> Path:
+    return cache_dir() / f"{key}.json"
+
+
+def _body_name(key: str, etag: str, last_modified: str) -> str:
+    validator = hashlib.sha256(f"{etag}\n{last_modified}".encode("utf-8")).hexdigest()[:16]
+    return f"{key}.{validator}.body"
+
+
+def _read_meta(key: str):
+    try:
+        return json.loads(_meta_path(key).read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def _write_atomic(path: Path, write):
+    """Write through a temporary file in the same directory, then rename it into place."""
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            write(fh)
+        os.replace(tmp, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp)
+        raise
+
+
+@contextlib.contextmanager
+def _exclusive(key: str):
+    """Hold the fetch lock for ``key``'s stripe across threads and, where supported, processes."""
+    stripe = int(key[:8], 16) % LOCK_STRIPES
+    with _locks[stripe]:
+        if fcntl is None:
+            yield
+            return
+        lock_dir = cache_dir() / "locks"
+        lock_dir.mkdir(exist_ok=True)
+        with open(lock_dir / f"{stripe}.lock", "a") as fh:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def _open(key: str, meta: dict):
+    """Open the entry's body and mark it recently used, or ``None`` if it was evicted."""
+    try:
+        body = open(cache_dir() / meta["body"], "rb")
+    except (OSError, KeyError):
+        return None
+    with contextlib.suppress(OSError):
+        os.utime(_meta_path(key))
+    return body, meta.get("content_type") or ""
+
+
+def _fresh(meta) -> bool:
+    return meta is not None and time.time() - meta.get("checked_at", 0) < fresh_seconds()
+
+
+class _TooLarge(Exception):
+    pass
+
+
+def _fetch(url: str, key: str, meta):
+    """Fetch or revalidate ``url`` and store the result; returns the new metadata."""
+    headers = {}
+    if meta and (cache_dir() / meta["body"]).exists():
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+    timeout = (CONNECT_TIMEOUT, getattr(settings, "ATTACHMENT_CACHE_TIMEOUT", None) or 15)
+    with requests.get(url, headers=headers, stream=True, timeout=timeout) as resp:
+        if resp.status_code == 304 and headers:
+            meta = dict(meta, checked_at=time.time())
+        else:
+            resp.raise_for_status()
+            limit = max_object_bytes()
+            if int(resp.headers.get("content-length") or 0) > limit:
+                raise _TooLarge
+            etag = resp.headers.get("etag", "")
+            last_modified = resp.headers.get("last-modified", "")
+            body = _body_name(key, etag, last_modified)
+            size = 0
+
+            def write(fh):
+                nonlocal size
+                for chunk in resp.iter_content(CHUNK_SIZE):
+                    size += len(chunk)
+                    if size > limit:
+                        raise _TooLarge
+                    fh.write(chunk)
+
+            _write_atomic(cache_dir() / body, write)
+            if meta and meta.get("body") != body:
+                with contextlib.suppress(OSError):
+                    os.unlink(cache_dir() / meta["body"])
+            meta = {
+                "url": url,
+                "body": body,
+                "size": size,
+                "content_type": resp.headers.get("content-type", ""),
+                "etag": etag,
+                "last_modified": last_modified,
+                "checked_at": time.time(),
+            }
+    _write_atomic(_meta_path(key), lambda fh: fh.write(json.dumps(meta).encode("utf-8")))
+    return meta
+
+
+def open_cached(url: str):
+    """
+    ``(file, content_type)`` for ``url``'s body, served from disk and fetched
+    on a miss, or ``None`` when it cannot be cached (origin unreachable with
+    no stored copy, the object is over the size limit, or the cache directory
+    cannot be written).
+    """
+    key = _key(url)
+    meta = _read_meta(key)
+    if _fresh(meta):
+        opened = _open(key, meta)
+        if opened is not None:
+            return opened
+    try:
+        with _exclusive(key):
+            # whoever held the lock before us may have just stored it
+            meta = _read_meta(key)
+            if not _fresh(meta) or not (cache_dir() / meta["body"]).exists():
+                try:
+                    meta = _fetch(url, key, meta)
+                except _TooLarge:
+                    return None
+                except requests.RequestException:
+                    # serve the stale copy, if any, rather than fail the download
+                    if meta is None:
+                        return None
+                else:
+                    evict()
+            return _open(key, meta)
+    except OSError:
+        # the cache directory is unusable (read-only, full, missing); the caller streams instead
+        return None
+
+
+def evict(limit=None):
+    """Remove least recently used entries until the stored bodies fit in ``limit`` bytes."""
+    limit = max_bytes() if limit is None else limit
+    entries = []
+    total = 0
+    for path in cache_dir().glob("*.json"):
+        try:
+            meta = json.loads(path.read_text())
+            used = path.stat().st_mtime
+        except (OSError, ValueError):
+            continue
+        entries.append((used, path, meta))
+        total += meta.get("size", 0)
+    entries.sort(key=lambda entry: entry[0])
+    for _, path, meta in entries:
+        if total <= limit:
+            break
+        # open handles keep serving an unlinked body until the response finishes
+        for stale in (path, cache_dir() / meta.get("body", "")):
+            with contextlib.suppress(OSError):
+                os.unlink(stale)
+        total -= meta.get("size", 0)
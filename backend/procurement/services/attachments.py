@@ -0,0 +1,125 @@
+"""
+Content types for attachments given as external URLs.
+
+``probe_content_types`` resolves a batch of URLs concurrently: each URL gets
+a HEAD request through one shared keep-alive session, and when HEAD fails or
+says nothing useful the first bytes are fetched with a ranged GET and sniffed
+locally. Results are kept in the default cache for a short TTL so a repeated
+upload of the same URLs makes no requests at all.
+"""
+
+import hashlib
+import mimetypes
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from requests.adapters import HTTPAdapter
+
+CACHE_PREFIX = "procurement:attachment-type"
+CONNECT_TIMEOUT = 2
+SNIFF_BYTES = 512
+GENERIC_TYPES = {"", "application/octet-stream", "binary/octet-stream"}
+# hosts come from user input: keep connection pools for at most this many,
+# least recently used pools are closed when a new host needs one
+MAX_HOST_POOLS = 16
+
+# (offset, signature, content type), checked in order
+MAGIC_NUMBERS = (
+    (0, b"%PDF-", "application/pdf"),
+    (0, b"\x89PNG\r\n\x1a\n", "image/png"),
+    (0, b"\xff\xd8\xff", "image/jpeg"),
+    (0, b"GIF87a", "image/gif"),
+    (0, b"GIF89a", "image/gif"),
+    (8, b"WEBP", "image/webp"),
+    (0, b"II*\x00", "image/tiff"),
+    (0, b"MM\x00*", "image/tiff"),
+    (0, b"PK\x03\x04", "application/zip"),
+)
+
+_session = None
+_session_workers = None
+_session_lock = threading.Lock()
+
+
+def probe_workers() -> int:
+    return getattr(settings, "ATTACHMENT_PROBE_WORKERS", None) or 8
+
+
+def sniff_content_type(data: bytes) -> str:
+    """Content type from the leading magic bytes of ``data``, or ``""``."""
+    for offset, signature, content_type in MAGIC_NUMBERS:
+        if data[offset:offset + len(signature)] == signature:
+            return content_type
+    return ""
+
+
+def _get_session() -> requests.Session:
+    """The keep-alive session shared by the probe threads, rebuilt when the worker count changes."""
+    global _session, _session_workers
+    workers = probe_workers()
+    with _session_lock:
+        if _session is None or _session_workers != workers:
+            if _session is not None:
+                _session.close()
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=MAX_HOST_POOLS, pool_maxsize=workers)
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+            _session_workers = workers
+        return _session
+
+
+def close_sessions():
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def _probe(url: str) -> str:
+    session = _get_session()
+    timeout = (CONNECT_TIMEOUT, getattr(settings, "ATTACHMENT_PROBE_TIMEOUT", None) or 3)
+    try:
+        head = session.head(url, timeout=timeout, allow_redirects=True)
+        content_type = head.headers.get("content-type", "") if head.ok else ""
+        if content_type.split(";")[0].strip().lower() not in GENERIC_TYPES:
+            return content_type
+    except requests.RequestException:
+        pass
+    # HEAD unavailable or unhelpful: read the first bytes and look at them
+    try:
+        with session.get(
+            url, headers={"Range": f"bytes=0-{SNIFF_BYTES - 1}"}, timeout=timeout, stream=True
+        ) as resp:
+            if resp.ok:
+                sniffed = sniff_content_type(next(resp.iter_content(SNIFF_BYTES), b""))
+                if sniffed:
+                    return sniffed
+    except requests.RequestException:
+        pass
+    return mimetypes.guess_type(urlsplit(url).path)[0] or ""
+
+
+def _cache_key(url: str) -> str:
+    return f"{CACHE_PREFIX}:{hashlib.sha256(url.encode('utf-8')).hexdigest()}"
+
+
+def probe_content_types(urls) -> list:
+    """Content type for each of ``urls`` (``""`` when unknown), in order."""
+    keys = {url: _cache_key(url) for url in urls}
+    cached = cache.get_many(list(keys.values()))
+    types = {url: cached[key] for url, key in keys.items() if key in cached}
+    missing = [url for url in dict.fromkeys(urls) if url not in types]
+    if missing:
+        with ThreadPoolExecutor(max_workers=min(probe_workers(), len(missing))) as executor:
+            types.update(zip(missing, executor.map(_probe, missing)))
+        cache.set_many(
+            {keys[url]: types[url] for url in missing},
+            getattr(settings, "ATTACHMENT_PROBE_CACHE_SECONDS", None) or 300,
+        )
+    return [types[url] for url in urls]
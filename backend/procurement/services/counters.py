@@ -0,0 +1,132 @@
+"""
+Incrementally maintained request counters for dashboard stats.
+
+Every write that creates a request, moves it between status/level or changes
+its amount calls into this module inside the same transaction, so
+``RequestCounter`` always matches ``PurchaseRequest``. ``rebuild_counters``
+recomputes the table from scratch for reconciliation.
+"""
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+
+from ..models import PurchaseRequest, RequestCounter
+
+
+def counter_state(purchase_request: PurchaseRequest):
+    """Snapshot of the fields counters are keyed and summed on."""
+    key = (purchase_request.created_by_id, purchase_request.status, purchase_request.current_level)
+    return key, Decimal(purchase_request.amount)
+
+
+def _apply(key, count: int, amount: Decimal):
+    created_by_id, status, level = key
+    counter = RequestCounter.objects.filter(created_by_id=created_by_id, status=status, current_level=level)
+    delta = {"count": F("count") + count, "amount_total": F("amount_total") + amount}
+    if counter.update(**delta):
+        return
+    # first request in this bucket: create the row (racing writers may both try), then adjust it
+    RequestCounter.objects.bulk_create(
+        [RequestCounter(created_by_id=created_by_id, status=status, current_level=level)],
+        ignore_conflicts=True,
+    )
+    counter.update(**delta)
+
+
+def record_created(purchase_request: PurchaseRequest):
+    key, amount = counter_state(purchase_request)
+    _apply(key, 1, amount)
+
+
+def record_change(before, purchase_request: PurchaseRequest):
+    """Move a request's contribution from the ``before`` snapshot to its current state."""
+    old_key, old_amount = before
+    new_key, new_amount = counter_state(purchase_request)
+    if old_key == new_key:
+        if old_amount != new_amount:
+            _apply(new_key, 0, new_amount - old_amount)
+        return
+    _apply(old_key, -1, -old_amount)
+    _apply(new_key, 1, new_amount)
+
+
+def record_changes(changes):
+    """Apply many ``(before, purchase_request)`` moves with one update per counter row."""
+    deltas = defaultdict(lambda: [0, Decimal("0")])
+    for before, purchase_request in changes:
+        old_key, old_amount = before
+        new_key, new_amount = counter_state(purchase_request)
+        deltas[old_key][0] -= 1
+        deltas[old_key][1] -= old_amount
+        deltas[new_key][0] += 1
+        deltas[new_key][1] += new_amount
+    for key in sorted(deltas):
+        count, amount = deltas[key]
+        if count or amount:
+            _apply(key, count, amount)
+
+
+def record_deleted(purchase_request: PurchaseRequest):
+    key, amount = counter_state(purchase_request)
+    _apply(key, -1, -amount)
+
+
+@transaction.atomic
+def rebuild_counters():
+    """Recompute every counter from ``PurchaseRequest``; returns the number of rows written."""
+    rows = (
+        PurchaseRequest.objects.order_by()
+        .values("created_by_id", "status", "current_level")
+        .annotate(count=Count("pk"), amount_total=Sum("amount"))
+    )
+    RequestCounter.objects.all().delete()
+    return len(RequestCounter.objects.bulk_create(RequestCounter(**row) for row in rows))
+
+
+def request_stats(created_by=None):
+    """
+    Counts and amount sums per status, per level of pending requests and per
+    creator, read from the counters table only.
+    """
+    counters = RequestCounter.objects.select_related("created_by").filter(count__gt=0)
+    if created_by is not None:
+        counters = counters.filter(created_by=created_by)
+
+    by_status = {status: _bucket() for status in PurchaseRequest.Status.values}
+    by_level = defaultdict(_bucket)
+    by_creator = {}
+    for counter in counters:
+        _add(by_status[counter.status], counter)
+        if counter.status == PurchaseRequest.Status.PENDING:
+            _add(by_level[str(counter.current_level)], counter)
+        creator = by_creator.setdefault(
+            counter.created_by_id,
+            {"created_by": counter.created_by_id, "username": counter.created_by.username, **_bucket()},
+        )
+        _add(creator, counter)
+
+    return {
+        "by_status": _as_strings(by_status),
+        "pending_by_level": _as_strings(dict(sorted(by_level.items()))),
+        "by_creator": [_as_string(row) for row in sorted(by_creator.values(), key=lambda row: row["username"])],
+    }
+
+
+def _bucket():
+    return {"count": 0, "amount": Decimal("0.00")}
+
+
+def _add(bucket, counter):
+    bucket["count"] += counter.count
+    bucket["amount"] += counter.amount_total
+
+
+def _as_string(bucket):
+    return {**bucket, "amount": f"{bucket['amount']:.2f}"}
+
+
+def _as_strings(buckets):
+    return {key: _as_string(bucket) for key, bucket in buckets.items()}
@@ -0,0 +1,228 @@
+"""
+Delivery of stored documents to the browser.
+
+``document_response`` is the single entry point for the download actions,
+called once the view has checked permissions. A document is either an
+external URL (``proforma``, ``receipt`` and URL attachments are stored as
+plain strings) or a ``FieldFile``:
+
+- external URLs are proxied through the on-disk ``attachment_cache`` so a
+  repeat download does not touch the origin;
+- files in S3 redirect to a presigned URL. One boto3 client is kept per
+  process, and each URL is reused from the default cache until
+  ``PRESIGN_REFRESH_MARGIN`` seconds before it expires;
+- local files go through ``file_response``.
+
+``file_response`` hands the transfer to the front proxy when
+``DOWNLOAD_OFFLOAD`` names a mechanism, and the response carries only a
+header:
+
+- ``"x-accel-redirect"`` (nginx): the path under ``MEDIA_ROOT`` is appended to
+  ``DOWNLOAD_ACCEL_PREFIX``, which must be an ``internal`` location aliased to
+  ``MEDIA_ROOT``;
+- ``"x-sendfile"`` (Apache mod_xsendfile, lighttpd): the absolute path is sent.
+
+Otherwise the file is streamed from Python with single-range support, so a
+resumed download only re-sends what is missing.
+"""
+
+import hashlib
+import mimetypes
+import re
+import threading
+from pathlib import Path, PurePosixPath
+from urllib.parse import quote, urlsplit
+
+import boto3
+import requests
+from botocore.config import Config
+from django.conf import settings
+from django.core.cache import cache
+from django.http import FileResponse, HttpResponse, HttpResponseRedirect, StreamingHttpResponse
+from django.utils.http import http_date, parse_http_date_safe
+
+from . import attachment_cache
+
+CHUNK_SIZE = 64 * 1024
+PRESIGN_CACHE_PREFIX = "procurement:presigned"
+# a cached URL is replaced this long before it expires, so a client never
+# receives one that lapses before its download starts
+PRESIGN_REFRESH_MARGIN = 300
+PROXY_TIMEOUT = 15
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def _content_disposition(filename: str) -> str:
+    try:
+        filename.encode("ascii")
+        return f'attachment; filename="{filename}"'
+    except UnicodeEncodeError:
+        return f"attachment; filename*=utf-8''{quote(filename)}"
+
+
+def parse_range(header: str, size: int):
+    """
+    ``(start, end)`` inclusive for a single-range ``Range`` header, ``None`` to
+    send the whole file (absent, malformed or multi-range), or ``()`` when the
+    range cannot be satisfied.
+    """
+    match = RANGE_PATTERN.match((header or "").strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if last and int(last) < start:
+            return None
+    else:
+        # suffix range: the last N bytes
+        start = max(size - int(last), 0)
+        end = size - 1
+    if start >= size or end < start:
+        return ()
+    return start, end
+
+
+def _range_applies(request, mtime: float) -> bool:
+    """``If-Range`` only keeps the range when the file has not changed since the client's copy."""
+    if_range = request.headers.get("If-Range")
+    if not if_range:
+        return True
+    since = parse_http_date_safe(if_range)
+    return since is not None and int(mtime) <= since
+
+
+def _offload_header(path: Path):
+    mode = (getattr(settings, "DOWNLOAD_OFFLOAD", None) or "").lower()
+    if mode == "x-sendfile":
+        return "X-Sendfile", str(path)
+    if mode == "x-accel-redirect":
+        try:
+            relative = path.resolve().relative_to(Path(settings.MEDIA_ROOT).resolve())
+        except ValueError:
+            # outside MEDIA_ROOT, so not reachable through the internal location
+            return None
+        prefix = getattr(settings, "DOWNLOAD_ACCEL_PREFIX", None) or "/protected/"
+        return "X-Accel-Redirect", prefix.rstrip("/") + "/" + quote(relative.as_posix())
+    return None
+
+
+def _read_range(path: Path, start: int, length: int):
+    with open(path, "rb") as fh:
+        fh.seek(start)
+        while length > 0:
+            chunk = fh.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def file_response(request, path, filename: str = None, content_type: str = None):
+    """Send the local file at ``path`` as an attachment, offloaded to the proxy when configured."""
+    path = Path(path)
+    filename = filename or path.name
+    content_type = content_type or mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+    offload = _offload_header(path)
+    if offload is not None:
+        response = HttpResponse(content_type=content_type)
+        response[offload[0]] = offload[1]
+        response["Content-Disposition"] = _content_disposition(filename)
+        return response
+
+    stat = path.stat()
+    byte_range = parse_range(request.headers.get("Range"), stat.st_size) if _range_applies(request, stat.st_mtime) else None
+    if byte_range == ():
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{stat.st_size}"
+    elif byte_range:
+        start, end = byte_range
+        response = StreamingHttpResponse(_read_range(path, start, end - start + 1), status=206, content_type=content_type)
+        response["Content-Length"] = str(end - start + 1)
+        response["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+        response["Content-Disposition"] = _content_disposition(filename)
+    else:
+        response = FileResponse(open(path, "rb"), as_attachment=True, filename=filename, content_type=content_type)
+    response["Accept-Ranges"] = "bytes"
+    response["Last-Modified"] = http_date(stat.st_mtime)
+    return response
+
+
+_s3 = None
+_s3_config = None
+_s3_lock = threading.Lock()
+
+
+def _s3_settings():
+    return (
+        getattr(settings, "AWS_ACCESS_KEY_ID", None),
+        getattr(settings, "AWS_SECRET_ACCESS_KEY", None),
+        getattr(settings, "AWS_S3_REGION_NAME", None),
+        getattr(settings, "AWS_S3_ENDPOINT_URL", None),
+        getattr(settings, "AWS_S3_SIGNATURE_VERSION", None) or "s3v4",
+    )
+
+
+def s3_client():
+    """The process-wide S3 client, rebuilt when its settings change."""
+    global _s3, _s3_config
+    config = _s3_settings()
+    with _s3_lock:
+        if _s3 is None or _s3_config != config:
+            access_key, secret_key, region, endpoint_url, signature_version = config
+            _s3 = boto3.client(
+                "s3",
+                aws_access_key_id=access_key,
+                aws_secret_access_key=secret_key,
+                region_name=region,
+                endpoint_url=endpoint_url,
+                config=Config(signature_version=signature_version),
+            )
+            _s3_config = config
+        return _s3
+
+
+def presigned_url(key: str) -> str:
+    """A GET URL for ``key`` in the storage bucket, reused until shortly before it expires."""
+    bucket = settings.AWS_STORAGE_BUCKET_NAME
+    expires = getattr(settings, "DOWNLOAD_PRESIGN_SECONDS", None) or 3600
+    cache_key = f"{PRESIGN_CACHE_PREFIX}:{hashlib.sha256(f'{bucket}/{key}'.encode('utf-8')).hexdigest()}"
+    url = cache.get(cache_key)
+    if url is None:
+        url = s3_client().generate_presigned_url(
+            "get_object", Params={"Bucket": bucket, "Key": key}, ExpiresIn=expires
+        )
+        cache.set(cache_key, url, max(expires - PRESIGN_REFRESH_MARGIN, 1))
+    return url
+
+
+def external_response(url: str, filename: str):
+    """Proxy an external document so it downloads as an attachment, from the disk cache when possible."""
+    cached = attachment_cache.open_cached(url)
+    if cached is not None:
+        body, content_type = cached
+        return FileResponse(body, as_attachment=True, filename=filename, content_type=content_type or "application/octet-stream")
+    # not cacheable (too large, or the cache could not fetch it): stream from the origin
+    try:
+        resp = requests.get(url, stream=True, timeout=PROXY_TIMEOUT)
+        resp.raise_for_status()
+    except requests.RequestException:
+        # fall back to a redirect if we cannot proxy
+        return HttpResponseRedirect(url)
+    response = StreamingHttpResponse(
+        resp.iter_content(chunk_size=CHUNK_SIZE),
+        content_type=resp.headers.get("content-type", "application/octet-stream"),
+    )
+    response["Content-Disposition"] = _content_disposition(filename)
+    return response
+
+
+def document_response(request, document, default_name: str = "document"):
+    """Deliver ``document``, an external URL string or a stored ``FieldFile``."""
+    if isinstance(document, str):
+        return external_response(document, PurePosixPath(urlsplit(document).path).name or default_name)
+    if getattr(settings, "AWS_STORAGE_BUCKET_NAME", None):
+        return HttpResponseRedirect(presigned_url(document.name))
+    return file_response(request, document.path)
@@ -0,0 +1,173 @@
+"""
+Background document processing.
+
+Uploads are recorded as ``DocumentJob`` rows and processed by Celery tasks in
+``procurement.tasks``, so downloads and OCR never run in a web worker. The
+request/response cycle only creates the job; clients poll ``/jobs/<id>/``.
+Extraction results are cached by the hash of the downloaded bytes
+(``extraction_cache``), so a document is only extracted once whatever URL it
+comes from.
+Receipts are extracted the same way and reconciled against the PO.
+"""
+
+import io
+from functools import partial
+
+import requests
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import DocumentJob, PurchaseRequest
+from ..utils.ocr import extract_proforma_data
+from . import extraction_cache
+from .ai import extract_receipt_data
+from .workflows import reconcile_receipt
+
+DOWNLOAD_TIMEOUT = 10
+
+
+class DownloadError(Exception):
+    """The source document could not be fetched; the job may be retried."""
+
+
+def enqueue_proforma(purchase_request: PurchaseRequest, external_url: str, user) -> DocumentJob:
+    """Record a proforma job and queue it once the current transaction commits."""
+    from ..tasks import process_proforma
+
+    job = _create_job(purchase_request, DocumentJob.Kind.PROFORMA, external_url, user)
+    transaction.on_commit(partial(process_proforma.delay, str(job.pk)))
+    return job
+
+
+@transaction.atomic
+def enqueue_receipt(purchase_request: PurchaseRequest, external_url: str, user) -> DocumentJob:
+    """Store the receipt URL and queue its extraction and reconciliation once the transaction commits."""
+    from ..tasks import process_receipt
+
+    PurchaseRequest.objects.filter(pk=purchase_request.pk).update(
+        receipt=external_url,
+        receipt_status=PurchaseRequest.Reconciliation.PENDING,
+        receipt_reconciliation=None,
+        updated_at=timezone.now(),
+    )
+    job = _create_job(purchase_request, DocumentJob.Kind.RECEIPT, external_url, user)
+    transaction.on_commit(partial(process_receipt.delay, str(job.pk)))
+    return job
+
+
+def _create_job(purchase_request: PurchaseRequest, kind: str, external_url: str, user) -> DocumentJob:
+    return DocumentJob.objects.create(
+        purchase_request=purchase_request, kind=kind, source_url=external_url, created_by=user
+    )
+
+
+def fetch_document(url: str):
+    """Download ``url`` into a named in-memory file."""
+    try:
+        resp = requests.get(url, timeout=DOWNLOAD_TIMEOUT)
+        resp.raise_for_status()
+    except requests.RequestException as exc:
+        raise DownloadError(f"Failed to download from external URL: {exc}") from exc
+    file_obj = io.BytesIO(resp.content)
+    file_obj.name = url.split("/")[-1].split("?")[0] or "proforma.pdf"
+    return file_obj
+
+
+def _finish(job: DocumentJob, status: str, result=None, error: str = ""):
+    job.status = status
+    job.result = result
+    job.error = error
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "content_sha256", "started_at", "result", "error", "finished_at"])
+
+
+@transaction.atomic
+def _complete(job: DocumentJob, extracted_data):
+    PurchaseRequest.objects.filter(pk=job.purchase_request_id).update(
+        proforma=job.source_url,
+        proforma_extracted_data=extracted_data,
+        updated_at=timezone.now(),
+    )
+    _finish(job, DocumentJob.Status.SUCCEEDED, result=extracted_data)
+
+
+@transaction.atomic
+def fail_job(job_id, error: str):
+    failed = DocumentJob.objects.filter(pk=job_id).exclude(status=DocumentJob.Status.SUCCEEDED).update(
+        status=DocumentJob.Status.FAILED, error=error, finished_at=timezone.now()
+    )
+    job = DocumentJob.objects.filter(pk=job_id, kind=DocumentJob.Kind.RECEIPT).first()
+    if failed and job is not None:
+        # unless a newer receipt replaced this one in the meantime
+        PurchaseRequest.objects.filter(
+            pk=job.purchase_request_id, receipt=job.source_url, receipt_status=PurchaseRequest.Reconciliation.PENDING
+        ).update(receipt_status=PurchaseRequest.Reconciliation.FAILED, updated_at=timezone.now())
+
+
+def _start(job_id) -> DocumentJob:
+    """Load the job and mark it running, unless it already finished."""
+    job = DocumentJob.objects.get(pk=job_id)
+    if job.status not in {DocumentJob.Status.SUCCEEDED, DocumentJob.Status.FAILED}:
+        job.status = DocumentJob.Status.RUNNING
+        job.started_at = timezone.now()
+        job.save(update_fields=["status", "started_at"])
+    return job
+
+
+def run_proforma_job(job_id) -> str:
+    """
+    Download, extract and store a proforma. Returns the job's final status.
+
+    Documents whose bytes were extracted before, under the current parser
+    version, are served from the extraction cache. The download always
+    happens: the same URL may serve different bytes over time. ``DownloadError``
+    propagates so the task can retry; extraction errors fail the job. A job
+    that already finished is left as it is, so a redelivered task does no
+    work.
+    """
+    job = _start(job_id)
+    if job.status != DocumentJob.Status.RUNNING:
+        return job.status
+
+    file_obj = fetch_document(job.source_url)
+    content = file_obj.getvalue()
+    job.content_sha256 = extraction_cache.content_digest(content)
+    extracted_data = extraction_cache.lookup(job.content_sha256)
+    if extracted_data is None:
+        result = extract_proforma_data(file_obj)
+        if result["status"] == "error":
+            _finish(job, DocumentJob.Status.FAILED, error=result["message"])
+            return job.status
+        extracted_data = result["extracted_data"]
+        extraction_cache.store(job.content_sha256, extracted_data, len(content))
+
+    _complete(job, extracted_data)
+    return job.status
+
+
+def run_receipt_job(job_id) -> str:
+    """
+    Download and extract a receipt, then reconcile its total against the PO.
+    Returns the job's final status.
+
+    Errors are handled as in ``run_proforma_job``. A receipt from which no
+    text could be read fails instead of reconciling a zero total.
+    """
+    job = _start(job_id)
+    if job.status != DocumentJob.Status.RUNNING:
+        return job.status
+
+    receipt_data = extract_receipt_data(fetch_document(job.source_url))
+    if not receipt_data["raw_text"].strip():
+        fail_job(job.pk, "No text could be extracted from the receipt.")
+        return DocumentJob.Status.FAILED
+
+    with transaction.atomic():
+        purchase_request = PurchaseRequest.objects.select_for_update().get(pk=job.purchase_request_id)
+        if purchase_request.receipt == job.source_url:
+            comparison = reconcile_receipt(purchase_request, receipt_data)
+        else:
+            # a newer receipt replaced this one; its own job reconciles it
+            comparison = None
+        _finish(job, DocumentJob.Status.SUCCEEDED, result=comparison)
+    return job.status
@@ -0,0 +1,81 @@
+"""
+Persistent cache of proforma extraction results.
+
+Entries are keyed by the SHA-256 of the document bytes and the extraction
+fingerprint (parser version and page/character budget). A parser upgrade or
+budget change produces a new fingerprint, so old entries stop matching
+without any explicit invalidation; ``prune`` removes them along with entries
+past the age, count or size limits. Size is the byte length of the document
+each result was extracted from, summed from the most recently used entry.
+"""
+
+import hashlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, Q, Sum, Window
+from django.utils import timezone
+
+from ..models import ExtractionCacheEntry
+from ..utils.ocr import extraction_fingerprint
+
+
+def content_digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def lookup(digest: str):
+    """Return cached extracted data for ``digest``, or ``None``. A hit refreshes the entry."""
+    entry = (
+        ExtractionCacheEntry.objects.filter(content_sha256=digest, parser_version=extraction_fingerprint())
+        .values_list("pk", "result")
+        .first()
+    )
+    if entry is None:
+        return None
+    pk, result = entry
+    ExtractionCacheEntry.objects.filter(pk=pk).update(hits=F("hits") + 1, last_used_at=timezone.now())
+    return result
+
+
+def store(digest: str, result, document_size: int):
+    # concurrent jobs on the same bytes produce the same result; the first write wins
+    ExtractionCacheEntry.objects.bulk_create(
+        [
+            ExtractionCacheEntry(
+                content_sha256=digest,
+                parser_version=extraction_fingerprint(),
+                result=result,
+                document_size=document_size,
+            )
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def prune(max_entries=None, max_age_days=None, max_bytes=None) -> int:
+    """
+    Delete entries from other parser versions, entries unused for
+    ``max_age_days``, all but the ``max_entries`` most recently used, and the
+    least recently used entries once their documents add up to more than
+    ``max_bytes``. Returns the number of entries deleted.
+    """
+    max_entries = max_entries if max_entries is not None else settings.EXTRACTION_CACHE_MAX_ENTRIES
+    max_age_days = max_age_days if max_age_days is not None else settings.EXTRACTION_CACHE_MAX_AGE_DAYS
+    max_bytes = max_bytes if max_bytes is not None else settings.EXTRACTION_CACHE_MAX_BYTES
+    cutoff = timezone.now() - timedelta(days=max_age_days)
+
+    deleted, _ = ExtractionCacheEntry.objects.filter(
+        Q(last_used_at__lt=cutoff) | ~Q(parser_version=extraction_fingerprint())
+    ).delete()
+    overflow = ExtractionCacheEntry.objects.order_by("-last_used_at", "-pk").values("pk")[max_entries:]
+    evicted, _ = ExtractionCacheEntry.objects.filter(pk__in=overflow).delete()
+    over_budget = (
+        ExtractionCacheEntry.objects.annotate(
+            running_size=Window(Sum("document_size"), order_by=[F("last_used_at").desc(), F("pk").desc()])
+        )
+        .filter(running_size__gt=max_bytes)
+        .values("pk")
+    )
+    shrunk, _ = ExtractionCacheEntry.objects.filter(pk__in=over_budget).delete()
+    return deleted + evicted + shrunk
@@ -0,0 +1,237 @@
+"""
+HTTP client for the optional LLM extraction step (``ai.llm_refine_extraction``).
+
+One client per process keeps a pooled keep-alive session, so calls reuse
+connections instead of opening a new HTTPS connection each time. Around each
+call:
+
+- the prompt carries only the lines likely to name the vendor, items or
+  totals (``trim_document``), capped at ``LLM_PROMPT_MAX_CHARS``;
+- answers are cached in the default cache under a hash of that text;
+- at most ``LLM_MAX_CONCURRENCY`` requests are in flight per process, and a
+  caller that cannot get a slot within ``SLOT_WAIT_SECONDS`` skips the call;
+- a circuit breaker stops calling after ``LLM_BREAKER_FAILURES`` failures in
+  a row and lets one probe through every ``LLM_BREAKER_RESET_SECONDS``.
+
+Refinement is best effort: HTTP and parsing failures return ``{}`` and the
+heuristic extraction stands. Any other error is counted against the breaker
+and re-raised for the caller to handle.
+"""
+
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import Counter
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from requests.adapters import HTTPAdapter
+
+# Bump when the prompt or response parsing changes: cached answers are keyed on it
+PROMPT_VERSION = "1"
+CACHE_PREFIX = "procurement:llm-extract"
+PROMPT = (
+    "Extract vendor name, list of items (as short descriptions), and total amount "
+    "from the following document text. Return a JSON object with keys: vendor, items, total_estimate.\n\n"
+)
+CONNECT_TIMEOUT = 3.05
+SLOT_WAIT_SECONDS = 2
+# vendor names are often printed unlabelled at the top of the document
+HEADER_LINES = 5
+RELEVANT_LINE_PATTERN = re.compile(
+    r"vendor|supplier|from:|company|bill|invoice|qty|quantity|price|amount|total|due|"
+    r"\d[\d,]*\.\d{2}|^\d+[.)]\s",
+    re.IGNORECASE,
+)
+JSON_OBJECT_PATTERN = re.compile(r"\{[\s\S]*\}")
+
+
+def trim_document(text: str, max_chars: int) -> str:
+    """The header lines plus every line that may hold a vendor, an item or an amount, up to ``max_chars``."""
+    kept = []
+    size = 0
+    lines = (line.strip() for line in text.splitlines())
+    for index, line in enumerate(line for line in lines if line):
+        if index >= HEADER_LINES and not RELEVANT_LINE_PATTERN.search(line):
+            continue
+        size += len(line) + 1
+        if size > max_chars:
+            break
+        kept.append(line)
+    return "\n".join(kept)
+
+
+class CircuitBreaker:
+    """Opens after ``threshold`` failures in a row; once open, one probe call is allowed every ``reset_after`` seconds."""
+
+    def __init__(self, threshold: int, reset_after: float, clock=time.monotonic):
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._probing or self.clock() - self._opened_at < self.reset_after:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self._opened_at is not None or self._failures >= self.threshold:
+                self._opened_at = self.clock()
+
+
+class LLMClient:
+    """Pooled, cached, rate-limited chat-completions client. Use ``get_client()``."""
+
+    def __init__(self, url, model, api_key, timeout, max_concurrency, cache_seconds, prompt_max_chars, breaker):
+        self.url = url
+        self.model = model
+        self.timeout = timeout
+        self.cache_seconds = cache_seconds
+        self.prompt_max_chars = prompt_max_chars
+        self.breaker = breaker
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"})
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._stats_lock = threading.Lock()
+        # requests, cache hits, skipped calls, token and latency totals
+        self.stats = Counter()
+
+    def _record(self, **values):
+        with self._stats_lock:
+            self.stats.update(values)
+
+    def _cache_key(self, document: str) -> str:
+        digest = hashlib.sha256(f"{PROMPT_VERSION}:{self.model}:{document}".encode("utf-8")).hexdigest()
+        return f"{CACHE_PREFIX}:{digest}"
+
+    def refine_extraction(self, raw_text: str) -> dict:
+        """``{"vendor", "items", "total_estimate"}`` read from ``raw_text``, or ``{}``."""
+        document = trim_document(raw_text or "", self.prompt_max_chars)
+        if not document:
+            return {}
+        key = self._cache_key(document)
+        cached = cache.get(key)
+        if cached is not None:
+            self._record(cache_hits=1)
+            return cached
+
+        if not self._slots.acquire(timeout=SLOT_WAIT_SECONDS):
+            self._record(throttled=1)
+            return {}
+        try:
+            if not self.breaker.allow():
+                self._record(short_circuited=1)
+                return {}
+            try:
+                result = self._complete(document)
+            except (requests.RequestException, ValueError, KeyError, IndexError, TypeError, AttributeError):
+                self.breaker.record_failure()
+                self._record(failures=1)
+                return {}
+            except Exception:
+                # anything else still ends the probe, or the breaker stays half-open for good
+                self.breaker.record_failure()
+                self._record(failures=1)
+                raise
+            self.breaker.record_success()
+        finally:
+            self._slots.release()
+        cache.set(key, result, self.cache_seconds)
+        return result
+
+    def _complete(self, document: str) -> dict:
+        prompt = PROMPT + document
+        start = time.perf_counter()
+        resp = self.session.post(
+            self.url,
+            json={
+                "model": self.model,
+                "messages": [{"role": "user", "content": prompt}],
+                "temperature": 0.0,
+                "max_tokens": 500,
+            },
+            timeout=(CONNECT_TIMEOUT, self.timeout),
+        )
+        resp.raise_for_status()
+        data = resp.json()
+        usage = data.get("usage") or {}
+        self._record(
+            requests=1,
+            prompt_chars=len(prompt),
+            prompt_tokens=usage.get("prompt_tokens", 0),
+            completion_tokens=usage.get("completion_tokens", 0),
+            latency_ms=round((time.perf_counter() - start) * 1000),
+        )
+        # the answer may wrap its JSON object in prose
+        match = JSON_OBJECT_PATTERN.search(data["choices"][0]["message"]["content"])
+        if not match:
+            return {}
+        parsed = json.loads(match.group(0))
+        return {
+            "vendor": parsed.get("vendor"),
+            "items": parsed.get("items"),
+            "total_estimate": parsed.get("total_estimate"),
+        }
+
+    def close(self):
+        self.session.close()
+
+
+_client = None
+_client_config = None
+_client_lock = threading.Lock()
+
+
+def _config():
+    return (
+        getattr(settings, "LLM_API_URL", None) or "https://api.openai.com/v1/chat/completions",
+        getattr(settings, "LLM_MODEL", None) or "gpt-4o-mini",
+        getattr(settings, "OPENAI_API_KEY", None),
+        getattr(settings, "LLM_TIMEOUT", None) or 15,
+        getattr(settings, "LLM_MAX_CONCURRENCY", None) or 4,
+        getattr(settings, "LLM_CACHE_SECONDS", None) or 7 * 24 * 60 * 60,
+        getattr(settings, "LLM_PROMPT_MAX_CHARS", None) or 4000,
+        getattr(settings, "LLM_BREAKER_FAILURES", None) or 5,
+        getattr(settings, "LLM_BREAKER_RESET_SECONDS", None) or 60,
+    )
+
+
+def get_client() -> LLMClient:
+    """The process-wide client, rebuilt when its settings change."""
+    global _client, _client_config
+    config = _config()
+    with _client_lock:
+        if _client is None or _client_config != config:
+            if _client is not None:
+                _client.close()
+            *options, failures, reset_after = config
+            _client = LLMClient(*options, breaker=CircuitBreaker(failures, reset_after))
+            _client_config = config
+        return _client
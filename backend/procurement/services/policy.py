@@ -0,0 +1,128 @@
+"""
+Approval chain policy compiled from ``ApprovalStep`` rows.
+
+The steps table is read once per process and compiled into an immutable
+``ApprovalPolicy``: amount thresholds split the amount axis into bands, and
+each band gets its precomputed chain of levels. Routing a decision is then a
+bisect and a tuple scan with no queries. The policy's version is the step
+count and newest ``updated_at``, read from the database at most once every
+``APPROVAL_POLICY_CHECK_SECONDS``, so every web worker and Celery process
+picks up an edited chain within that interval. The process that saved the
+change recompiles immediately and moves pending requests whose level left
+their chain (``workflows.remap_pending_requests``).
+"""
+
+import time
+from bisect import bisect_right
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max
+
+from ..models import ApprovalStep, User
+
+# Used when the steps table is empty: the original two-level chain
+DEFAULT_STEPS = (
+    (1, User.Role.APPROVER_LEVEL_1, None, None),
+    (2, User.Role.APPROVER_LEVEL_2, None, None),
+)
+
+
+def _applies(step, amount):
+    _, _, min_amount, max_amount = step
+    return (min_amount is None or amount >= min_amount) and (max_amount is None or amount < max_amount)
+
+
+class ApprovalPolicy:
+    """Immutable transition table over ``(level, role, min_amount, max_amount)`` steps."""
+
+    def __init__(self, steps, version=None):
+        self.version = version
+        self.steps = tuple(sorted(steps or DEFAULT_STEPS, key=lambda step: step[0]))
+        self.role_by_level = {level: role for level, role, _, _ in self.steps}
+        levels_by_role = {}
+        for level, role, _, _ in self.steps:
+            levels_by_role.setdefault(role, []).append(level)
+        self.levels_by_role = {role: tuple(levels) for role, levels in levels_by_role.items()}
+
+        # every threshold starts a new band; a step covers a band entirely or not at all
+        self.bounds = sorted({bound for _, _, low, high in self.steps for bound in (low, high) if bound is not None})
+        starts = [self.bounds[0] - 1 if self.bounds else Decimal(0), *self.bounds]
+        lowest = (self.steps[0][0],)
+        # a request always gets at least one reviewer
+        self.chains = [
+            tuple(step[0] for step in self.steps if _applies(step, start)) or lowest for start in starts
+        ]
+
+    def chain(self, amount):
+        """Levels a request of ``amount`` passes through, in order."""
+        return self.chains[bisect_right(self.bounds, Decimal(amount))]
+
+    def first_level(self, amount):
+        return self.chain(amount)[0]
+
+    def next_level(self, amount, level):
+        """The level after ``level`` for ``amount``, or ``None`` when ``level`` is final."""
+        for candidate in self.chain(amount):
+            if candidate > level:
+                return candidate
+        return None
+
+    def resume_level(self, amount, level):
+        """
+        Where a pending request at ``level`` continues after its amount changed:
+        the first level at or after ``level`` in the new chain, or the chain's
+        last level when the new chain ends before ``level``.
+        """
+        chain = self.chain(amount)
+        for candidate in chain:
+            if candidate >= level:
+                return candidate
+        return chain[-1]
+
+    def role_for(self, level):
+        return self.role_by_level.get(level)
+
+    def levels_for(self, role):
+        return self.levels_by_role.get(role, ())
+
+
+_compiled = None
+_checked_at = None
+
+
+def check_seconds() -> float:
+    return getattr(settings, "APPROVAL_POLICY_CHECK_SECONDS", 5)
+
+
+def _stored_version():
+    aggregate = ApprovalStep.objects.aggregate(count=Count("pk"), last_modified=Max("updated_at"))
+    return aggregate["count"], aggregate["last_modified"]
+
+
+def get_policy() -> ApprovalPolicy:
+    """Return this process's compiled policy, recompiling when the stored steps changed."""
+    global _compiled, _checked_at
+    policy = _compiled
+    now = time.monotonic()
+    if policy is not None and now - _checked_at < check_seconds():
+        return policy
+    version = _stored_version()
+    if policy is None or policy.version != version:
+        steps = ApprovalStep.objects.values_list("level", "role", "min_amount", "max_amount")
+        policy = _compiled = ApprovalPolicy(list(steps), version)
+    _checked_at = now
+    return policy
+
+
+def invalidate_policy():
+    global _compiled
+    _compiled = None
+
+
+def invalidate_policy_on_commit():
+    # now for this transaction, and again after commit in case it was recompiled
+    # from rows that were then rolled back
+    invalidate_policy()
+    transaction.on_commit(invalidate_policy)
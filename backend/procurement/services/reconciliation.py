@@ -0,0 +1,122 @@
+"""
+Month-end receipt reconciliation over every approved request.
+
+``run_sweep`` streams approved requests that have a receipt in id order and
+re-checks the extracted receipt total against the current PO total, the
+same comparison the receipt job makes (``ai.compare_receipt_to_po``). Only
+rows whose outcome changed are written, with one ``bulk_update`` per chunk.
+Progress is checkpointed on a ``ReconciliationSweep`` row in the same
+transaction, so an interrupted sweep resumes after the last finished chunk.
+"""
+
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import PurchaseRequest, ReconciliationSweep
+from .ai import compare_receipt_to_po
+
+DEFAULT_CHUNK_SIZE = 2000
+# rows per UPDATE statement; bulk_update builds a CASE per field and row
+BULK_UPDATE_BATCH_SIZE = 500
+SWEEP_FIELDS = ("id", "amount", "purchase_order_metadata", "receipt_status", "receipt_reconciliation")
+
+
+def approved_with_receipts():
+    return PurchaseRequest.objects.filter(status=PurchaseRequest.Status.APPROVED, receipt__isnull=False).exclude(
+        receipt=""
+    )
+
+
+def resumable_sweep():
+    """The most recent unfinished sweep, or a new one."""
+    sweep = ReconciliationSweep.objects.filter(finished_at__isnull=True).first()
+    return sweep or ReconciliationSweep.objects.create()
+
+
+def _reconcile(purchase_request: PurchaseRequest):
+    """A fresh comparison from the stored receipt total, or ``None`` when the receipt was never read."""
+    receipt_total = (purchase_request.receipt_reconciliation or {}).get("receipt_total")
+    if receipt_total is None:
+        return None
+    return compare_receipt_to_po(purchase_request, {"total": receipt_total})
+
+
+def _status(comparison) -> str:
+    return PurchaseRequest.Reconciliation.MATCHED if comparison["matches"] else PurchaseRequest.Reconciliation.MISMATCH
+
+
+def _is_current(purchase_request: PurchaseRequest, comparison) -> bool:
+    return (
+        purchase_request.receipt_reconciliation == comparison
+        and purchase_request.receipt_status == _status(comparison)
+    )
+
+
+def _sweep_chunk(sweep: ReconciliationSweep, chunk):
+    stale = []
+    for purchase_request in chunk:
+        sweep.checked += 1
+        comparison = _reconcile(purchase_request)
+        if comparison is None:
+            sweep.unread += 1
+            continue
+        if comparison["matches"]:
+            sweep.matched += 1
+        else:
+            sweep.mismatched += 1
+        if not _is_current(purchase_request, comparison):
+            stale.append(purchase_request.pk)
+
+    with transaction.atomic():
+        if stale:
+            # re-read under lock: a receipt job may have stored a newer receipt
+            # since the row was streamed
+            updates = []
+            now = timezone.now()
+            for purchase_request in PurchaseRequest.objects.select_for_update().filter(pk__in=stale).only(*SWEEP_FIELDS):
+                comparison = _reconcile(purchase_request)
+                if comparison is None or _is_current(purchase_request, comparison):
+                    continue
+                purchase_request.receipt_reconciliation = comparison
+                purchase_request.receipt_status = _status(comparison)
+                purchase_request.updated_at = now
+                updates.append(purchase_request)
+            PurchaseRequest.objects.bulk_update(
+                updates,
+                ["receipt_reconciliation", "receipt_status", "updated_at"],
+                batch_size=BULK_UPDATE_BATCH_SIZE,
+            )
+            sweep.updated += len(updates)
+        sweep.last_request_id = chunk[-1].pk
+        sweep.save()
+
+
+def run_sweep(sweep=None, chunk_size=DEFAULT_CHUNK_SIZE, on_chunk=None) -> ReconciliationSweep:
+    """
+    Reconcile every approved request with a receipt, continuing ``sweep``
+    (default: the unfinished one, if any). ``on_chunk(sweep)`` is called after
+    each checkpoint. Memory stays bounded by ``chunk_size`` rows.
+    """
+    sweep = sweep or resumable_sweep()
+    rows = (
+        approved_with_receipts()
+        .filter(pk__gt=sweep.last_request_id)
+        .order_by("pk")
+        .only(*SWEEP_FIELDS)
+        .iterator(chunk_size=chunk_size)
+    )
+    chunk = []
+    for purchase_request in rows:
+        chunk.append(purchase_request)
+        if len(chunk) == chunk_size:
+            _sweep_chunk(sweep, chunk)
+            chunk = []
+            if on_chunk:
+                on_chunk(sweep)
+    if chunk:
+        _sweep_chunk(sweep, chunk)
+        if on_chunk:
+            on_chunk(sweep)
+    sweep.finished_at = timezone.now()
+    sweep.save(update_fields=["finished_at"])
+    return sweep
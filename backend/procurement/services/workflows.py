@@ -1,15 +1,21 @@
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
 from django.core.exceptions import PermissionDenied, ValidationError
 from django.core.files.base import ContentFile
-from django.db import transaction
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
 
 from ..models import Approval, PurchaseRequest, User
-from .ai import compare_receipt_to_po, extract_receipt_data, generate_purchase_order_metadata, serialize_metadata
+from . import counters
+from .policy import get_policy
+from .ai import compare_receipt_to_po, generate_purchase_order_metadata, serialize_metadata
 
-ROLE_BY_LEVEL = {
-    1: User.Role.APPROVER_LEVEL_1,
-    2: User.Role.APPROVER_LEVEL_2,
-}
-MAX_LEVEL = max(ROLE_BY_LEVEL.keys())
+# How long a claimed request stays reserved for its approver, unless overridden
+# by settings.APPROVAL_CLAIM_LEASE_SECONDS
+DEFAULT_CLAIM_LEASE_SECONDS = 15 * 60
 
 
 def ensure_staff_owner(purchase_request: PurchaseRequest, user: User):
@@ -20,54 +26,332 @@ def ensure_staff_owner(purchase_request: PurchaseRequest, user: User):
         raise ValidationError("Only pending or rejected requests can be modified.")
 
 
-@transaction.atomic
-def apply_approval(purchase_request_id: int, approver: User, decision: str, comments: str = ""):
-    purchase_request = (
-        PurchaseRequest.objects.select_for_update()
-        .prefetch_related("approvals")
-        .get(pk=purchase_request_id)
-    )
-
+def _check_decision(policy, purchase_request: PurchaseRequest, approver: User, level_recorded: bool, now=None):
     if purchase_request.status != PurchaseRequest.Status.PENDING:
         raise ValidationError("Request already finalized.")
 
-    expected_role = ROLE_BY_LEVEL.get(purchase_request.current_level)
-    if approver.role != expected_role:
+    if approver.role != policy.role_for(purchase_request.current_level):
         raise PermissionDenied("You are not assigned to this approval level.")
 
-    if Approval.objects.filter(purchase_request=purchase_request, level=purchase_request.current_level).exists():
+    if level_recorded:
         raise ValidationError("This level decision already recorded.")
 
-    approval = Approval.objects.create(
-        purchase_request=purchase_request,
-        approver=approver,
-        level=purchase_request.current_level,
-        decision=decision,
-        comments=comments,
+    if _claimed_by_other(purchase_request, approver, now or timezone.now()):
+        raise ValidationError("This request is claimed by another approver.")
+
+
+def _claimed_by_other(purchase_request: PurchaseRequest, approver: User, now) -> bool:
+    return (
+        purchase_request.claimed_by_id is not None
+        and purchase_request.claimed_by_id != approver.pk
+        and purchase_request.claim_expires_at is not None
+        and purchase_request.claim_expires_at > now
     )
 
+
+def _claimable(approver: User, now) -> Q:
+    """Requests with no claim, an expired claim, or a claim held by ``approver``."""
+    return Q(claimed_by__isnull=True) | Q(claim_expires_at__lte=now) | Q(claimed_by=approver)
+
+
+def _advance(policy, purchase_request: PurchaseRequest, decision: str):
+    """Move ``purchase_request`` past its current level in memory; the caller saves it."""
+    # a decision ends the review lease at this level
+    purchase_request.claimed_by = None
+    purchase_request.claim_expires_at = None
     if decision == Approval.Decision.REJECTED:
         purchase_request.mark_rejected()
     else:
-        if purchase_request.current_level >= MAX_LEVEL:
-            metadata = generate_purchase_order_metadata(purchase_request, purchase_request.purchase_order_metadata)
-            purchase_request.mark_approved(metadata)
-            content = ContentFile(serialize_metadata(metadata))
-            purchase_request.purchase_order_file.save(f"po-{purchase_request.id}.json", content, save=False)
+        next_level = policy.next_level(purchase_request.amount, purchase_request.current_level)
+        if next_level is None:
+            _approve(purchase_request)
         else:
-            purchase_request.current_level += 1
+            purchase_request.current_level = next_level
+
+
+def _approve(purchase_request: PurchaseRequest):
+    metadata = generate_purchase_order_metadata(purchase_request, purchase_request.purchase_order_metadata)
+    purchase_request.mark_approved(metadata)
+    # the document is written by write_purchase_order once this transaction commits
+    purchase_request.purchase_order_status = PurchaseRequest.DocumentStatus.PENDING
+
+
+@transaction.atomic
+def apply_approval(purchase_request_id: int, approver: User, decision: str, comments: str = ""):
+    policy = get_policy()
+    purchase_request = PurchaseRequest.objects.select_for_update().get(pk=purchase_request_id)
+    # Under the row lock a pending request's current level has no decision yet:
+    # recording one always moves the request on. The (request, level) unique
+    # constraint backs that up below instead of an extra lookup here.
+    _check_decision(policy, purchase_request, approver, level_recorded=False)
+
+    before = counters.counter_state(purchase_request)
+
+    approval = Approval(
+        purchase_request=purchase_request,
+        approver=approver,
+        level=purchase_request.current_level,
+        decision=decision,
+        comments=comments,
+    )
+    try:
+        # bulk_create skips the post_save touch; the save below bumps updated_at itself
+        Approval.objects.bulk_create([approval])
+    except IntegrityError:
+        raise ValidationError("This level decision already recorded.")
+    _advance(policy, purchase_request, decision)
 
     purchase_request.save()
+    counters.record_change(before, purchase_request)
+    if purchase_request.status == PurchaseRequest.Status.APPROVED:
+        schedule_purchase_orders([purchase_request.pk])
     return purchase_request, approval
 
 
-def handle_receipt_upload(purchase_request: PurchaseRequest, receipt_file):
-    purchase_request.receipt = receipt_file
-    receipt_data = extract_receipt_data(receipt_file)
-    comparison = compare_receipt_to_po(purchase_request, receipt_data)
-    purchase_request.save()
-    return {
-        "receipt_data": receipt_data,
-        "comparison": comparison,
+@transaction.atomic
+def apply_bulk_approvals(approver: User, decisions):
+    """
+    Record many decisions by one approver in a single transaction.
+
+    ``decisions`` is a list of ``{"id", "decision", "comments"}`` dicts. Target
+    rows are locked in ascending id order so concurrent bulk calls cannot
+    deadlock, every item is validated in one pass, and the approvals and
+    request updates are written with one ``bulk_create`` and one
+    ``bulk_update``. Items that fail validation are reported and skipped;
+    the rest are applied. Returns one result dict per input item, in order.
+    """
+    policy = get_policy()
+    ids = sorted({item["id"] for item in decisions})
+    locked = {
+        pr.pk: pr
+        for pr in PurchaseRequest.objects.select_for_update().filter(pk__in=ids).order_by("pk")
     }
+    recorded = set(
+        Approval.objects.filter(purchase_request_id__in=ids).values_list("purchase_request_id", "level")
+    )
+
+    now = timezone.now()
+    results, approvals, changes, seen = [], [], [], set()
+    for item in decisions:
+        pk = item["id"]
+        purchase_request = locked.get(pk)
+        if purchase_request is None:
+            results.append({"id": pk, "ok": False, "detail": "Not found."})
+            continue
+        if pk in seen:
+            results.append({"id": pk, "ok": False, "detail": "Duplicate item in this batch."})
+            continue
+        seen.add(pk)
+        try:
+            _check_decision(
+                policy, purchase_request, approver, (pk, purchase_request.current_level) in recorded, now
+            )
+        except (PermissionDenied, ValidationError) as exc:
+            detail = exc.messages[0] if isinstance(exc, ValidationError) else str(exc)
+            results.append({"id": pk, "ok": False, "detail": detail})
+            continue
+
+        before = counters.counter_state(purchase_request)
+        approvals.append(
+            Approval(
+                purchase_request=purchase_request,
+                approver=approver,
+                level=purchase_request.current_level,
+                decision=item["decision"],
+                comments=item.get("comments", ""),
+            )
+        )
+        _advance(policy, purchase_request, item["decision"])
+        # bulk_update skips auto_now, so stamp the version used by ETags here
+        purchase_request.updated_at = now
+        changes.append((before, purchase_request))
+        results.append(
+            {
+                "id": pk,
+                "ok": True,
+                "status": purchase_request.status,
+                "current_level": purchase_request.current_level,
+            }
+        )
+
+    if approvals:
+        Approval.objects.bulk_create(approvals)
+        PurchaseRequest.objects.bulk_update(
+            [purchase_request for _, purchase_request in changes],
+            [
+                "status",
+                "current_level",
+                "approved_at",
+                "purchase_order_metadata",
+                "purchase_order_status",
+                "claimed_by",
+                "claim_expires_at",
+                "updated_at",
+            ],
+        )
+        counters.record_changes(changes)
+        schedule_purchase_orders(
+            [pr.pk for _, pr in changes if pr.status == PurchaseRequest.Status.APPROVED]
+        )
+    return results
+
+
+@transaction.atomic
+def remap_pending_requests() -> int:
+    """
+    Move pending requests whose current level dropped out of their chain
+    (its step was deleted, or its amount band changed) to the first level of
+    the current chain they have no decision for, or approve them when every
+    level is decided. Runs after approval steps change; returns the number of
+    requests moved.
+    """
+    policy = get_policy()
+    stranded = [
+        pk
+        for pk, amount, level in PurchaseRequest.objects.filter(status=PurchaseRequest.Status.PENDING)
+        .order_by("pk")
+        .values_list("pk", "amount", "current_level")
+        if level not in policy.chain(amount)
+    ]
+    if not stranded:
+        return 0
+    recorded = set(
+        Approval.objects.filter(purchase_request_id__in=stranded).values_list("purchase_request_id", "level")
+    )
+
+    now = timezone.now()
+    changes = []
+    locked = PurchaseRequest.objects.select_for_update().filter(pk__in=stranded, status=PurchaseRequest.Status.PENDING)
+    for purchase_request in locked.order_by("pk"):
+        chain = policy.chain(purchase_request.amount)
+        if purchase_request.current_level in chain:
+            continue
+        before = counters.counter_state(purchase_request)
+        # a claim was taken for the old level's role
+        purchase_request.claimed_by = None
+        purchase_request.claim_expires_at = None
+        undecided = [level for level in chain if (purchase_request.pk, level) not in recorded]
+        if undecided:
+            purchase_request.current_level = undecided[0]
+        else:
+            _approve(purchase_request)
+        purchase_request.updated_at = now
+        changes.append((before, purchase_request))
+
+    if changes:
+        PurchaseRequest.objects.bulk_update(
+            [purchase_request for _, purchase_request in changes],
+            [
+                "status",
+                "current_level",
+                "approved_at",
+                "purchase_order_metadata",
+                "purchase_order_status",
+                "claimed_by",
+                "claim_expires_at",
+                "updated_at",
+            ],
+        )
+        counters.record_changes(changes)
+        schedule_purchase_orders(
+            [pr.pk for _, pr in changes if pr.status == PurchaseRequest.Status.APPROVED]
+        )
+    return len(changes)
+
+
+def schedule_purchase_orders(ids):
+    """Queue PO document generation for ``ids`` once the current transaction commits."""
+    from ..tasks import generate_purchase_order
+
+    for pk in ids:
+        transaction.on_commit(partial(generate_purchase_order.delay, pk))
+
+
+def write_purchase_order(purchase_request_id: int) -> str:
+    """
+    Render and store the PO document for an approved request.
+
+    Runs outside any transaction so storage latency (an S3 upload) never
+    holds a row lock. Safe to repeat: a request whose document is already
+    stored is left alone. Returns the resulting ``purchase_order_status``.
+    """
+    purchase_request = PurchaseRequest.objects.only(
+        "id", "status", "purchase_order_metadata", "purchase_order_file", "purchase_order_status"
+    ).get(pk=purchase_request_id)
+    if purchase_request.status != PurchaseRequest.Status.APPROVED:
+        return purchase_request.purchase_order_status
+    if purchase_request.purchase_order_status == PurchaseRequest.DocumentStatus.READY:
+        return purchase_request.purchase_order_status
+
+    content = ContentFile(serialize_metadata(purchase_request.purchase_order_metadata))
+    purchase_request.purchase_order_file.save(f"po-{purchase_request.id}.json", content, save=False)
+    PurchaseRequest.objects.filter(pk=purchase_request.pk).update(
+        purchase_order_file=purchase_request.purchase_order_file.name,
+        purchase_order_status=PurchaseRequest.DocumentStatus.READY,
+        updated_at=timezone.now(),
+    )
+    return PurchaseRequest.DocumentStatus.READY
+
+
+def mark_purchase_order_failed(purchase_request_id: int):
+    PurchaseRequest.objects.filter(pk=purchase_request_id).exclude(
+        purchase_order_status=PurchaseRequest.DocumentStatus.READY
+    ).update(purchase_order_status=PurchaseRequest.DocumentStatus.FAILED, updated_at=timezone.now())
+
+
+@transaction.atomic
+def claim_requests(approver: User, limit: int):
+    """
+    Lease up to ``limit`` pending requests at ``approver``'s level, oldest first.
+
+    Candidate rows are read with ``SELECT ... FOR UPDATE SKIP LOCKED`` so
+    concurrent approvers walk past each other's rows instead of queueing on
+    them. The lease is then written with a conditional ``UPDATE`` that only
+    matches rows still claimable, which keeps claims exclusive on backends
+    without row locks (SQLite). Requests already leased to ``approver`` are
+    handed back with a renewed lease. Returns ``(ids, expires_at)``.
+    """
+    levels = get_policy().levels_for(approver.role)
+    if not levels:
+        raise PermissionDenied("You are not assigned to an approval level.")
+
+    now = timezone.now()
+    candidates = list(
+        PurchaseRequest.objects.select_for_update(skip_locked=True)
+        .filter(_claimable(approver, now), status=PurchaseRequest.Status.PENDING, current_level__in=levels)
+        .order_by("created_at", "pk")
+        .values_list("pk", flat=True)[:limit]
+    )
+    lease = getattr(settings, "APPROVAL_CLAIM_LEASE_SECONDS", DEFAULT_CLAIM_LEASE_SECONDS)
+    expires_at = now + timedelta(seconds=lease)
+    if not candidates:
+        return [], expires_at
+
+    PurchaseRequest.objects.filter(_claimable(approver, now), pk__in=candidates).update(
+        claimed_by=approver, claim_expires_at=expires_at
+    )
+    claimed = list(
+        PurchaseRequest.objects.filter(pk__in=candidates, claimed_by=approver, claim_expires_at=expires_at)
+        .order_by("created_at", "pk")
+        .values_list("pk", flat=True)
+    )
+    return claimed, expires_at
+
+
+def release_claims(approver: User, ids) -> int:
+    """Drop ``approver``'s leases on ``ids``; returns how many were released."""
+    return PurchaseRequest.objects.filter(pk__in=ids, claimed_by=approver).update(
+        claimed_by=None, claim_expires_at=None
+    )
+
+
+def reconcile_receipt(purchase_request: PurchaseRequest, receipt_data) -> dict:
+    """Compare extracted receipt data with the PO and record the outcome on ``purchase_request``."""
+    comparison = compare_receipt_to_po(purchase_request, receipt_data)
+    purchase_request.receipt_reconciliation = comparison
+    purchase_request.receipt_status = (
+        PurchaseRequest.Reconciliation.MATCHED if comparison["matches"] else PurchaseRequest.Reconciliation.MISMATCH
+    )
+    purchase_request.save(update_fields=["receipt_reconciliation", "receipt_status", "updated_at"])
+    return comparison
 
@@ -0,0 +1,33 @@
+"""
+Keep ``PurchaseRequest.updated_at`` current when its related rows change, and
+recompile the approval policy when its steps change, moving any pending
+request whose level left its chain.
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Approval, ApprovalStep, Attachment, FinanceComment, PurchaseRequest
+from .services.policy import invalidate_policy_on_commit
+from .services.workflows import remap_pending_requests
+
+
+@receiver(post_save, sender=Approval)
+@receiver(post_save, sender=Attachment)
+@receiver(post_save, sender=FinanceComment)
+@receiver(post_delete, sender=Approval)
+@receiver(post_delete, sender=Attachment)
+@receiver(post_delete, sender=FinanceComment)
+def touch_purchase_request(sender, instance, **kwargs):
+    # ETags are derived from updated_at, so related changes must bump it
+    PurchaseRequest.objects.filter(pk=instance.purchase_request_id).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=ApprovalStep)
+@receiver(post_delete, sender=ApprovalStep)
+def approval_steps_changed(sender, **kwargs):
+    invalidate_policy_on_commit()
+    # registered after the invalidation, so it reads the committed steps
+    transaction.on_commit(remap_pending_requests)
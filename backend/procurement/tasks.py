@@ -1,6 +1,11 @@
 from celery import shared_task
 import time
 
+from .models import DocumentJob
+from .services import extraction_cache, reconciliation
+from .services.documents import DownloadError, fail_job, run_proforma_job, run_receipt_job
+from .services.workflows import mark_purchase_order_failed, write_purchase_order
+
 
 @shared_task(bind=True)
 def example_long_running_task(self, item_id: int):
@@ -11,3 +16,59 @@ def example_long_running_task(self, item_id: int):
     # Simulate work
     time.sleep(2)
     return {'item_id': item_id, 'status': 'processed'}
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=30)
+def generate_purchase_order(self, purchase_request_id: int):
+    """Write the PO document for a request, queued after its final approval commits."""
+    try:
+        return write_purchase_order(purchase_request_id)
+    except Exception as exc:
+        if self.request.retries >= self.max_retries:
+            mark_purchase_order_failed(purchase_request_id)
+            raise
+        raise self.retry(exc=exc)
+
+
+def _run_document_job(task, run, job_id: str):
+    # download errors are retried; anything else fails the job straight away
+    try:
+        return run(job_id)
+    except DownloadError as exc:
+        if task.request.retries >= task.max_retries:
+            fail_job(job_id, str(exc))
+            return DocumentJob.Status.FAILED
+        raise task.retry(exc=exc)
+    except Exception as exc:
+        fail_job(job_id, f"Extraction error: {exc}")
+        raise
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=10)
+def process_proforma(self, job_id: str):
+    """Download and extract an uploaded proforma for its ``DocumentJob``."""
+    return _run_document_job(self, run_proforma_job, job_id)
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=10)
+def process_receipt(self, job_id: str):
+    """Download and extract a submitted receipt, then reconcile it against the PO."""
+    return _run_document_job(self, run_receipt_job, job_id)
+
+
+@shared_task
+def prune_extraction_cache():
+    """Drop stale and surplus extraction cache entries (scheduled daily)."""
+    return extraction_cache.prune()
+
+
+@shared_task
+def reconcile_receipts():
+    """Month-end receipt-vs-PO sweep; resumes an interrupted sweep."""
+    sweep = reconciliation.run_sweep()
+    return {
+        "sweep": sweep.id,
+        "checked": sweep.checked,
+        "mismatched": sweep.mismatched,
+        "updated": sweep.updated,
+    }
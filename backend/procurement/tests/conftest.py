@@ -0,0 +1,13 @@
+import pytest
+
+from core.celery import app as celery_app
+
+
+@pytest.fixture
+def celery_eager():
+    """Run Celery tasks inline. The app reads Django settings under the CELERY_ namespace."""
+    conf = celery_app.conf
+    saved = conf.get("CELERY_TASK_ALWAYS_EAGER", False), conf.get("CELERY_TASK_EAGER_PROPAGATES", False)
+    conf.CELERY_TASK_ALWAYS_EAGER = conf.CELERY_TASK_EAGER_PROPAGATES = True
+    yield
+    conf.CELERY_TASK_ALWAYS_EAGER, conf.CELERY_TASK_EAGER_PROPAGATES = saved
@@ -0,0 +1,67 @@
+"""A local chat-completions server for exercising ``services.llm`` without the network."""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.calls = []
+        self.connections = set()
+        self.status = 200
+        self.delay = 0.0
+        self.answer = {"vendor": "Acme Supplies", "items": ["Paper", "Toner"], "total_estimate": "50.00"}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/v1/chat/completions"
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # keep-alive, so pooled clients can reuse the connection
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with server._lock:
+            server.calls.append(body)
+            server.connections.add(self.client_address)
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            time.sleep(server.delay)
+            prompt = body["messages"][0]["content"]
+            payload = {
+                "choices": [{"message": {"content": f"Here you go: {json.dumps(server.answer)}"}}],
+                # roughly four characters per token
+                "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": 20},
+            }
+            data = json.dumps(payload).encode() if server.status == 200 else b'{"error": "unavailable"}'
+            self.send_response(server.status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        finally:
+            with server._lock:
+                server.in_flight -= 1
@@ -0,0 +1,60 @@
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from ..models import Approval, PurchaseRequest
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture
+def approver(db):
+    User = get_user_model()
+    staff = User.objects.create_user(username="staff", password="pass", role=User.Role.STAFF)
+    approver = User.objects.create_user(username="approver1", password="pass", role=User.Role.APPROVER_LEVEL_1)
+    now = timezone.now()
+    for i in range(5):
+        pr = PurchaseRequest.objects.create(title=f"PR {i}", description="desc", amount="10.00", created_by=staff)
+        approval = Approval.objects.create(purchase_request=pr, approver=approver, level=1, decision="APPROVED")
+        # spread decisions one day apart, newest first by index
+        Approval.objects.filter(pk=approval.pk).update(decided_at=now - timedelta(days=i))
+    return approver
+
+
+@pytest.mark.django_db
+def test_my_approvals_is_paginated(api_client, approver):
+    api_client.force_authenticate(approver)
+    url = reverse("requests-my-approvals") + "?page_size=2"
+    titles = []
+    while url:
+        data = api_client.get(url).json()
+        titles.extend(item["request"]["title"] for item in data["results"])
+        url = data["next"]
+    assert titles == [f"PR {i}" for i in range(5)]
+
+
+@pytest.mark.django_db
+def test_my_approvals_date_range(api_client, approver):
+    api_client.force_authenticate(approver)
+    today = timezone.now().date()
+    after = (today - timedelta(days=2)).isoformat()
+    before = today.isoformat()
+    resp = api_client.get(reverse("requests-my-approvals"), {"decided_after": after, "decided_before": before})
+    assert resp.status_code == 200, resp.content
+    assert [item["request"]["title"] for item in resp.json()["results"]] == ["PR 1", "PR 2"]
+
+
+@pytest.mark.django_db
+def test_my_approvals_rejects_inverted_range(api_client, approver):
+    api_client.force_authenticate(approver)
+    resp = api_client.get(
+        reverse("requests-my-approvals"), {"decided_after": "2025-02-01", "decided_before": "2025-01-01"}
+    )
+    assert resp.status_code == 400
@@ -0,0 +1,222 @@
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.urls import reverse
+from rest_framework.exceptions import ValidationError as DRFValidationError
+from rest_framework.test import APIClient
+
+from ..models import Approval, ApprovalStep, PurchaseRequest
+from ..serializers import PurchaseRequestUpdateSerializer
+from ..services import workflows
+from ..services.counters import rebuild_counters, request_stats
+from ..services.policy import ApprovalPolicy, get_policy, invalidate_policy
+from ..services.workflows import apply_approval
+
+L1, L2 = "approver_level_1", "approver_level_2"
+
+
+@pytest.fixture(autouse=True)
+def fresh_policy():
+    invalidate_policy()
+    yield
+    # the compiled policy outlives the rolled-back test rows
+    invalidate_policy()
+
+
+@pytest.fixture(autouse=True)
+def tmp_media_root(tmp_path, settings):
+    settings.MEDIA_ROOT = str(tmp_path)
+
+
+@pytest.fixture
+def tiered(db):
+    """L1 reviews up to 50k, L2 from 1k, L2 again as a third level from 10k."""
+    ApprovalStep.objects.all().delete()
+    ApprovalStep.objects.bulk_create(
+        [
+            ApprovalStep(level=1, role=L1, max_amount=Decimal("50000")),
+            ApprovalStep(level=2, role=L2, min_amount=Decimal("1000")),
+            ApprovalStep(level=3, role=L2, min_amount=Decimal("10000")),
+        ]
+    )
+    invalidate_policy()
+
+
+@pytest.fixture
+def users(db):
+    User = get_user_model()
+    return {role: User.objects.create_user(username=role, password="pass", role=role) for role in ["staff", L1, L2]}
+
+
+def test_policy_compiles_amount_bands():
+    policy = ApprovalPolicy(
+        [
+            (1, L1, None, Decimal("50000")),
+            (2, L2, Decimal("1000"), None),
+            (3, L2, Decimal("10000"), None),
+        ]
+    )
+    assert policy.chain("999.99") == (1,)
+    assert policy.chain("1000") == (1, 2)
+    assert policy.chain("10000") == (1, 2, 3)
+    assert policy.chain("50000") == (2, 3)
+    assert policy.next_level(Decimal("500"), 1) is None
+    assert policy.next_level(Decimal("20000"), 2) == 3
+    assert policy.levels_for(L2) == (2, 3)
+    assert policy.levels_for("staff") == ()
+
+
+def test_empty_policy_falls_back_to_default_chain():
+    policy = ApprovalPolicy([])
+    assert policy.chain(0) == (1, 2)
+    assert policy.role_for(2) == L2
+
+
+@pytest.mark.django_db
+def test_policy_is_cached_and_recompiled_on_change(django_assert_num_queries):
+    get_policy()
+    with django_assert_num_queries(0):
+        policy = get_policy()
+    assert policy.chain(10) == (1, 2)
+
+    ApprovalStep.objects.create(level=3, role=L2, min_amount=Decimal("5000"))
+    assert get_policy().chain(6000) == (1, 2, 3)
+
+    ApprovalStep.objects.filter(level=3).delete()  # queryset delete still sends post_delete
+    assert get_policy().chain(6000) == (1, 2)
+
+
+@pytest.mark.django_db
+def test_multi_level_chain_uses_fixed_queries_per_decision(tiered, users, django_assert_num_queries):
+    client = APIClient()
+    client.force_authenticate(users["staff"])
+    resp = client.post(
+        reverse("requests-list"), {"title": "Servers", "description": "d", "amount": "60000.00"}, format="json"
+    )
+    assert resp.status_code == 201, resp.content
+    pr = PurchaseRequest.objects.get(title="Servers")
+    assert pr.current_level == 2  # L1 does not review above 50k
+    warm = PurchaseRequest.objects.create(
+        title="Warm", description="d", amount="60000", created_by=users["staff"], current_level=3
+    )
+    rebuild_counters()  # both counter buckets exist, as in steady state
+    get_policy()
+    assert warm.current_level == 3
+
+    # savepoint, locked read, approval insert, request update, two counter updates, release
+    with django_assert_num_queries(7):
+        pr, _ = apply_approval(pr.id, users[L2], "APPROVED")
+    assert (pr.status, pr.current_level) == ("PENDING", 3)
+
+    pr, _ = apply_approval(pr.id, users[L2], "APPROVED")
+    assert pr.status == "APPROVED"
+    assert list(pr.approvals.values_list("level", flat=True)) == [2, 3]
+
+
+@pytest.mark.django_db
+def test_amount_change_moves_pending_request_along_the_new_chain(tiered, users):
+    pr = PurchaseRequest.objects.create(title="PR", description="d", amount="60000", created_by=users["staff"], current_level=2)
+    client = APIClient()
+    client.force_authenticate(users["staff"])
+    resp = client.patch(reverse("requests-detail", args=[pr.id]), {"amount": "500.00"}, format="json")
+    assert resp.status_code == 200, resp.content
+    pr.refresh_from_db()
+    # the chain for 500 ends at level 1, so the request continues there
+    assert pr.current_level == 1
+
+    client.patch(reverse("requests-detail", args=[pr.id]), {"amount": "60000.00"}, format="json")
+    pr.refresh_from_db()
+    assert pr.current_level == 2
+
+
+@pytest.mark.django_db
+def test_amount_change_works_from_the_locked_row_not_the_loaded_one(tiered, users):
+    pr = PurchaseRequest.objects.create(title="PR", description="d", amount="60000", created_by=users["staff"])
+    context = {"request": SimpleNamespace(user=users["staff"])}
+    stale = PurchaseRequest.objects.get(pk=pr.pk)
+    apply_approval(pr.id, users[L1], "APPROVED")
+    apply_approval(pr.id, users[L2], "APPROVED")
+
+    serializer = PurchaseRequestUpdateSerializer(stale, data={"amount": "70000.00"}, partial=True, context=context)
+    assert serializer.is_valid(), serializer.errors
+    serializer.save()
+    pr.refresh_from_db()
+    assert pr.current_level == 3
+    assert pr.amount == Decimal("70000.00")
+
+    apply_approval(pr.id, users[L2], "APPROVED")
+    serializer = PurchaseRequestUpdateSerializer(stale, data={"amount": "10.00"}, partial=True, context=context)
+    assert serializer.is_valid(), serializer.errors
+    with pytest.raises(DRFValidationError):
+        serializer.save()
+    pr.refresh_from_db()
+    assert pr.status == PurchaseRequest.Status.APPROVED
+    assert pr.amount == Decimal("70000.00")
+
+
+@pytest.mark.django_db
+def test_deleting_a_step_moves_requests_pending_there(tiered, users, django_capture_on_commit_callbacks, monkeypatch):
+    scheduled = []
+    monkeypatch.setattr(workflows, "schedule_purchase_orders", scheduled.extend)
+    waiting = PurchaseRequest.objects.create(
+        title="Waiting", description="d", amount="60000", created_by=users["staff"], current_level=2
+    )
+    finished = PurchaseRequest.objects.create(
+        title="Finished", description="d", amount="60000", created_by=users["staff"], current_level=3
+    )
+    for pr, levels in [(waiting, [1]), (finished, [1, 2])]:
+        for level in levels:
+            Approval.objects.create(purchase_request=pr, approver=users[L1], level=level, decision="APPROVED")
+    rebuild_counters()
+    client = APIClient()
+    client.force_authenticate(users[L2])
+
+    with django_capture_on_commit_callbacks(execute=True):
+        ApprovalStep.objects.filter(level=2).delete()
+    waiting.refresh_from_db()
+    finished.refresh_from_db()
+    # the chain for 60000 is now 1 -> 3
+    assert waiting.current_level == 3
+    assert finished.current_level == 3
+    pending = client.get(reverse("requests-pending")).json()["results"]
+    assert sorted(item["id"] for item in pending) == [waiting.id, finished.id]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        ApprovalStep.objects.filter(level=3).delete()
+    # only level 1 is left, and both requests already passed it
+    assert list(PurchaseRequest.objects.order_by("pk").values_list("status", flat=True)) == ["APPROVED", "APPROVED"]
+    assert sorted(scheduled) == [waiting.id, finished.id]
+    stats = request_stats()
+    rebuild_counters()
+    assert request_stats() == stats
+
+
+@pytest.mark.django_db
+def test_duplicate_level_decision_is_rejected_by_the_constraint(users):
+    pr = PurchaseRequest.objects.create(title="PR", description="d", amount="10", created_by=users["staff"])
+    Approval.objects.create(purchase_request=pr, approver=users[L1], level=1, decision="APPROVED")
+    with pytest.raises(ValidationError):
+        apply_approval(pr.id, users[L1], "APPROVED")
+    pr.refresh_from_db()
+    assert pr.current_level == 1
+
+
+def test_resume_level_stays_within_a_shrunk_chain():
+    policy = ApprovalPolicy([(1, L1, None, None), (2, L2, None, None)])
+    # a request left at level 3 of an older, longer chain
+    assert policy.resume_level(Decimal("500"), 3) == 2
+    assert policy.resume_level(Decimal("500"), 2) == 2
+
+
+@pytest.mark.django_db
+def test_steps_changed_by_another_process_are_picked_up(settings):
+    get_policy()
+    # bulk_create sends no signals, like a save in another worker
+    ApprovalStep.objects.bulk_create([ApprovalStep(level=3, role=L2, min_amount=Decimal("5000"))])
+    assert get_policy().chain(6000) == (1, 2)  # within the check interval
+
+    settings.APPROVAL_POLICY_CHECK_SECONDS = 0
+    assert get_policy().chain(6000) == (1, 2, 3)
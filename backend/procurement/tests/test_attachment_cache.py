@@ -0,0 +1,165 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from ..models import Attachment, PurchaseRequest
+from ..services import attachment_cache
+
+PDF = b"%PDF-1.4\n" + b"0" * 1000
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.gets.append(self.path)
+        if self.path == "/slow.pdf":
+            time.sleep(0.2)
+        body = server.bodies.get(self.path)
+        if body is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        etag = f'"{len(body)}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/pdf")
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def origin(settings, tmp_path):
+    settings.ATTACHMENT_CACHE_DIR = str(tmp_path)
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    httpd.daemon_threads = True
+    httpd.lock = threading.Lock()
+    httpd.gets = []
+    httpd.bodies = {"/a.pdf": PDF, "/b.pdf": PDF, "/c.pdf": PDF, "/slow.pdf": PDF}
+    httpd.base = f"http://127.0.0.1:{httpd.server_address[1]}"
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _read(url):
+    body, content_type = attachment_cache.open_cached(url)
+    with body:
+        return body.read(), content_type
+
+
+def test_hits_are_served_from_disk_and_revalidated_once_stale(origin, settings):
+    url = f"{origin.base}/a.pdf"
+    assert _read(url) == (PDF, "application/pdf")
+    assert _read(url) == (PDF, "application/pdf")
+    assert origin.gets == ["/a.pdf"]
+
+    # stale entries are revalidated; an unchanged object is not downloaded again
+    settings.ATTACHMENT_CACHE_FRESH_SECONDS = 0.001
+    time.sleep(0.01)
+    assert _read(url) == (PDF, "application/pdf")
+    assert len(origin.gets) == 2
+
+    # a changed object is stored under its new validator
+    origin.bodies["/a.pdf"] = PDF + b"v2"
+    time.sleep(0.01)
+    assert _read(url)[0] == PDF + b"v2"
+    assert len(list(attachment_cache.cache_dir().glob("*.body"))) == 1
+
+
+def test_concurrent_misses_share_one_upstream_fetch(origin):
+    url = f"{origin.base}/slow.pdf"
+    with ThreadPoolExecutor(max_workers=6) as executor:
+        results = list(executor.map(lambda _: _read(url)[0], range(6)))
+    assert results == [PDF] * 6
+    assert origin.gets == ["/slow.pdf"]
+
+
+def test_least_recently_used_entries_are_evicted(origin, settings):
+    settings.ATTACHMENT_CACHE_MAX_BYTES = 2 * len(PDF)
+    a, b, c = (f"{origin.base}/{name}.pdf" for name in "abc")
+    _read(a)
+    time.sleep(0.01)
+    _read(b)
+    time.sleep(0.01)
+    _read(a)  # a is now more recent than b
+    time.sleep(0.01)
+    _read(c)
+    origin.gets.clear()
+
+    _read(a)
+    _read(c)
+    assert origin.gets == []
+    _read(b)
+    assert origin.gets == ["/b.pdf"]
+
+
+def test_oversized_and_unreachable_objects_are_not_cached(origin, settings):
+    settings.ATTACHMENT_CACHE_MAX_OBJECT_BYTES = 100
+    assert attachment_cache.open_cached(f"{origin.base}/a.pdf") is None
+    assert attachment_cache.open_cached(f"{origin.base}/missing.pdf") is None
+    assert list(attachment_cache.cache_dir().glob("*.body")) == []
+
+
+@pytest.mark.django_db
+def test_download_serves_external_attachment_from_cache(origin):
+    staff = get_user_model().objects.create_user(username="staff", password="pass", role="staff")
+    pr = PurchaseRequest.objects.create(title="PR", description="d", amount="10.00", created_by=staff)
+    att = Attachment.objects.create(purchase_request=pr, external_url=f"{origin.base}/a.pdf")
+    client = APIClient()
+    client.force_authenticate(staff)
+    url = reverse("requests-download-attachment", args=[pr.id, att.id])
+
+    for _ in range(3):
+        resp = client.get(url)
+        assert resp.status_code == 200
+        assert b"".join(resp.streaming_content) == PDF
+        assert resp["Content-Type"] == "application/pdf"
+        assert resp["Content-Disposition"] == 'attachment; filename="a.pdf"'
+    assert origin.gets == ["/a.pdf"]
+
+
+def test_eviction_keeps_the_fixed_set_of_lock_files(origin, settings):
+    settings.ATTACHMENT_CACHE_MAX_BYTES = len(PDF)
+    for name in "abc":
+        _read(f"{origin.base}/{name}.pdf")
+    locks = attachment_cache.cache_dir() / "locks"
+    assert 1 <= len(list(locks.iterdir())) <= 3
+    assert all(int(path.stem) < attachment_cache.LOCK_STRIPES for path in locks.iterdir())
+    assert len(attachment_cache._locks) == attachment_cache.LOCK_STRIPES
+
+
+@pytest.mark.django_db
+def test_unwritable_cache_dir_falls_back_to_streaming(origin, settings, tmp_path):
+    blocker = tmp_path / "not-a-dir"
+    blocker.write_text("")
+    settings.ATTACHMENT_CACHE_DIR = str(blocker / "cache")
+    assert attachment_cache.open_cached(f"{origin.base}/a.pdf") is None
+
+    staff = get_user_model().objects.create_user(username="staff", password="pass", role="staff")
+    pr = PurchaseRequest.objects.create(title="PR", description="d", amount="10.00", created_by=staff)
+    att = Attachment.objects.create(purchase_request=pr, external_url=f"{origin.base}/b.pdf")
+    client = APIClient()
+    client.force_authenticate(staff)
+    resp = client.get(reverse("requests-download-attachment", args=[pr.id, att.id]))
+    assert resp.status_code == 200
+    assert b"".join(resp.streaming_content) == PDF
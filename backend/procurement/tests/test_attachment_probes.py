@@ -0,0 +1,172 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from ..models import Attachment, PurchaseRequest
+from ..services import attachments
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 64
+PDF = b"%PDF-1.4\n" + b"0" * 64
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, content_type="", body=b""):
+        self.send_response(status)
+        if content_type:
+            self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command == "GET":
+            self.wfile.write(body)
+
+    def _track(self):
+        server = self.server
+        with server.lock:
+            server.requests.append((self.command, self.path))
+            server.connections.add(self.client_address)
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+
+    def _done(self):
+        with self.server.lock:
+            self.server.in_flight -= 1
+
+    def do_HEAD(self):
+        self._track()
+        try:
+            if self.path.startswith("/slow/"):
+                time.sleep(0.1)
+                self._reply(200, "image/jpeg")
+            elif self.path == "/doc.pdf":
+                self._reply(200, "application/pdf")
+            elif self.path == "/blob":
+                self._reply(200, "application/octet-stream")
+            else:
+                self._reply(405)
+        finally:
+            self._done()
+
+    def do_GET(self):
+        self._track()
+        try:
+            if self.path == "/no-head":
+                self._reply(206, "application/octet-stream", PNG)
+            elif self.path == "/blob":
+                self._reply(206, "application/octet-stream", PDF)
+            else:
+                self._reply(404)
+        finally:
+            self._done()
+
+
+@pytest.fixture
+def server():
+    cache.clear()
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    httpd.daemon_threads = True
+    httpd.lock = threading.Lock()
+    httpd.requests, httpd.connections = [], set()
+    httpd.in_flight = httpd.max_in_flight = 0
+    httpd.base = f"http://127.0.0.1:{httpd.server_address[1]}"
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+    attachments.close_sessions()
+
+
+def test_sniffs_magic_bytes():
+    assert attachments.sniff_content_type(PDF) == "application/pdf"
+    assert attachments.sniff_content_type(b"RIFF\x00\x00\x00\x00WEBPVP8 ") == "image/webp"
+    assert attachments.sniff_content_type(b"plain text") == ""
+
+
+def test_probes_fall_back_to_sniffing_then_extension(server):
+    urls = [f"{server.base}/doc.pdf", f"{server.base}/no-head", f"{server.base}/blob", f"{server.base}/missing.jpg"]
+    assert attachments.probe_content_types(urls) == ["application/pdf", "image/png", "application/pdf", "image/jpeg"]
+
+
+def test_probes_run_concurrently_over_pooled_connections_and_are_cached(server, settings):
+    settings.ATTACHMENT_PROBE_WORKERS = 4
+    urls = [f"{server.base}/slow/{n}" for n in range(8)]
+    assert attachments.probe_content_types(urls) == ["image/jpeg"] * 8
+    assert server.max_in_flight > 1
+    assert len(server.connections) <= 4
+
+    assert attachments.probe_content_types(urls + urls[:1]) == ["image/jpeg"] * 9
+    assert len(server.requests) == 8
+
+
+@pytest.mark.django_db
+def test_upload_inserts_all_external_attachments_at_once(server):
+    staff = get_user_model().objects.create_user(username="staff", password="pass", role="staff")
+    pr = PurchaseRequest.objects.create(title="PR", description="d", amount="10.00", created_by=staff)
+    client = APIClient()
+    client.force_authenticate(staff)
+    urls = [f"{server.base}/doc.pdf", f"{server.base}/no-head", f"{server.base}/slow/1"]
+
+    with CaptureQueriesContext(connection) as queries:
+        resp = client.post(
+            reverse("requests-upload-attachments", args=[pr.id]), {"external_urls": urls}, format="json"
+        )
+    assert resp.status_code == 201, resp.content
+    assert [att["content_type"] for att in resp.json()["attachments"]] == ["application/pdf", "image/png", "image/jpeg"]
+    assert all(att["id"] for att in resp.json()["attachments"])
+    assert sum(query["sql"].startswith("INSERT") for query in queries.captured_queries) == 1
+    assert list(Attachment.objects.filter(purchase_request=pr).values_list("external_url", flat=True).order_by("id")) == urls
+
+
+@pytest.mark.django_db
+def test_upload_changes_the_request_etag(server):
+    staff = get_user_model().objects.create_user(username="staff", password="pass", role="staff")
+    pr = PurchaseRequest.objects.create(title="PR", description="d", amount="10.00", created_by=staff)
+    client = APIClient()
+    client.force_authenticate(staff)
+    detail = reverse("requests-detail", args=[pr.id])
+    etag = client.get(detail)["ETag"]
+
+    resp = client.post(
+        reverse("requests-upload-attachments", args=[pr.id]), {"external_urls": [f"{server.base}/doc.pdf"]}, format="json"
+    )
+    assert resp.status_code == 201, resp.content
+    resp = client.get(detail, headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert resp["ETag"] != etag
+    assert len(resp.json()["attachments"]) == 1
+
+
+def test_connection_pools_are_bounded_across_hosts(server, monkeypatch):
+    monkeypatch.setattr(attachments, "MAX_HOST_POOLS", 1)
+    attachments.close_sessions()
+    port = server.server_address[1]
+    urls = [f"http://127.0.0.1:{port}/doc.pdf", f"http://localhost:{port}/doc.pdf"]
+    assert attachments.probe_content_types(urls) == ["application/pdf"] * 2
+    pools = attachments._get_session().get_adapter(urls[0]).poolmanager.pools
+    assert len(pools) == 1
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("external_urls", [[1], [None], [{"url": "x"}], ["not a url"], "https://example.com/a.pdf"])
+def test_malformed_external_urls_are_rejected(external_urls):
+    staff = get_user_model().objects.create_user(username="staff", password="pass", role="staff")
+    pr = PurchaseRequest.objects.create(title="PR", description="d", amount="10.00", created_by=staff)
+    client = APIClient()
+    client.force_authenticate(staff)
+    resp = client.post(
+        reverse("requests-upload-attachments", args=[pr.id]), {"external_urls": external_urls}, format="json"
+    )
+    assert resp.status_code == 400
+    assert not Attachment.objects.filter(purchase_request=pr).exists()
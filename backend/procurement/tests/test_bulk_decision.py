@@ -0,0 +1,93 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from ..models import Approval, PurchaseRequest, RequestCounter
+from ..services.counters import rebuild_counters
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture
+def users(db):
+    User = get_user_model()
+    return {
+        role: User.objects.create_user(username=role, password="pass", role=role)
+        for role in ["staff", "approver_level_1", "approver_level_2"]
+    }
+
+
+def _counters():
+    return sorted(RequestCounter.objects.filter(count__gt=0).values_list("status", "current_level", "count"))
+
+
+@pytest.mark.django_db
+def test_bulk_decision_applies_valid_items_and_reports_failures(api_client, users, django_assert_max_num_queries):
+    staff = users["staff"]
+    queue = [
+        PurchaseRequest.objects.create(title=f"PR {i}", description="d", amount="10.00", created_by=staff)
+        for i in range(50)
+    ]
+    level_two = PurchaseRequest.objects.create(
+        title="L2", description="d", amount="10.00", created_by=staff, current_level=2
+    )
+    rebuild_counters()
+
+    decisions = [{"id": pr.id, "decision": "APPROVED"} for pr in queue[:-1]]
+    decisions += [
+        {"id": queue[-1].id, "decision": "REJECTED", "comments": "no budget"},
+        {"id": level_two.id, "decision": "APPROVED"},
+        {"id": queue[0].id, "decision": "REJECTED"},
+        {"id": 999999, "decision": "APPROVED"},
+    ]
+
+    api_client.force_authenticate(users["approver_level_1"])
+    with django_assert_max_num_queries(12):
+        resp = api_client.post(reverse("requests-bulk-decision"), {"decisions": decisions}, format="json")
+    assert resp.status_code == 200, resp.content
+    body = resp.json()
+    assert body["applied"] == 50
+    assert body["failed"] == 3
+    failures = {r["id"]: r["detail"] for r in body["results"] if not r["ok"]}
+    assert failures == {
+        level_two.id: "You are not assigned to this approval level.",
+        queue[0].id: "Duplicate item in this batch.",
+        999999: "Not found.",
+    }
+
+    assert PurchaseRequest.objects.filter(status="PENDING", current_level=2).count() == 50
+    assert PurchaseRequest.objects.get(pk=queue[-1].id).status == PurchaseRequest.Status.REJECTED
+    assert Approval.objects.filter(approver=users["approver_level_1"]).count() == 50
+
+    incremental = _counters()
+    rebuild_counters()
+    assert _counters() == incremental
+
+
+@pytest.mark.django_db
+def test_bulk_final_approval_generates_po(
+    api_client, users, tmp_path, settings, celery_eager, django_capture_on_commit_callbacks
+):
+    settings.MEDIA_ROOT = str(tmp_path)
+    pr = PurchaseRequest.objects.create(title="PR", description="d", amount="10.00", created_by=users["staff"], current_level=2)
+    api_client.force_authenticate(users["approver_level_2"])
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        resp = api_client.post(reverse("requests-bulk-decision"), {"decisions": [{"id": pr.id, "decision": "APPROVED"}]}, format="json")
+    assert resp.json()["results"] == [{"id": pr.id, "ok": True, "status": "APPROVED", "current_level": 2}]
+    assert len(callbacks) == 1
+    pr.refresh_from_db()
+    assert pr.approved_at is not None
+    assert pr.purchase_order_status == "READY"
+    assert pr.purchase_order_file.name.endswith(f"po-{pr.id}.json")
+    assert pr.purchase_order_metadata["purchase_request_id"] == pr.id
+
+
+@pytest.mark.django_db
+def test_bulk_decision_requires_approver(api_client, users):
+    api_client.force_authenticate(users["staff"])
+    resp = api_client.post(reverse("requests-bulk-decision"), {"decisions": [{"id": 1, "decision": "APPROVED"}]}, format="json")
+    assert resp.status_code == 403
@@ -0,0 +1,146 @@
+import threading
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import connection, connections
+from django.db.models import Q
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from ..models import PurchaseRequest
+from ..services import workflows
+from ..services.workflows import apply_approval, apply_bulk_approvals, claim_requests, release_claims
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture
+def users(db):
+    User = get_user_model()
+    staff = User.objects.create_user(username="staff", password="pass", role="staff")
+    approvers = [
+        User.objects.create_user(username=f"a{i}", password="pass", role="approver_level_1") for i in range(4)
+    ]
+    return staff, approvers
+
+
+def _queue(staff, n):
+    return [
+        PurchaseRequest.objects.create(title=f"PR {i}", description="d", amount="10.00", created_by=staff)
+        for i in range(n)
+    ]
+
+
+@pytest.mark.django_db
+def test_claims_are_disjoint_and_oldest_first(api_client, users):
+    staff, (first, second, *_) = users
+    queue = _queue(staff, 5)
+    PurchaseRequest.objects.create(title="L2", description="d", amount="1.00", created_by=staff, current_level=2)
+
+    api_client.force_authenticate(first)
+    resp = api_client.post(reverse("requests-claim"), {"limit": 3}, format="json")
+    assert resp.status_code == 200, resp.content
+    assert [row["id"] for row in resp.json()["results"]] == [pr.id for pr in queue[:3]]
+    assert resp.json()["lease_expires_at"]
+
+    api_client.force_authenticate(second)
+    resp = api_client.post(reverse("requests-claim"), {"limit": 3}, format="json")
+    assert [row["id"] for row in resp.json()["results"]] == [pr.id for pr in queue[3:]]
+
+    # claiming again hands back the caller's own leases
+    ids, _ = claim_requests(first, 10)
+    assert ids == [pr.id for pr in queue[:3]]
+
+
+@pytest.mark.django_db
+def test_claim_does_not_take_rows_leased_between_read_and_update(users, monkeypatch):
+    """A stale candidate read (no row locks on SQLite) must not steal another approver's lease."""
+    staff, (first, second, *_) = users
+    queue = _queue(staff, 4)
+    real_claimable = workflows._claimable
+    calls = []
+
+    def racing_claimable(approver, now):
+        calls.append(approver)
+        if len(calls) == 1:
+            # another approver wins the first two rows after our candidate read
+            claim_requests(second, 2)
+            return Q()
+        return real_claimable(approver, now)
+
+    monkeypatch.setattr(workflows, "_claimable", racing_claimable)
+    ids, _ = claim_requests(first, 4)
+    monkeypatch.setattr(workflows, "_claimable", real_claimable)
+
+    assert ids == [pr.id for pr in queue[2:]]
+    assert set(PurchaseRequest.objects.filter(claimed_by=second).values_list("pk", flat=True)) == {
+        pr.id for pr in queue[:2]
+    }
+
+
+@pytest.mark.django_db
+def test_expired_lease_is_reclaimable_and_decisions_respect_leases(users, settings):
+    staff, (first, second, third, _) = users
+    pr, other = _queue(staff, 2)
+
+    settings.APPROVAL_CLAIM_LEASE_SECONDS = 60
+    claim_requests(first, 1)
+    with pytest.raises(ValidationError):
+        apply_approval(pr.id, second, "APPROVED")
+    results = apply_bulk_approvals(second, [{"id": pr.id, "decision": "APPROVED"}])
+    assert results[0] == {"id": pr.id, "ok": False, "detail": "This request is claimed by another approver."}
+
+    PurchaseRequest.objects.filter(pk=pr.id).update(claim_expires_at=timezone.now() - timedelta(seconds=1))
+    ids, _ = claim_requests(second, 1)
+    assert ids == [pr.id]
+
+    pr, _ = apply_approval(pr.id, second, "APPROVED")
+    assert pr.current_level == 2
+    assert pr.claimed_by_id is None and pr.claim_expires_at is None
+
+    claim_requests(third, 1)
+    assert release_claims(first, [other.id]) == 0
+    assert release_claims(third, [other.id]) == 1
+    assert PurchaseRequest.objects.get(pk=other.id).claimed_by_id is None
+
+
+@pytest.mark.django_db
+def test_claim_requires_an_approver(api_client, users):
+    staff, _ = users
+    api_client.force_authenticate(staff)
+    resp = api_client.post(reverse("requests-claim"), {}, format="json")
+    assert resp.status_code == 403
+
+
+@pytest.mark.skipif(
+    not connection.features.has_select_for_update_skip_locked,
+    reason="SKIP LOCKED needs a backend with row locks (PostgreSQL)",
+)
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_claims_never_overlap(users):
+    staff, approvers = users
+    _queue(staff, 40)
+    barrier = threading.Barrier(len(approvers))
+    claimed = {}
+
+    def worker(approver):
+        try:
+            barrier.wait()
+            claimed[approver.pk], _ = claim_requests(approver, 8)
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=worker, args=(approver,)) for approver in approvers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    all_ids = [pk for ids in claimed.values() for pk in ids]
+    assert len(all_ids) == len(set(all_ids)) == 32
@@ -0,0 +1,89 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from ..models import FinanceComment, PurchaseRequest
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture
+def users(db):
+    User = get_user_model()
+    return (
+        User.objects.create_user(username="staff", password="pass", role=User.Role.STAFF),
+        User.objects.create_user(username="approver1", password="pass", role=User.Role.APPROVER_LEVEL_1),
+    )
+
+
+@pytest.mark.django_db
+def test_detail_returns_304_until_related_rows_change(api_client, users):
+    staff, approver = users
+    pr = PurchaseRequest.objects.create(title="PR", description="d", amount="1.00", created_by=staff)
+    url = reverse("requests-detail", args=[pr.id])
+    api_client.force_authenticate(approver)
+
+    first = api_client.get(url)
+    assert first.status_code == 200
+    etag = first["ETag"]
+    assert first.has_header("Last-Modified")
+
+    with CaptureQueriesContext(connection) as ctx:
+        cached = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert cached.status_code == 304
+    assert cached["ETag"] == etag
+    assert len(ctx.captured_queries) == 1
+
+    FinanceComment.objects.create(purchase_request=pr, user=staff, comment="new")
+    fresh = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert fresh.status_code == 200
+    assert fresh["ETag"] != etag
+
+
+@pytest.mark.django_db
+def test_list_returns_304_until_a_request_changes(api_client, users):
+    staff, approver = users
+    PurchaseRequest.objects.create(title="PR", description="d", amount="1.00", created_by=staff)
+    url = reverse("requests-pending")
+    api_client.force_authenticate(approver)
+
+    etag = api_client.get(url)["ETag"]
+    assert api_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+    # a different representation of the same rows has its own validator
+    assert api_client.get(url + "?view=summary", HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+    PurchaseRequest.objects.create(title="PR 2", description="d", amount="2.00", created_by=staff)
+    assert api_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+
+@pytest.mark.django_db
+def test_list_etag_comes_from_the_page_without_aggregating(api_client, users):
+    staff, approver = users
+    for n in range(3):
+        PurchaseRequest.objects.create(title=f"PR {n}", description="d", amount="1.00", created_by=staff)
+    url = reverse("requests-pending") + "?page_size=2"
+    api_client.force_authenticate(approver)
+
+    with CaptureQueriesContext(connection) as ctx:
+        first = api_client.get(url)
+    request_queries = [query["sql"].upper() for query in ctx.captured_queries if "PURCHASEREQUEST" in query["sql"].upper()]
+    assert len(request_queries) == 1
+    assert "MAX(" not in request_queries[0]
+    etag = first["ETag"]
+    assert not first.has_header("Last-Modified")
+    assert api_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+    # a change to a row on the page changes its ETag; the next page keeps its own
+    newest = PurchaseRequest.objects.order_by("-created_at").first()
+    PurchaseRequest.objects.filter(pk=newest.pk).update(title="edited", updated_at=timezone.now())
+    assert api_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+    next_url = api_client.get(url).json()["next"]
+    next_etag = api_client.get(next_url)["ETag"]
+    assert api_client.get(next_url, HTTP_IF_NONE_MATCH=next_etag).status_code == 304
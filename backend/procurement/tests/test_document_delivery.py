@@ -0,0 +1,122 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+import requests
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from ..models import PurchaseRequest
+from ..services import delivery
+
+OBJECTS = {"/procurement/purchase_orders/po-1.json": b'{"po": 1}'}
+PDF = b"%PDF-1.4\n" + b"0" * 100
+
+
+class _S3Handler(BaseHTTPRequestHandler):
+    """Path-style S3 stand-in: serves ``OBJECTS`` to signed GETs and proxied documents to plain ones."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, body=b"", content_type="application/octet-stream"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        self.server.gets.append(parts.path)
+        if parts.path == "/origin/quote.pdf":
+            return self._reply(200, PDF, "application/pdf")
+        query = parse_qs(parts.query)
+        if "X-Amz-Signature" not in query or query.get("X-Amz-Credential", [""])[0].split("/")[0] != "test-key":
+            return self._reply(403)
+        body = OBJECTS.get(parts.path)
+        self._reply(200, body) if body is not None else self._reply(404)
+
+
+@pytest.fixture
+def s3(settings, tmp_path, monkeypatch):
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _S3Handler)
+    httpd.daemon_threads = True
+    httpd.gets = []
+    httpd.base = f"http://127.0.0.1:{httpd.server_address[1]}"
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+
+    settings.AWS_STORAGE_BUCKET_NAME = "procurement"
+    settings.AWS_ACCESS_KEY_ID = "test-key"
+    settings.AWS_SECRET_ACCESS_KEY = "test-secret"
+    settings.AWS_S3_ENDPOINT_URL = httpd.base
+    settings.ATTACHMENT_CACHE_DIR = str(tmp_path)
+    cache.clear()
+    created = []
+    original = delivery.boto3.client
+    monkeypatch.setattr(delivery.boto3, "client", lambda *args, **kwargs: created.append(1) or original(*args, **kwargs))
+    monkeypatch.setattr(delivery, "_s3", None)
+    httpd.clients_created = created
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def finance_client(db):
+    User = get_user_model()
+    staff = User.objects.create_user(username="staff", password="pass", role="staff")
+    finance = User.objects.create_user(username="finance", password="pass", role="finance")
+    pr = PurchaseRequest.objects.create(
+        title="PR", description="d", amount="10.00", created_by=staff, status=PurchaseRequest.Status.APPROVED
+    )
+    client = APIClient()
+    client.force_authenticate(finance)
+    return client, pr
+
+
+def test_stored_files_redirect_to_a_cached_presigned_url(s3, finance_client):
+    client, pr = finance_client
+    PurchaseRequest.objects.filter(pk=pr.pk).update(purchase_order_file="purchase_orders/po-1.json")
+    url = reverse("requests-download-po", args=[pr.id])
+
+    first = client.get(url)
+    second = client.get(url)
+    assert first.status_code == second.status_code == 302
+    assert first["Location"] == second["Location"]
+    assert first["Location"].startswith(f"{s3.base}/procurement/purchase_orders/po-1.json?")
+    assert len(s3.clients_created) == 1
+
+    assert requests.get(first["Location"], timeout=5).content == b'{"po": 1}'
+
+    # a new URL is signed once the cached one is due for renewal, with the same client
+    cache.clear()
+    assert client.get(url)["Location"].startswith(f"{s3.base}/procurement/")
+    assert len(s3.clients_created) == 1
+
+
+def test_client_is_rebuilt_when_credentials_change(s3, settings):
+    delivery.s3_client()
+    assert delivery.s3_client() is delivery.s3_client()
+    settings.AWS_SECRET_ACCESS_KEY = "rotated"
+    delivery.s3_client()
+    assert len(s3.clients_created) == 2
+
+
+def test_url_documents_are_proxied_not_presigned(s3, finance_client):
+    client, pr = finance_client
+    PurchaseRequest.objects.filter(pk=pr.pk).update(
+        proforma=f"{s3.base}/origin/quote.pdf", receipt=f"{s3.base}/origin/quote.pdf"
+    )
+    for action in ["requests-download-proforma", "requests-download-receipt"]:
+        resp = client.get(reverse(action, args=[pr.id]))
+        assert resp.status_code == 200
+        assert b"".join(resp.streaming_content) == PDF
+        assert resp["Content-Disposition"] == 'attachment; filename="quote.pdf"'
+    assert s3.gets == ["/origin/quote.pdf"]
+    assert s3.clients_created == []
@@ -0,0 +1,118 @@
+import csv
+import io
+import json
+from datetime import datetime, timezone
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from ..models import PurchaseRequest
+from ..services import export
+
+
+@pytest.fixture
+def requests_by_month(db):
+    User = get_user_model()
+    staff = User.objects.create_user(username="staff", password="pass", role="staff")
+    statuses = ["APPROVED", "REJECTED", "PENDING", "APPROVED"]
+    created = []
+    for month, status in enumerate(statuses, start=1):
+        pr = PurchaseRequest.objects.create(
+            title=f'PR "{month}", urgent', description="d", amount=f"{month}00.50", created_by=staff, status=status
+        )
+        PurchaseRequest.objects.filter(pk=pr.pk).update(created_at=datetime(2026, month, 15, tzinfo=timezone.utc))
+        created.append(pr)
+    return created
+
+
+@pytest.fixture
+def finance_client(db):
+    finance = get_user_model().objects.create_user(username="finance", password="pass", role="finance")
+    client = APIClient()
+    client.force_authenticate(finance)
+    return client
+
+
+def test_csv_export_streams_filtered_rows(requests_by_month, finance_client):
+    resp = finance_client.get(
+        reverse("requests-export"), {"status": "APPROVED", "created_after": "2026-01-01", "created_before": "2026-04-01"}
+    )
+    assert resp.status_code == 200
+    assert resp.streaming
+    assert resp["Content-Type"] == "text/csv; charset=utf-8"
+    assert resp["Content-Disposition"].endswith('.csv"')
+    rows = list(csv.DictReader(io.StringIO(b"".join(resp.streaming_content).decode("utf-8"))))
+    assert [row["id"] for row in rows] == [str(requests_by_month[0].id)]
+    assert rows[0]["title"] == 'PR "1", urgent'
+    assert rows[0]["amount"] == "100.50"
+    assert rows[0]["created_by"] == "staff"
+
+
+def test_ndjson_export_with_several_statuses(requests_by_month, finance_client):
+    resp = finance_client.get(
+        reverse("requests-export") + "?file_format=ndjson&status=APPROVED&status=REJECTED"
+    )
+    assert resp["Content-Type"] == "application/x-ndjson"
+    lines = b"".join(resp.streaming_content).decode("utf-8").splitlines()
+    records = [json.loads(line) for line in lines]
+    assert [record["status"] for record in records] == ["APPROVED", "REJECTED", "APPROVED"]
+    assert records[0]["created_at"].startswith("2026-01-15T00:00:00")
+    assert list(records[0]) == [name for name, _ in export.EXPORT_COLUMNS]
+
+
+def test_export_is_finance_only_and_validates_filters(requests_by_month, finance_client):
+    staff_client = APIClient()
+    staff_client.force_authenticate(requests_by_month[0].created_by)
+    assert staff_client.get(reverse("requests-export")).status_code == 403
+    assert finance_client.get(reverse("requests-export"), {"status": "DRAFT"}).status_code == 400
+    assert finance_client.get(
+        reverse("requests-export"), {"created_after": "2026-03-01", "created_before": "2026-02-01"}
+    ).status_code == 400
+
+
+def test_rows_are_read_in_one_query_without_model_instances(requests_by_month, monkeypatch):
+    monkeypatch.setattr(export, "BLOCK_SIZE", 1)
+    with CaptureQueriesContext(connection) as queries:
+        rows = export.export_rows(chunk_size=2)
+        blocks = list(export.render(rows, "csv"))
+    assert len(queries.captured_queries) == 1
+    assert len(blocks) == 1 + len(requests_by_month)
+    assert all(isinstance(block, str) for block in blocks)
+
+
+def test_command_writes_export_file(requests_by_month, tmp_path):
+    target = tmp_path / "export.ndjson"
+    call_command("export_requests", "--format", "ndjson", "--status", "PENDING", "--output", str(target))
+    records = [json.loads(line) for line in target.read_text().splitlines()]
+    assert [record["id"] for record in records] == [requests_by_month[2].id]
+
+    out = io.StringIO()
+    call_command("export_requests", "--created-after", "2026-03-01", stdout=out)
+    assert len(out.getvalue().splitlines()) == 3  # header and two rows
+
+
+def test_csv_cells_are_not_read_as_formulas(requests_by_month, finance_client):
+    PurchaseRequest.objects.filter(pk=requests_by_month[0].pk).update(
+        title='=HYPERLINK("http://example.com","x")', supplier="@SUM(A1)"
+    )
+    PurchaseRequest.objects.filter(pk=requests_by_month[1].pk).update(title="-2+3", supplier="+Acme")
+    PurchaseRequest.objects.filter(pk=requests_by_month[2].pk).update(title="\t=1+1", supplier="\r=cmd|' /C calc'!A0")
+
+    resp = finance_client.get(reverse("requests-export"), {"created_before": "2026-04-01"})
+    rows = list(csv.DictReader(io.StringIO(b"".join(resp.streaming_content).decode("utf-8"))))
+    assert [(row["title"], row["supplier"]) for row in rows] == [
+        ('\'=HYPERLINK("http://example.com","x")', "'@SUM(A1)"),
+        ("'-2+3", "'+Acme"),
+        ("'\t=1+1", "'\r=cmd|' /C calc'!A0"),
+    ]
+    assert rows[0]["amount"] == "100.50"
+
+    resp = finance_client.get(reverse("requests-export"), {"file_format": "ndjson", "created_before": "2026-03-01"})
+    records = [json.loads(line) for line in b"".join(resp.streaming_content).decode("utf-8").splitlines()]
+    assert records[0]["title"] == '=HYPERLINK("http://example.com","x")'
+    assert records[1]["supplier"] == "+Acme"
@@ -0,0 +1,117 @@
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from ..models import DocumentJob, ExtractionCacheEntry, PurchaseRequest
+from ..services import documents, extraction_cache
+from ..utils import ocr
+
+URL = "https://files.example.com/uploads/proforma.pdf?v=1"
+EXTRACTED = {"vendor": "Acme", "items": [], "payment_terms": "", "grand_total": "120.00"}
+
+
+class FakeResponse:
+    content = b"%PDF-1.4 fake"
+
+    def raise_for_status(self):
+        pass
+
+
+@pytest.fixture
+def staff(db):
+    return get_user_model().objects.create_user(username="staff", password="pass", role="staff")
+
+
+@pytest.fixture
+def purchase_request(staff):
+    return PurchaseRequest.objects.create(title="PR", description="d", amount="120.00", created_by=staff)
+
+
+@pytest.fixture
+def extractions(monkeypatch):
+    calls = []
+
+    def extract(file_obj):
+        calls.append(file_obj.name)
+        return {"status": "success", "extracted_data": dict(EXTRACTED)}
+
+    monkeypatch.setattr(documents.requests, "get", lambda url, timeout: FakeResponse())
+    monkeypatch.setattr(documents, "extract_proforma_data", extract)
+    return calls
+
+
+def _job(purchase_request, url=URL):
+    return DocumentJob.objects.create(
+        purchase_request=purchase_request,
+        kind=DocumentJob.Kind.PROFORMA,
+        source_url=url,
+        created_by=purchase_request.created_by,
+    )
+
+
+@pytest.mark.django_db
+def test_same_bytes_are_extracted_once(purchase_request, extractions):
+    first = _job(purchase_request)
+    second = _job(purchase_request, url="https://mirror.example.com/copy.pdf")
+    assert documents.run_proforma_job(first.pk) == "SUCCEEDED"
+    assert documents.run_proforma_job(second.pk) == "SUCCEEDED"
+
+    assert extractions == ["proforma.pdf"]
+    second.refresh_from_db()
+    assert second.result == EXTRACTED
+    assert second.content_sha256 == extraction_cache.content_digest(FakeResponse.content)
+    entry = ExtractionCacheEntry.objects.get()
+    assert entry.hits == 1
+    assert entry.document_size == len(FakeResponse.content)
+
+
+@pytest.mark.django_db
+def test_changed_content_at_the_same_url_is_extracted_again(purchase_request, extractions, monkeypatch):
+    documents.run_proforma_job(_job(purchase_request).pk)
+
+    class ChangedResponse(FakeResponse):
+        content = b"%PDF-1.4 revised"
+
+    monkeypatch.setattr(documents.requests, "get", lambda url, timeout: ChangedResponse())
+    job = _job(purchase_request)
+    assert documents.run_proforma_job(job.pk) == "SUCCEEDED"
+    assert len(extractions) == 2
+    job.refresh_from_db()
+    assert job.content_sha256 == extraction_cache.content_digest(ChangedResponse.content)
+
+
+@pytest.mark.django_db
+def test_parser_upgrade_misses_old_entries(purchase_request, extractions, monkeypatch):
+    documents.run_proforma_job(_job(purchase_request).pk)
+    monkeypatch.setattr(ocr, "PARSER_VERSION", "next")
+    documents.run_proforma_job(_job(purchase_request).pk)
+    assert len(extractions) == 2
+    assert ExtractionCacheEntry.objects.count() == 2
+
+    assert extraction_cache.prune() == 1
+    assert ExtractionCacheEntry.objects.get().parser_version.startswith("next:")
+
+
+@pytest.mark.django_db
+def test_prune_drops_stale_and_least_recently_used_entries():
+    now = timezone.now()
+    for n, age in enumerate([0, 1, 2, 40]):
+        extraction_cache.store(f"{n:064x}", {}, 10)
+        ExtractionCacheEntry.objects.filter(content_sha256=f"{n:064x}").update(last_used_at=now - timedelta(days=age))
+
+    assert extraction_cache.prune(max_entries=2, max_age_days=30) == 2
+    assert sorted(ExtractionCacheEntry.objects.values_list("content_sha256", flat=True)) == [f"{0:064x}", f"{1:064x}"]
+
+
+@pytest.mark.django_db
+def test_prune_keeps_the_most_recently_used_entries_within_the_byte_budget():
+    now = timezone.now()
+    for n, size in enumerate([100, 5000, 300, 200]):
+        extraction_cache.store(f"{n:064x}", {}, size)
+        ExtractionCacheEntry.objects.filter(content_sha256=f"{n:064x}").update(last_used_at=now - timedelta(hours=n))
+
+    # 100 + 5000 is already over budget, so the large entry and everything older go
+    assert extraction_cache.prune(max_entries=10, max_age_days=30, max_bytes=1000) == 3
+    assert list(ExtractionCacheEntry.objects.values_list("content_sha256", flat=True)) == [f"{0:064x}"]
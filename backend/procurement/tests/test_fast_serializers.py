@@ -0,0 +1,79 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from ..fast_serializers import compile_serializer
+from ..models import Approval, Attachment, FinanceComment, PurchaseRequest
+from ..serializers import ApprovalHistorySerializer, PurchaseRequestSerializer
+
+
+@pytest.fixture(autouse=True)
+def tmp_media_root(tmp_path, settings):
+    settings.MEDIA_ROOT = str(tmp_path)
+
+
+@pytest.fixture
+def rows(db):
+    User = get_user_model()
+    staff = User.objects.create_user(username="staff", password="pass", email="s@example.com")
+    approver = User.objects.create_user(username="approver1", password="pass", role=User.Role.APPROVER_LEVEL_1)
+    plain = PurchaseRequest.objects.create(title="Plain", description="d", amount="0.5", created_by=staff)
+    full = PurchaseRequest.objects.create(
+        title="Full",
+        description="d",
+        amount="1234567.89",
+        created_by=staff,
+        status=PurchaseRequest.Status.APPROVED,
+        approved_at=timezone.now(),
+        proforma="https://example.com/p.pdf",
+        receipt="https://example.com/r.pdf",
+        supplier="ACME",
+        purchase_order_metadata={"total_estimate": "10.00", "items": ["a"]},
+    )
+    full.purchase_order_file.save("po.json", ContentFile(b"{}"))
+    Approval.objects.create(purchase_request=full, approver=approver, level=1, decision="APPROVED", comments="ok")
+    Attachment.objects.create(purchase_request=full, file=ContentFile(b"x", name="a.pdf"), content_type="application/pdf")
+    Attachment.objects.create(purchase_request=full, external_url="https://example.com/b.png")
+    FinanceComment.objects.create(purchase_request=full, user=approver, comment="checked")
+    return [plain, full], approver
+
+
+def _render(data):
+    return JSONRenderer().render(data)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("with_request", [False, True])
+def test_compiled_output_is_byte_identical(rows, with_request):
+    queryset = PurchaseRequestSerializer.setup_eager_loading(PurchaseRequest.objects.all())
+    objs = list(queryset)
+    request = Request(APIRequestFactory().get("/api/requests/")) if with_request else None
+    context = {"request": request} if request else {}
+
+    expected = _render(PurchaseRequestSerializer(objs, many=True, context=context).data)
+    actual = _render(compile_serializer(PurchaseRequestSerializer).serialize_many(objs, request))
+    assert actual == expected
+
+
+@pytest.mark.django_db
+def test_compiled_sparse_selection_and_values_rows(rows):
+    fields = frozenset({"id", "title", "amount", "status", "current_level", "created_at"})
+    plan = compile_serializer(PurchaseRequestSerializer, fields)
+    objs = list(PurchaseRequest.objects.all())
+    request = Request(APIRequestFactory().get("/api/requests/", {"view": "summary"}))
+
+    expected = _render(PurchaseRequestSerializer(objs, many=True, context={"request": request}).data)
+    assert _render(plan.serialize_many(objs)) == expected
+    assert _render(plan.serialize_many(PurchaseRequest.objects.values(*fields))) == expected
+
+
+@pytest.mark.django_db
+def test_compiled_nested_history(rows):
+    _, approver = rows
+    approvals = list(Approval.objects.filter(approver=approver).select_related("purchase_request__created_by"))
+    expected = _render(ApprovalHistorySerializer(approvals, many=True).data)
+    assert _render(compile_serializer(ApprovalHistorySerializer).serialize_many(approvals)) == expected
@@ -0,0 +1,75 @@
+import re
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from ..models import Attachment, PurchaseRequest
+from ..services.delivery import parse_range
+
+BODY = bytes(range(256)) * 40
+
+
+@pytest.fixture
+def download(db, tmp_path, settings):
+    settings.MEDIA_ROOT = str(tmp_path)
+    staff = get_user_model().objects.create_user(username="staff", password="pass", role="staff")
+    pr = PurchaseRequest.objects.create(title="PR", description="d", amount="10.00", created_by=staff)
+    att = Attachment(purchase_request=pr)
+    att.file.save("quote.pdf", ContentFile(BODY))
+    client = APIClient()
+    client.force_authenticate(staff)
+    url = reverse("requests-download-attachment", args=[pr.id, att.id])
+    return lambda **headers: client.get(url, headers=headers)
+
+
+def test_parse_range():
+    assert parse_range("bytes=0-99", 1000) == (0, 99)
+    assert parse_range("bytes=900-", 1000) == (900, 999)
+    assert parse_range("bytes=-100", 1000) == (900, 999)
+    assert parse_range("bytes=950-2000", 1000) == (950, 999)
+    assert parse_range("bytes=1000-", 1000) == ()
+    assert parse_range("bytes=0-1,5-9", 1000) is None
+    assert parse_range("items=0-1", 1000) is None
+    assert parse_range(None, 1000) is None
+
+
+def test_full_download_advertises_ranges(download):
+    resp = download()
+    assert resp.status_code == 200
+    assert b"".join(resp.streaming_content) == BODY
+    assert resp["Accept-Ranges"] == "bytes"
+    assert resp["Content-Type"] == "application/pdf"
+    assert resp["Content-Disposition"].startswith("attachment;")
+
+
+def test_range_request_returns_partial_content(download):
+    resp = download(Range="bytes=100-199")
+    assert resp.status_code == 206
+    assert b"".join(resp.streaming_content) == BODY[100:200]
+    assert resp["Content-Length"] == "100"
+    assert resp["Content-Range"] == f"bytes 100-199/{len(BODY)}"
+
+    assert download(Range=f"bytes={len(BODY)}-").status_code == 416
+
+
+def test_if_range_falls_back_to_full_body_when_file_changed(download):
+    last_modified = download()["Last-Modified"]
+    assert download(Range="bytes=0-9", **{"If-Range": last_modified}).status_code == 206
+    assert download(Range="bytes=0-9", **{"If-Range": "Thu, 01 Jan 1998 00:00:00 GMT"}).status_code == 200
+
+
+def test_proxy_offload_sends_headers_only(download, settings):
+    settings.DOWNLOAD_OFFLOAD = "x-accel-redirect"
+    resp = download()
+    assert resp.status_code == 200
+    assert resp.content == b""
+    assert re.fullmatch(r"/protected/purchase_requests/\d+/attachments/quote\.pdf", resp["X-Accel-Redirect"])
+    assert resp["Content-Disposition"].startswith("attachment;")
+
+    settings.DOWNLOAD_OFFLOAD = "x-sendfile"
+    resp = download()
+    assert resp["X-Sendfile"].startswith(settings.MEDIA_ROOT)
+    assert resp.content == b""
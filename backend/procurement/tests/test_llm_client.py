@@ -0,0 +1,115 @@
+import threading
+
+import pytest
+from django.core.cache import cache
+
+from ..services import ai, llm
+from .llm_stub import StubLLMServer
+
+HEADER = ["ACME SUPPLIES LTD", "Kigali, Rwanda"]
+DOCUMENT = "\n".join(
+    HEADER
+    + ["1. Paper - Qty: 2 - Unit Price: $5.00", "2. Toner - Qty: 1 - Unit Price: $40.00"]
+    + [f"Clause {n}: goods remain ours until paid in full" for n in range(300)]
+    + ["Grand Total: $50.00"]
+)
+
+
+@pytest.fixture
+def stub(settings):
+    cache.clear()
+    settings.USE_LLM_EXTRACT = True
+    settings.OPENAI_API_KEY = "test-key"
+    with StubLLMServer() as server:
+        settings.LLM_API_URL = server.url
+        yield server
+    llm.get_client().close()
+    llm._client = None
+
+
+def test_answers_are_cached_and_connections_reused(stub):
+    first = ai.llm_refine_extraction(DOCUMENT)
+    assert first == stub.answer
+    assert ai.llm_refine_extraction(DOCUMENT) == first
+    ai.llm_refine_extraction(DOCUMENT.replace("Paper", "Pens"))
+
+    assert len(stub.calls) == 2
+    assert len(stub.connections) == 1  # one keep-alive connection for both calls
+    stats = llm.get_client().stats
+    assert stats["requests"] == 2 and stats["cache_hits"] == 1
+    assert stats["latency_ms"] >= 0
+
+
+def test_prompt_keeps_only_relevant_lines(stub):
+    ai.llm_refine_extraction(DOCUMENT)
+    prompt = stub.calls[0]["messages"][0]["content"]
+    for line in HEADER + ["1. Paper - Qty: 2 - Unit Price: $5.00", "Grand Total: $50.00"]:
+        assert line in prompt
+    assert "Clause 150" not in prompt
+    stats = llm.get_client().stats
+    assert stats["prompt_chars"] < len(DOCUMENT) / 10
+    assert stats["prompt_tokens"] == len(prompt) // 4
+
+
+def test_prompt_is_capped():
+    text = "\n".join(f"Item {n} total 1{n}.00" for n in range(1000))
+    trimmed = llm.trim_document(text, max_chars=200)
+    assert len(trimmed) <= 200
+    assert text.startswith(trimmed)
+
+
+def test_breaker_opens_after_failures_then_probes(stub, settings):
+    settings.LLM_BREAKER_FAILURES = 2
+    stub.status = 503
+    client = llm.get_client()
+    now = [0.0]
+    client.breaker.clock = lambda: now[0]
+
+    for n in range(4):
+        assert ai.llm_refine_extraction(f"Total: {n}.00") == {}
+    assert len(stub.calls) == 2
+    assert client.stats["short_circuited"] == 2
+
+    stub.status = 200
+    now[0] = settings.LLM_BREAKER_RESET_SECONDS + 1
+    assert ai.llm_refine_extraction("Total: 9.00") == stub.answer
+    assert not client.breaker.is_open
+    assert len(stub.calls) == 3
+
+
+def test_unexpected_probe_error_does_not_wedge_the_breaker(stub, settings, monkeypatch):
+    settings.LLM_BREAKER_FAILURES = 1
+    stub.status = 503
+    client = llm.get_client()
+    now = [0.0]
+    client.breaker.clock = lambda: now[0]
+    assert client.refine_extraction("Total: 1.00") == {}
+    assert client.breaker.is_open
+
+    def broken(document):
+        raise RuntimeError("session closed")
+
+    now[0] = settings.LLM_BREAKER_RESET_SECONDS + 1
+    with monkeypatch.context() as patched:
+        patched.setattr(client, "_complete", broken)
+        with pytest.raises(RuntimeError):
+            client.refine_extraction("Total: 2.00")
+    assert client.breaker.is_open
+    assert client.stats["failures"] == 2
+
+    stub.status = 200
+    now[0] = 2 * (settings.LLM_BREAKER_RESET_SECONDS + 1)
+    assert client.refine_extraction("Total: 3.00") == stub.answer
+    assert not client.breaker.is_open
+
+
+def test_concurrency_is_limited_per_process(stub, settings):
+    settings.LLM_MAX_CONCURRENCY = 2
+    stub.delay = 0.05
+    threads = [threading.Thread(target=ai.llm_refine_extraction, args=(f"Total: {n}.00",)) for n in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(stub.calls) == 6
+    assert stub.max_in_flight == 2
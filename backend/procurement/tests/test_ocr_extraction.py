@@ -0,0 +1,129 @@
+import io
+import os
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from core.celery import app
+
+from ..utils import ocr
+from ..utils.sample_pdf import build_text_pdf
+
+
+@pytest.fixture(scope="module")
+def document():
+    return build_text_pdf([[f"page {page} line {line}" for line in range(4)] for page in range(7)])
+
+
+def test_page_ranges_are_contiguous_and_balanced():
+    assert ocr._page_ranges(0, 7, 3) == [(0, 3), (3, 5), (5, 7)]
+    assert ocr._page_ranges(4, 6, 2) == [(4, 5), (5, 6)]
+
+
+def test_parallel_extraction_matches_serial_page_order(document):
+    serial = ocr.extract_text_from_pdf(io.BytesIO(document), workers=1)
+    parallel = ocr.extract_text_from_pdf(io.BytesIO(document), workers=3)
+    ocr.shutdown_pool()
+    assert parallel == serial
+    assert serial.index("page 0 line 0") < serial.index("page 3 line 0") < serial.index("page 6 line 3")
+
+
+def test_daemon_processes_extract_in_process(document, monkeypatch):
+    class Daemon:
+        daemon = True
+
+    def no_pool(workers):
+        raise AssertionError("daemonic processes cannot start a pool")
+
+    monkeypatch.setattr(multiprocessing, "current_process", lambda: Daemon())
+    monkeypatch.setattr(ocr, "_get_pool", no_pool)
+    assert "page 6 line 3" in ocr.extract_text_from_pdf(io.BytesIO(document), workers=4)
+
+
+def test_pool_workers_read_the_document_from_a_file(document, monkeypatch):
+    sources = []
+    original = ocr._pdf_page_texts
+
+    def recording(source, start, stop):
+        sources.append(source)
+        return original(source, start, stop)
+
+    monkeypatch.setattr(ocr, "_pdf_page_texts", recording)
+    monkeypatch.setattr(ocr, "_get_pool", lambda workers: ThreadPoolExecutor(workers))
+    assert "page 6 line 3" in ocr.extract_text_from_pdf(io.BytesIO(document), workers=3)
+    assert len(sources) == 7
+    assert all(isinstance(source, str) for source in sources)
+    assert not any(os.path.exists(source) for source in sources)
+
+
+def test_eager_tasks_extract_in_process(document, monkeypatch):
+    def no_pool(workers):
+        raise AssertionError("eager tasks run in the web worker and must not start a pool")
+
+    monkeypatch.setattr(ocr, "_get_pool", no_pool)
+
+    @app.task
+    def extract(workers):
+        return ocr.extract_text_from_pdf(io.BytesIO(document), workers=workers)
+
+    assert "page 6 line 3" in extract.apply(args=(4,)).get()
+    assert not ocr._extract_in_process(4)
+
+
+PROFORMA_PAGE = [
+    "vendor: Acme Supplies",
+    "1. Paper - Qty: 2 - Unit Price: $5.00",
+    "2. Toner - Qty: 1 - Unit Price: $40.00",
+    "Payment Terms: 30 days",
+    "Grand Total: $50.00",
+]
+APPENDIX_PAGE = ["Terms and conditions"] + [f"Clause {n}: goods remain ours until paid" for n in range(40)]
+
+
+@pytest.fixture
+def extracted_pages(monkeypatch):
+    pages = []
+    original = ocr._pdf_page_texts
+
+    def counting(pdf_bytes, start, stop):
+        pages.extend(range(start, stop))
+        return original(pdf_bytes, start, stop)
+
+    monkeypatch.setattr(ocr, "_pdf_page_texts", counting)
+    return pages
+
+
+def _pdf(pages, name="proforma.pdf"):
+    file_obj = io.BytesIO(build_text_pdf(pages))
+    file_obj.name = name
+    return file_obj
+
+
+def test_extraction_stops_once_proforma_is_complete(extracted_pages):
+    result = ocr.extract_proforma_data(_pdf([PROFORMA_PAGE] + [APPENDIX_PAGE] * 20), workers=1)
+    assert result["status"] == "success"
+    assert result["pages_read"] == 1
+    assert extracted_pages == [0]
+    data = result["extracted_data"]
+    assert data["vendor"] == "Acme Supplies"
+    assert [item["name"] for item in data["items"]] == ["Paper", "Toner"]
+    assert data["grand_total"] == "50.00"
+    assert data["payment_terms"] == "Payment Terms: 30 days"
+
+
+def test_extraction_respects_page_budget(extracted_pages, settings):
+    settings.OCR_MAX_PAGES = 3
+    result = ocr.extract_proforma_data(_pdf([["vendor: Slow Co"]] + [APPENDIX_PAGE] * 10), workers=1)
+    assert result["pages_read"] == 3
+    assert extracted_pages == [0, 1, 2]
+    assert result["extracted_data"]["vendor"] == "Slow Co"
+
+
+def test_incremental_parse_matches_whole_text_parse():
+    pages = [PROFORMA_PAGE[:2], ["Total: $12.00"], PROFORMA_PAGE[2:4], ["Subtotal 99.95"]]
+    parser = ocr.ProformaParser()
+    for page in pages:
+        parser.feed("\n".join(page))
+    assert parser.result() == ocr.parse_proforma_text("\n".join(line for page in pages for line in page))
+    assert not parser.complete
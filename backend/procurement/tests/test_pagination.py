@@ -0,0 +1,94 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from ..models import PurchaseRequest
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+def _make_requests(owner, count, **kwargs):
+    return [
+        PurchaseRequest.objects.create(title=f"PR {i}", description="desc", amount="10.00", created_by=owner, **kwargs)
+        for i in range(count)
+    ]
+
+
+@pytest.mark.django_db
+def test_pending_queue_walks_all_pages_with_cursor(api_client):
+    User = get_user_model()
+    staff = User.objects.create_user(username="staff", password="pass", role=User.Role.STAFF)
+    approver = User.objects.create_user(username="approver1", password="pass", role=User.Role.APPROVER_LEVEL_1)
+    created = _make_requests(staff, 7)
+
+    api_client.force_authenticate(approver)
+    url = reverse("requests-pending") + "?page_size=3"
+    seen = []
+    pages = 0
+    while url:
+        resp = api_client.get(url)
+        assert resp.status_code == 200, resp.content
+        data = resp.json()
+        assert "count" not in data
+        seen.extend(item["id"] for item in data["results"])
+        url = data["next"]
+        pages += 1
+
+    assert pages == 3
+    assert seen == sorted((pr.id for pr in created), reverse=True)
+
+
+@pytest.mark.django_db
+def test_cursor_mode_on_list_with_estimated_total(api_client):
+    User = get_user_model()
+    approver = User.objects.create_user(username="approver1", password="pass", role=User.Role.APPROVER_LEVEL_1)
+    staff = User.objects.create_user(username="staff", password="pass", role=User.Role.STAFF)
+    _make_requests(staff, 4)
+
+    api_client.force_authenticate(approver)
+    resp = api_client.get(reverse("requests-list") + "?cursor=&page_size=2&include_total=true")
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["estimated_total"] == 4
+    assert len(data["results"]) == 2
+    assert data["next"]
+
+    # Without a cursor the list keeps its page-number shape
+    resp = api_client.get(reverse("requests-list"))
+    assert resp.json()["count"] == 4
+
+
+@pytest.mark.django_db
+def test_invalid_cursor_returns_404(api_client):
+    User = get_user_model()
+    finance = User.objects.create_user(username="finance", password="pass", role=User.Role.FINANCE)
+    api_client.force_authenticate(finance)
+    resp = api_client.get(reverse("requests-approved") + "?cursor=not-a-cursor")
+    assert resp.status_code == 404
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("role, queue", [("approver_level_1", "requests-pending"), ("finance", "requests-finance-pending")])
+def test_dashboard_queues_past_the_first_page_are_reachable(api_client, role, queue):
+    """The dashboards load queues with fetchAllPages, which follows ``next`` until it is null."""
+    User = get_user_model()
+    staff = User.objects.create_user(username="staff", password="pass", role=User.Role.STAFF)
+    user = User.objects.create_user(username="reviewer", password="pass", role=role)
+    created = _make_requests(staff, 25)
+
+    api_client.force_authenticate(user)
+    first = api_client.get(reverse(queue)).json()
+    assert len(first["results"]) == 20
+    assert first["next"]
+
+    seen = [item["id"] for item in first["results"]]
+    url = first["next"]
+    while url:
+        data = api_client.get(url).json()
+        seen.extend(item["id"] for item in data["results"])
+        url = data["next"]
+    assert seen == sorted((pr.id for pr in created), reverse=True)
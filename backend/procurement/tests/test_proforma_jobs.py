@@ -0,0 +1,116 @@
+import pytest
+import requests
+from celery.exceptions import Retry
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from ..models import DocumentJob, PurchaseRequest
+from ..services import documents
+from ..tasks import process_proforma
+
+URL = "https://files.example.com/uploads/proforma.pdf?v=1"
+EXTRACTED = {"vendor": "Acme", "items": [], "payment_terms": "", "grand_total": "120.00"}
+
+
+class FakeResponse:
+    content = b"%PDF-1.4 fake"
+
+    def raise_for_status(self):
+        pass
+
+
+@pytest.fixture
+def users(db):
+    User = get_user_model()
+    return {
+        name: User.objects.create_user(username=name, password="pass", role=role)
+        for name, role in [("staff", "staff"), ("other", "staff"), ("approver", "approver_level_1")]
+    }
+
+
+@pytest.fixture
+def purchase_request(users):
+    return PurchaseRequest.objects.create(title="PR", description="d", amount="120.00", created_by=users["staff"])
+
+
+@pytest.mark.django_db
+def test_upload_returns_202_and_job_fills_extracted_data(
+    users, purchase_request, monkeypatch, celery_eager, django_capture_on_commit_callbacks
+):
+    fetched = []
+    monkeypatch.setattr(documents.requests, "get", lambda url, timeout: fetched.append(url) or FakeResponse())
+    monkeypatch.setattr(
+        documents, "extract_proforma_data", lambda f: {"status": "success", "extracted_data": dict(EXTRACTED, name=f.name)}
+    )
+    client = APIClient()
+    client.force_authenticate(users["staff"])
+
+    with django_capture_on_commit_callbacks() as callbacks:
+        resp = client.post(reverse("requests-upload-proforma", args=[purchase_request.id]), {"external_url": URL}, format="json")
+    assert resp.status_code == 202, resp.content
+    body = resp.json()
+    assert body["status"] == "QUEUED"
+    assert resp["Location"] == body["status_url"]
+    assert fetched == []  # nothing downloaded in the request thread
+
+    for callback in callbacks:
+        callback()
+    assert fetched == [URL]
+
+    resp = client.get(body["status_url"])
+    assert resp.status_code == 200
+    job = resp.json()
+    assert job["status"] == "SUCCEEDED"
+    assert job["result"]["name"] == "proforma.pdf"
+    assert job["started_at"] and job["finished_at"]
+
+    purchase_request.refresh_from_db()
+    assert purchase_request.proforma == URL
+    assert purchase_request.proforma_extracted_data["vendor"] == "Acme"
+
+    # another staff member cannot poll this job; approvers can
+    client.force_authenticate(users["other"])
+    assert client.get(body["status_url"]).status_code == 404
+    client.force_authenticate(users["approver"])
+    assert client.get(body["status_url"]).status_code == 200
+
+
+@pytest.mark.django_db
+def test_download_errors_retry_then_fail(users, purchase_request, monkeypatch):
+    def unreachable(url, timeout):
+        raise requests.ConnectionError("connection refused")
+
+    monkeypatch.setattr(documents.requests, "get", unreachable)
+    job = DocumentJob.objects.create(
+        purchase_request=purchase_request, kind=DocumentJob.Kind.PROFORMA, source_url=URL, created_by=users["staff"]
+    )
+
+    with pytest.raises(Retry):
+        process_proforma.apply(args=(str(job.pk),), throw=True)
+    job.refresh_from_db()
+    assert job.status == "RUNNING"
+
+    result = process_proforma.apply(args=(str(job.pk),), retries=process_proforma.max_retries, throw=True)
+    assert result.get() == "FAILED"
+    job.refresh_from_db()
+    assert job.status == "FAILED"
+    assert "connection refused" in job.error
+    purchase_request.refresh_from_db()
+    assert purchase_request.proforma is None
+
+
+@pytest.mark.django_db
+def test_unsupported_file_fails_the_job(users, purchase_request, monkeypatch):
+    monkeypatch.setattr(documents.requests, "get", lambda url, timeout: FakeResponse())
+    job = DocumentJob.objects.create(
+        purchase_request=purchase_request,
+        kind=DocumentJob.Kind.PROFORMA,
+        source_url="https://files.example.com/notes.txt",
+        created_by=users["staff"],
+    )
+    assert documents.run_proforma_job(job.pk) == "FAILED"
+    job.refresh_from_db()
+    assert job.error.startswith("Unsupported file type")
+    # finished jobs are not processed again
+    assert documents.run_proforma_job(job.pk) == "FAILED"
@@ -0,0 +1,39 @@
+import json
+from io import StringIO
+from pathlib import Path
+
+import pytest
+from django.core.management import call_command
+
+from ..utils import ocr
+
+CORPUS = Path(__file__).parent / "proforma_corpus"
+CASES = sorted(path.stem for path in CORPUS.glob("*.txt"))
+
+
+def _case(name):
+    text = (CORPUS / f"{name}.txt").read_text(encoding="utf-8")
+    expected = json.loads((CORPUS / f"{name}.json").read_text(encoding="utf-8"))
+    return text, expected
+
+
+@pytest.mark.parametrize("name", CASES)
+def test_parser_matches_golden_output(name):
+    text, expected = _case(name)
+    assert ocr.parse_proforma_text(text) == expected
+
+
+@pytest.mark.parametrize("name", CASES)
+def test_page_by_page_feed_matches_golden_output(name):
+    text, expected = _case(name)
+    lines = text.split("\n")
+    parser = ocr.ProformaParser()
+    for start in range(0, len(lines), 3):
+        parser.feed("\n".join(lines[start:start + 3]))
+    assert parser.result() == expected
+
+
+def test_benchmark_reports_throughput():
+    out = StringIO()
+    call_command("benchmark_proforma_parser", pages=2, lines=20, repeat=1, stdout=out)
+    assert "lines/s" in out.getvalue()
@@ -0,0 +1,95 @@
+import pytest
+from celery.exceptions import Retry
+from django.contrib.auth import get_user_model
+from django.core.files.storage import FileSystemStorage
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from ..models import PurchaseRequest
+from ..services.workflows import write_purchase_order
+from ..tasks import generate_purchase_order
+
+
+@pytest.fixture(autouse=True)
+def tmp_media_root(tmp_path, settings):
+    settings.MEDIA_ROOT = str(tmp_path)
+
+
+@pytest.fixture
+def users(db):
+    User = get_user_model()
+    return {
+        role: User.objects.create_user(username=role, password="pass", role=role)
+        for role in ["staff", "approver_level_2"]
+    }
+
+
+@pytest.fixture
+def storage_writes(monkeypatch):
+    writes = []
+    original = FileSystemStorage._save
+
+    def recording_save(self, name, content):
+        writes.append(name)
+        return original(self, name, content)
+
+    monkeypatch.setattr(FileSystemStorage, "_save", recording_save)
+    return writes
+
+
+@pytest.mark.django_db
+def test_final_approval_writes_po_after_commit(users, storage_writes, celery_eager, django_capture_on_commit_callbacks):
+    pr = PurchaseRequest.objects.create(
+        title="PR", description="d", amount="10.00", created_by=users["staff"], current_level=2
+    )
+    client = APIClient()
+    client.force_authenticate(users["approver_level_2"])
+
+    with django_capture_on_commit_callbacks() as callbacks:
+        resp = client.patch(reverse("requests-approve", args=[pr.id]), {"decision": "APPROVED"}, format="json")
+        assert resp.status_code == 200, resp.content
+        assert resp.json()["status"] == "APPROVED"
+        assert resp.json()["purchase_order_status"] == "PENDING"
+        assert storage_writes == []  # nothing touched storage under the row lock
+
+        resp = client.get(reverse("requests-download-po", args=[pr.id]))
+        assert resp.status_code == 202
+        assert resp["Retry-After"]
+
+    assert len(callbacks) == 1
+    callbacks[0]()
+    pr.refresh_from_db()
+    assert pr.purchase_order_status == "READY"
+    assert pr.purchase_order_file.name.endswith(f"po-{pr.id}.json")
+    assert len(storage_writes) == 1
+
+    # a repeated job leaves the stored document alone
+    assert write_purchase_order(pr.id) == "READY"
+    assert len(storage_writes) == 1
+
+
+@pytest.mark.django_db
+def test_po_job_marks_failure_after_retries(users, monkeypatch):
+    pr = PurchaseRequest.objects.create(
+        title="PR",
+        description="d",
+        amount="10.00",
+        created_by=users["staff"],
+        status=PurchaseRequest.Status.APPROVED,
+        purchase_order_status=PurchaseRequest.DocumentStatus.PENDING,
+    )
+
+    def broken_save(self, name, content):
+        raise OSError("storage unavailable")
+
+    monkeypatch.setattr(FileSystemStorage, "_save", broken_save)
+    with pytest.raises(Retry):
+        generate_purchase_order.apply(args=(pr.id,), throw=True)
+    pr.refresh_from_db()
+    assert pr.purchase_order_status == "PENDING"
+
+    with pytest.raises(OSError):
+        generate_purchase_order.apply(args=(pr.id,), retries=generate_purchase_order.max_retries, throw=True)
+    pr.refresh_from_db()
+    assert pr.purchase_order_status == "FAILED"
+    assert not pr.purchase_order_file
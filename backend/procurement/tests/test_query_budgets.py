@@ -0,0 +1,114 @@
+"""
+Per-endpoint query budgets.
+
+Every read endpoint must issue a constant number of queries no matter how many
+requests it returns, so each budget is asserted at 10, 100 and 1000 rows.
+"""
+import pytest
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from ..models import Approval, Attachment, FinanceComment, PurchaseRequest
+from ..services.counters import rebuild_counters
+from ..services.policy import get_policy
+
+ROW_COUNTS = [10, 100, 1000]
+
+# (role, url name, query string, max queries)
+# List ETags come from the fetched page, so they cost no query of their own.
+LIST_BUDGETS = [
+    ("approver_level_1", "requests-list", "?page_size=100", 5),
+    ("approver_level_1", "requests-list", "?cursor=&page_size=100", 4),
+    ("approver_level_1", "requests-pending", "?page_size=100", 4),
+    ("approver_level_2", "requests-my-approvals", "?page_size=100", 4),
+    ("finance", "requests-approved", "?page_size=100", 4),
+    ("finance", "requests-rejected", "?page_size=100", 4),
+    ("finance", "requests-finance-pending", "?page_size=100", 4),
+]
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture
+def users(db):
+    User = get_user_model()
+    return {
+        role: User.objects.create_user(username=role, password="pass", role=role)
+        for role in ["staff", "approver_level_1", "approver_level_2", "finance"]
+    }
+
+
+def seed(users, rows):
+    """Create ``rows`` requests per status, each with one of every related row."""
+    staff = users["staff"]
+    requests = PurchaseRequest.objects.bulk_create(
+        PurchaseRequest(
+            title=f"PR {i}",
+            description="desc",
+            amount="10.00",
+            created_by=staff,
+            status=status,
+            current_level=1 if status == PurchaseRequest.Status.PENDING else 2,
+        )
+        for status in PurchaseRequest.Status.values
+        for i in range(rows)
+    )
+    Approval.objects.bulk_create(
+        Approval(
+            purchase_request=pr,
+            approver=users["approver_level_2"],
+            level=2,
+            decision=Approval.Decision.APPROVED,
+        )
+        for pr in requests
+        if pr.status != PurchaseRequest.Status.PENDING
+    )
+    Attachment.objects.bulk_create(
+        Attachment(purchase_request=pr, external_url="https://example.com/a.pdf") for pr in requests
+    )
+    FinanceComment.objects.bulk_create(
+        FinanceComment(purchase_request=pr, user=users["finance"], comment="ok") for pr in requests
+    )
+    rebuild_counters()
+    get_policy()  # compiled once per process, not per request
+    return requests
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("rows", ROW_COUNTS)
+@pytest.mark.parametrize("role,url_name,query,budget", LIST_BUDGETS)
+def test_list_endpoint_query_budget(api_client, users, django_assert_max_num_queries, rows, role, url_name, query, budget):
+    seed(users, rows)
+    api_client.force_authenticate(users[role])
+    with django_assert_max_num_queries(budget):
+        resp = api_client.get(reverse(url_name) + query)
+    assert resp.status_code == 200, resp.content
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("rows", ROW_COUNTS)
+def test_detail_and_write_query_budgets(api_client, users, django_assert_max_num_queries, rows):
+    requests = seed(users, rows)
+    pending = next(pr for pr in requests if pr.status == PurchaseRequest.Status.PENDING)
+
+    api_client.force_authenticate(users["approver_level_1"])
+    with django_assert_max_num_queries(5):
+        resp = api_client.get(reverse("requests-detail", args=[pending.id]))
+    assert resp.status_code == 200
+
+    api_client.force_authenticate(users["finance"])
+    with django_assert_max_num_queries(10):
+        resp = api_client.post(reverse("requests-add-finance-comment", args=[pending.id]), {"comment": "hi"}, format="json")
+    assert resp.status_code == 201
+    assert len(resp.json()["finance_comments"]) == 2
+
+    api_client.force_authenticate(users["approver_level_1"])
+    # includes the request counter moves; the first row in a bucket costs an extra insert
+    with django_assert_max_num_queries(13):
+        resp = api_client.patch(reverse("requests-approve", args=[pending.id]), {"decision": "APPROVED"}, format="json")
+    assert resp.status_code == 200
+    assert [a["level"] for a in resp.json()["approvals"]] == [1]
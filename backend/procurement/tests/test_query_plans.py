@@ -0,0 +1,97 @@
+"""
+EXPLAIN-plan regression tests for the hot procurement querysets.
+
+A skewed dataset (mostly finalized requests, a small pending queue) is seeded
+and analyzed, then each queryset's plan is checked for full-table scans.
+"""
+import re
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+
+from ..models import Approval, PurchaseRequest
+
+SEQ_SCAN_PATTERNS = {
+    "sqlite": re.compile(r"\bSCAN (\w+)(?! USING)\s*$", re.MULTILINE),
+    "postgresql": re.compile(r"Seq Scan on (\w+)"),
+}
+
+
+def assert_no_seq_scan(queryset):
+    plan = queryset.explain()
+    pattern = SEQ_SCAN_PATTERNS.get(connection.vendor)
+    if pattern is None:
+        pytest.skip(f"No plan checker for {connection.vendor}")
+    match = pattern.search(plan)
+    assert match is None, f"Sequential scan on {match.group(1)}:\n{plan}"
+
+
+@pytest.fixture
+def seeded(db):
+    User = get_user_model()
+    staff = User.objects.bulk_create(User(username=f"staff{i}") for i in range(20))
+    approver = User.objects.create(username="approver1", role=User.Role.APPROVER_LEVEL_1)
+    now = timezone.now()
+    statuses = (
+        [PurchaseRequest.Status.APPROVED] * 3000
+        + [PurchaseRequest.Status.REJECTED] * 800
+        + [PurchaseRequest.Status.PENDING] * 200
+    )
+    requests = PurchaseRequest.objects.bulk_create(
+        PurchaseRequest(
+            title=f"PR {i}",
+            description="desc",
+            amount="10.00",
+            created_by=staff[i % len(staff)],
+            status=status,
+            current_level=1 + i % 2,
+        )
+        for i, status in enumerate(statuses)
+    )
+    Approval.objects.bulk_create(
+        Approval(purchase_request=pr, approver=approver, level=1, decision=Approval.Decision.APPROVED)
+        for pr in requests
+        if pr.status != PurchaseRequest.Status.PENDING
+    )
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+    return {"staff": staff[0], "approver": approver, "cursor": (now - timedelta(days=1), requests[-1].pk)}
+
+
+def _page(queryset):
+    return queryset.order_by("-created_at", "-pk")[:21]
+
+
+def test_pending_queue_plan(seeded):
+    assert_no_seq_scan(_page(PurchaseRequest.objects.filter(status=PurchaseRequest.Status.PENDING, current_level=1)))
+
+
+@pytest.mark.parametrize("status", PurchaseRequest.Status.values)
+def test_status_queue_plan(seeded, status):
+    assert_no_seq_scan(_page(PurchaseRequest.objects.filter(status=status)))
+
+
+def test_staff_listing_plan(seeded):
+    qs = PurchaseRequest.objects.filter(created_by=seeded["staff"], status__in=PurchaseRequest.Status.values)
+    assert_no_seq_scan(_page(qs))
+
+
+def test_default_listing_plan(seeded):
+    assert_no_seq_scan(_page(PurchaseRequest.objects.select_related("created_by")))
+
+
+def test_keyset_page_plan(seeded):
+    created_at, pk = seeded["cursor"]
+    qs = PurchaseRequest.objects.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk))
+    assert_no_seq_scan(_page(qs))
+
+
+def test_approver_history_plan(seeded):
+    qs = Approval.objects.filter(approver=seeded["approver"]).select_related("purchase_request")
+    assert_no_seq_scan(qs.order_by("-decided_at", "-pk")[:21])
+    since = seeded["cursor"][0]
+    assert_no_seq_scan(qs.filter(decided_at__gte=since).order_by("-decided_at", "-pk")[:21])
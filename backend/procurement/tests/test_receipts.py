@@ -0,0 +1,136 @@
+from decimal import Decimal
+
+import pytest
+import requests
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from ..models import DocumentJob, PurchaseRequest
+from ..services import ai, documents
+from ..tasks import process_receipt
+from ..utils.sample_pdf import build_text_pdf
+
+URL = "https://files.example.com/uploads/receipt.pdf"
+
+
+class FakeResponse:
+    def __init__(self, content):
+        self.content = content
+
+    def raise_for_status(self):
+        pass
+
+
+def _receipt(total):
+    return build_text_pdf([["Receipt no 20240117", "Subtotal: $1,000.00", f"Total: USD {total}", "Thank you"]])
+
+
+@pytest.fixture
+def users(db):
+    User = get_user_model()
+    return {role: User.objects.create_user(username=role, password="pass", role=role) for role in ["staff", "finance"]}
+
+
+@pytest.fixture
+def approved_request(users):
+    return PurchaseRequest.objects.create(
+        title="PR",
+        description="d",
+        amount="1180.00",
+        created_by=users["staff"],
+        status=PurchaseRequest.Status.APPROVED,
+        purchase_order_metadata={"total_estimate": "1180.00"},
+    )
+
+
+@pytest.fixture
+def finance_client(users):
+    client = APIClient()
+    client.force_authenticate(users["finance"])
+    return client
+
+
+def test_currency_candidates_parse_separators_and_prefixes():
+    assert ai._parse_currency_candidates("USD 1,234.56 then $99 and KES 12.5") == [
+        Decimal("1234.56"),
+        Decimal("99"),
+        Decimal("12.5"),
+    ]
+    # the total line wins over numbers printed after it
+    assert ai.parse_receipt_text("Total: 50.00\nCall 0788123456")["total"] == "50.00"
+
+
+@pytest.mark.django_db
+def test_submitted_receipt_is_reconciled_in_the_background(
+    approved_request, finance_client, monkeypatch, celery_eager, django_capture_on_commit_callbacks
+):
+    fetched = []
+    monkeypatch.setattr(
+        documents.requests, "get", lambda url, timeout: fetched.append(url) or FakeResponse(_receipt("1,180.00"))
+    )
+    with django_capture_on_commit_callbacks() as callbacks:
+        resp = finance_client.post(
+            reverse("requests-submit-receipt", args=[approved_request.id]), {"external_url": URL}, format="json"
+        )
+    assert resp.status_code == 202, resp.content
+    assert resp.json()["receipt_url"] == URL
+    assert fetched == []
+    approved_request.refresh_from_db()
+    assert approved_request.receipt_status == "PENDING"
+
+    for callback in callbacks:
+        callback()
+    job = finance_client.get(resp["Location"]).json()
+    assert job["status"] == "SUCCEEDED"
+    assert job["result"]["matches"] is True
+
+    data = finance_client.get(reverse("requests-detail", args=[approved_request.id])).json()
+    assert data["receipt_status"] == "MATCHED"
+    assert data["receipt_reconciliation"] == {
+        "po_total": "1180.00",
+        "receipt_total": "1180.00",
+        "difference": "0.00",
+        "matches": True,
+    }
+
+
+@pytest.mark.django_db
+def test_mismatches_are_listed_for_finance(approved_request, users, finance_client, monkeypatch):
+    monkeypatch.setattr(documents.requests, "get", lambda url, timeout: FakeResponse(_receipt("1,400.00")))
+    job = documents.enqueue_receipt(approved_request, URL, users["finance"])
+    assert documents.run_receipt_job(job.pk) == "SUCCEEDED"
+
+    approved_request.refresh_from_db()
+    assert approved_request.receipt_status == "MISMATCH"
+    assert approved_request.receipt_reconciliation["difference"] == "220.00"
+
+    resp = finance_client.get(reverse("requests-receipt-mismatches"))
+    assert resp.status_code == 200
+    assert [row["id"] for row in resp.json()["results"]] == [approved_request.id]
+
+
+@pytest.mark.django_db
+def test_superseded_receipt_does_not_overwrite_newer_one(approved_request, users, monkeypatch):
+    monkeypatch.setattr(documents.requests, "get", lambda url, timeout: FakeResponse(_receipt("5.00")))
+    stale = documents.enqueue_receipt(approved_request, URL, users["finance"])
+    documents.enqueue_receipt(approved_request, "https://files.example.com/uploads/receipt-v2.pdf", users["finance"])
+
+    assert documents.run_receipt_job(stale.pk) == "SUCCEEDED"
+    approved_request.refresh_from_db()
+    assert approved_request.receipt_status == "PENDING"
+    assert approved_request.receipt_reconciliation is None
+
+
+@pytest.mark.django_db
+def test_unreachable_receipt_fails_reconciliation(approved_request, users, monkeypatch):
+    def unreachable(url, timeout):
+        raise requests.ConnectionError("connection refused")
+
+    monkeypatch.setattr(documents.requests, "get", unreachable)
+    job = documents.enqueue_receipt(approved_request, URL, users["finance"])
+    result = process_receipt.apply(args=(str(job.pk),), retries=process_receipt.max_retries, throw=True)
+    assert result.get() == "FAILED"
+    approved_request.refresh_from_db()
+    assert approved_request.receipt_status == "FAILED"
+    assert DocumentJob.objects.get(pk=job.pk).error.startswith("Failed to download")
@@ -0,0 +1,95 @@
+from io import StringIO
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+
+from ..models import PurchaseRequest, ReconciliationSweep
+from ..services import reconciliation
+
+
+def _reconciled(po_total, receipt_total):
+    return {"po_total": po_total, "receipt_total": receipt_total, "difference": "0.00", "matches": True}
+
+
+@pytest.fixture
+def staff(db):
+    return get_user_model().objects.create_user(username="staff", password="pass", role="staff")
+
+
+def _request(staff, po_total="100.00", reconciliation_data=None, **fields):
+    values = {
+        "title": "PR",
+        "description": "d",
+        "amount": "100.00",
+        "created_by": staff,
+        "status": PurchaseRequest.Status.APPROVED,
+        "receipt": "https://files.example.com/receipt.pdf",
+        "purchase_order_metadata": {"total_estimate": po_total},
+        "receipt_status": PurchaseRequest.Reconciliation.MATCHED if reconciliation_data else "",
+        "receipt_reconciliation": reconciliation_data,
+    }
+    values.update(fields)
+    return PurchaseRequest.objects.create(**values)
+
+
+@pytest.mark.django_db
+def test_sweep_rechecks_stored_receipt_totals_against_current_po(staff):
+    current = _request(staff, reconciliation_data=_reconciled("100.00", "100.00"))
+    po_changed = _request(staff, po_total="150.00", reconciliation_data=_reconciled("100.00", "100.00"))
+    unread = _request(staff)
+    pending = _request(
+        staff, status=PurchaseRequest.Status.PENDING, po_total="5.00", reconciliation_data=_reconciled("100.00", "100.00")
+    )
+    untouched = {pr.pk: pr.updated_at for pr in [current, pending]}
+
+    sweep = reconciliation.run_sweep(chunk_size=2)
+
+    assert (sweep.checked, sweep.matched, sweep.mismatched, sweep.unread, sweep.updated) == (3, 1, 1, 1, 1)
+    assert sweep.finished_at is not None
+    po_changed.refresh_from_db()
+    assert po_changed.receipt_status == "MISMATCH"
+    assert po_changed.receipt_reconciliation == {
+        "po_total": "150.00",
+        "receipt_total": "100.00",
+        "difference": "-50.00",
+        "matches": False,
+    }
+    for pr in PurchaseRequest.objects.filter(pk__in=untouched):
+        assert pr.updated_at == untouched[pr.pk]
+    assert PurchaseRequest.objects.get(pk=unread.pk).receipt_status == ""
+
+
+@pytest.mark.django_db
+def test_interrupted_sweep_resumes_after_last_chunk(staff, monkeypatch):
+    requests = [_request(staff, po_total="120.00", reconciliation_data=_reconciled("100.00", "100.00")) for _ in range(5)]
+    original = reconciliation._sweep_chunk
+    chunks = []
+
+    def crash_on_second_chunk(sweep, chunk):
+        chunks.append([pr.pk for pr in chunk])
+        if len(chunks) == 2:
+            raise RuntimeError("worker lost")
+        original(sweep, chunk)
+
+    monkeypatch.setattr(reconciliation, "_sweep_chunk", crash_on_second_chunk)
+    with pytest.raises(RuntimeError):
+        reconciliation.run_sweep(chunk_size=2)
+    sweep = ReconciliationSweep.objects.get()
+    assert sweep.finished_at is None
+    assert sweep.last_request_id == requests[1].pk
+    assert sweep.updated == 2
+
+    monkeypatch.setattr(reconciliation, "_sweep_chunk", original)
+    out = StringIO()
+    call_command("reconcile_receipts", chunk_size=2, stdout=out)
+    assert f"Resuming sweep {sweep.id} after request {requests[1].pk}" in out.getvalue()
+    sweep.refresh_from_db()
+    assert sweep.finished_at is not None
+    assert (sweep.checked, sweep.mismatched, sweep.updated) == (5, 5, 5)
+    assert set(PurchaseRequest.objects.values_list("receipt_status", flat=True)) == {"MISMATCH"}
+
+    # the next run starts over
+    call_command("reconcile_receipts", stdout=StringIO())
+    assert ReconciliationSweep.objects.count() == 2
+    assert ReconciliationSweep.objects.order_by("-id").first().updated == 0
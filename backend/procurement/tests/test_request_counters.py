@@ -0,0 +1,80 @@
+import io
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from ..models import PurchaseRequest, RequestCounter
+from ..services.counters import rebuild_counters
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture(autouse=True)
+def tmp_media_root(tmp_path, settings):
+    settings.MEDIA_ROOT = str(tmp_path)
+
+
+@pytest.fixture
+def users(db):
+    User = get_user_model()
+    return {
+        role: User.objects.create_user(username=role, password="pass", role=role)
+        for role in ["staff", "approver_level_1", "approver_level_2", "finance"]
+    }
+
+
+def _snapshot():
+    return sorted(
+        RequestCounter.objects.filter(count__gt=0).values_list("created_by_id", "status", "current_level", "count", "amount_total")
+    )
+
+
+@pytest.mark.django_db
+def test_counters_follow_the_request_lifecycle(api_client, users, django_assert_max_num_queries):
+    api_client.force_authenticate(users["staff"])
+    ids = [
+        api_client.post(reverse("requests-list"), {"title": f"PR {i}", "description": "d", "amount": "100.00"}, format="json").json()["id"]
+        for i in range(3)
+    ]
+    api_client.patch(reverse("requests-detail", args=[ids[0]]), {"amount": "150.00"}, format="json")
+
+    api_client.force_authenticate(users["approver_level_1"])
+    api_client.patch(reverse("requests-approve", args=[ids[0]]), {"decision": "APPROVED"}, format="json")
+    api_client.patch(reverse("requests-approve", args=[ids[1]]), {"decision": "APPROVED"}, format="json")
+    api_client.patch(reverse("requests-reject", args=[ids[2]]), {"decision": "REJECTED"}, format="json")
+    api_client.force_authenticate(users["approver_level_2"])
+    api_client.patch(reverse("requests-approve", args=[ids[0]]), {"decision": "APPROVED"}, format="json")
+
+    incremental = _snapshot()
+    rebuild_counters()
+    assert _snapshot() == incremental
+
+    api_client.force_authenticate(users["finance"])
+    with django_assert_max_num_queries(1):
+        stats = api_client.get(reverse("requests-stats")).json()
+    assert stats["by_status"]["APPROVED"] == {"count": 1, "amount": "150.00"}
+    assert stats["by_status"]["REJECTED"] == {"count": 1, "amount": "100.00"}
+    assert stats["by_status"]["PENDING"] == {"count": 1, "amount": "100.00"}
+    assert stats["pending_by_level"] == {"2": {"count": 1, "amount": "100.00"}}
+    assert stats["by_creator"] == [{"created_by": users["staff"].id, "username": "staff", "count": 3, "amount": "350.00"}]
+
+
+@pytest.mark.django_db
+def test_staff_stats_are_scoped_and_command_reconciles(api_client, users):
+    User = get_user_model()
+    other = User.objects.create_user(username="other", password="pass", role=User.Role.STAFF)
+    # rows written behind the counters' back, e.g. by the admin
+    PurchaseRequest.objects.create(title="mine", description="d", amount="5.00", created_by=users["staff"])
+    PurchaseRequest.objects.create(title="theirs", description="d", amount="7.00", created_by=other)
+    call_command("rebuild_request_counters", stdout=io.StringIO())
+
+    api_client.force_authenticate(users["staff"])
+    stats = api_client.get(reverse("requests-stats")).json()
+    assert stats["by_status"]["PENDING"] == {"count": 1, "amount": "5.00"}
+    assert [row["username"] for row in stats["by_creator"]] == ["staff"]
@@ -0,0 +1,73 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from ..models import Approval, FinanceComment, PurchaseRequest
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture
+def approver(db):
+    User = get_user_model()
+    staff = User.objects.create_user(username="staff", password="pass", role=User.Role.STAFF)
+    approver = User.objects.create_user(username="approver1", password="pass", role=User.Role.APPROVER_LEVEL_1)
+    for i in range(3):
+        pr = PurchaseRequest.objects.create(
+            title=f"PR {i}",
+            description="long description",
+            amount="10.00",
+            created_by=staff,
+            proforma_extracted_data={"raw": "x" * 1000},
+        )
+        Approval.objects.create(purchase_request=pr, approver=approver, level=1, decision="APPROVED")
+        FinanceComment.objects.create(purchase_request=pr, user=staff, comment="note")
+    return approver
+
+
+@pytest.mark.django_db
+def test_summary_view_skips_columns_and_prefetches(api_client, approver):
+    api_client.force_authenticate(approver)
+    with CaptureQueriesContext(connection) as ctx:
+        resp = api_client.get(reverse("requests-pending"), {"view": "summary"})
+    assert resp.status_code == 200
+    row = resp.json()["results"][0]
+    assert set(row) == {"id", "title", "amount", "status", "current_level", "created_at"}
+    # the page itself; its ETag is built from the fetched rows
+    assert len(ctx.captured_queries) == 1
+    sql = ctx.captured_queries[0]["sql"]
+    assert "description" not in sql
+    assert "proforma_extracted_data" not in sql
+
+
+@pytest.mark.django_db
+def test_fields_with_expand(api_client, approver):
+    api_client.force_authenticate(approver)
+    with CaptureQueriesContext(connection) as ctx:
+        resp = api_client.get(reverse("requests-list"), {"fields": "title,proforma_url", "expand": "approvals"})
+    assert resp.status_code == 200
+    row = resp.json()["results"][0]
+    assert set(row) == {"id", "title", "proforma_url", "approvals"}
+    assert row["approvals"][0]["approver"]["username"] == "approver1"
+    # count, page, approvals prefetch
+    assert len(ctx.captured_queries) == 3
+
+
+@pytest.mark.django_db
+def test_default_response_is_unchanged(api_client, approver):
+    api_client.force_authenticate(approver)
+    row = api_client.get(reverse("requests-list")).json()["results"][0]
+    assert {"description", "approvals", "attachments", "finance_comments", "created_by"} <= set(row)
+
+
+@pytest.mark.django_db
+def test_unknown_field_is_rejected(api_client, approver):
+    api_client.force_authenticate(approver)
+    resp = api_client.get(reverse("requests-list"), {"fields": "title,secret"})
+    assert resp.status_code == 400
@@ -2,10 +2,11 @@ from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import TokenRefreshView
 
-from .views import LoginView, PurchaseRequestViewSet, RegisterView
+from .views import DocumentJobViewSet, LoginView, PurchaseRequestViewSet, RegisterView
 
 router = DefaultRouter()
 router.register(r"requests", PurchaseRequestViewSet, basename="requests")
+router.register(r"jobs", DocumentJobViewSet, basename="jobs")
 
 urlpatterns = [
     path("auth/login/", LoginView.as_view(), name="auth-login"),
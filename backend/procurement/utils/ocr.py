@@ -1,74 +1,349 @@
 """
 OCR and text extraction utilities for proforma processing.
 Supports PDF and image extraction with structured data parsing.
+
+Multi-page documents are split into contiguous page ranges that are
+extracted in a shared, bounded process pool (``OCR_MAX_WORKERS``) and
+reassembled in page order. Workers read the document from a temporary file.
+Tasks run eagerly in a web process, and Celery prefork children, extract in
+process instead.
 """
+import atexit
 import io
 import json
+import logging
+import multiprocessing
+import os
 import re
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from decimal import Decimal
 
 import pdfplumber
 import pytesseract
+from celery import current_task
+from django.conf import settings
 from django.core.files.uploadedfile import UploadedFile
 from PIL import Image
 
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pool_workers = 0
+
+
+def ocr_max_workers() -> int:
+    """Worker processes for page extraction (``settings.OCR_MAX_WORKERS``, default up to 4)."""
+    return getattr(settings, "OCR_MAX_WORKERS", None) or min(4, os.cpu_count() or 1)
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    global _pool, _pool_workers
+    if _pool is None or _pool_workers != workers:
+        shutdown_pool()
+        _pool = ProcessPoolExecutor(max_workers=workers)
+        _pool_workers = workers
+    return _pool
+
+
+def shutdown_pool():
+    global _pool, _pool_workers
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+    _pool, _pool_workers = None, 0
+
+
+atexit.register(shutdown_pool)
+
+
+def _page_ranges(start: int, stop: int, parts: int):
+    """Split ``range(start, stop)`` into ``parts`` contiguous, near-equal ``(start, stop)`` ranges."""
+    size, extra = divmod(stop - start, parts)
+    ranges = []
+    for part in range(parts):
+        end = start + size + (1 if part < extra else 0)
+        ranges.append((start, end))
+        start = end
+    return ranges
 
-def extract_text_from_image(file: UploadedFile) -> str:
+
+def _extract_in_process(workers: int) -> bool:
+    """
+    Whether to extract in this process instead of the pool: for a single
+    worker, in daemonic processes (Celery prefork children) that may not start
+    a pool of their own, and in tasks run eagerly, i.e. inside a web worker.
+    """
+    if workers <= 1 or multiprocessing.current_process().daemon:
+        return True
+    return bool(current_task) and bool(current_task.request.is_eager)
+
+
+def _map_pages(func, path: str, start: int, stop: int, workers: int) -> list:
+    """Return ``func(path, start, stop)`` results for pages ``start..stop`` from the pool, in page order."""
+    try:
+        pool = _get_pool(workers)
+        ranges = _page_ranges(start, stop, min(workers, stop - start))
+        futures = [pool.submit(func, path, *pages) for pages in ranges]
+        return [text for future in futures for text in future.result()]
+    except BrokenProcessPool:
+        shutdown_pool()
+        return func(path, start, stop)
+
+
+def _iter_pages(func, payload: bytes, count: int, workers=None):
+    """
+    Yield page texts in order, extracting one page per worker at a time.
+
+    Pool workers open the document from a temporary file, so its bytes are
+    written once instead of being pickled into every page task.
+    """
+    workers = max(1, min(workers or ocr_max_workers(), count))
+    if _extract_in_process(workers):
+        for start in range(0, count, workers):
+            yield from func(io.BytesIO(payload), start, min(start + workers, count))
+        return
+    with tempfile.NamedTemporaryFile(prefix="ocr-") as spool:
+        spool.write(payload)
+        spool.flush()
+        for start in range(0, count, workers):
+            yield from _map_pages(func, spool.name, start, min(start + workers, count), workers)
+
+
+def _pdf_page_texts(source, start: int, stop: int) -> list:
+    """Texts of pages ``start..stop`` of the PDF at ``source``, a path or binary file."""
+    with pdfplumber.open(source) as pdf:
+        return [pdf.pages[index].extract_text() or "" for index in range(start, stop)]
+
+
+def _image_frame_texts(source, start: int, stop: int) -> list:
+    """OCR texts of frames ``start..stop`` of the image at ``source``, a path or binary file."""
+    texts = []
+    with Image.open(source) as image:
+        for index in range(start, stop):
+            image.seek(index)
+            texts.append(pytesseract.image_to_string(image).strip())
+    return texts
+
+
+def iter_pdf_pages(file, workers=None):
+    """Yield the text of each PDF page in order; pages are only extracted as they are consumed."""
+    pdf_bytes = file.read()
+    file.seek(0)  # Reset file pointer
+    with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
+        count = len(pdf.pages)
+    return _iter_pages(_pdf_page_texts, pdf_bytes, count, workers)
+
+
+def iter_image_pages(file, workers=None):
+    """Yield the OCR text of each image frame in order, lazily."""
+    image_bytes = file.read()
+    file.seek(0)  # Reset file pointer
+    with Image.open(io.BytesIO(image_bytes)) as image:
+        frames = getattr(image, "n_frames", 1)
+    return _iter_pages(_image_frame_texts, image_bytes, frames, workers)
+
+
+def extract_text_from_image(file: UploadedFile, workers=None) -> str:
     """
     Extract text from image file using Tesseract OCR.
+
+    Every frame of a multi-page image (TIFF) is OCR'd, frames in parallel.
     
     Args:
         file: Uploaded image file (JPG, PNG, etc.)
+        workers: Process count override; defaults to ``ocr_max_workers()``
     
     Returns:
         Extracted text string
     """
     try:
-        # Read image from uploaded file
-        image = Image.open(file)
-        # Use pytesseract to extract text
-        text = pytesseract.image_to_string(image)
-        return text.strip()
+        return "\n".join(iter_image_pages(file, workers)).strip()
     except Exception as e:
-        print(f"Error extracting text from image: {e}")
+        logger.warning("Error extracting text from image: %s", e)
         return ""
 
 
-def extract_text_from_pdf(file: UploadedFile) -> str:
+def extract_text_from_pdf(file: UploadedFile, workers=None) -> str:
     """
-    Extract text from PDF file using pdfplumber.
+    Extract text from PDF file using pdfplumber, pages in parallel.
     
     Args:
         file: Uploaded PDF file
+        workers: Process count override; defaults to ``ocr_max_workers()``
     
     Returns:
-        Extracted text string
+        Extracted text string, one page after another
     """
     try:
-        # Read PDF from uploaded file
-        pdf_bytes = file.read()
-        file.seek(0)  # Reset file pointer
-        
-        with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
-            text = ""
-            for page in pdf.pages:
-                text += page.extract_text() or ""
-        
-        return text.strip()
+        return "\n".join(iter_pdf_pages(file, workers)).strip()
     except Exception as e:
-        print(f"Error extracting text from PDF: {e}")
+        logger.warning("Error extracting text from PDF: %s", e)
         return ""
 
 
-def parse_proforma_text(text: str) -> dict:
+# Bump whenever extraction or parsing output changes: cached results are keyed on it
+PARSER_VERSION = "2"
+
+VENDOR_KEYWORDS = ['vendor:', 'from:', 'supplier:', 'company:', 'bill from:']
+VENDOR_SCAN_LINES = 20
+# Look for numbered items (1. Item Name – Qty: X – Unit Price: $Y pattern)
+ITEM_PATTERN = re.compile(
+    r'^\d+\.\s*(.+?)\s*[–-]\s*Qty:\s*(\d+)\s*[–-]\s*Unit Price:\s*\$?([\d.]+)',
+    re.IGNORECASE
+)
+AMOUNT_PATTERN = re.compile(r'\$?([\d,]+\.?\d*)')
+# Amounts like 1,234.56, the last-resort grand total candidates. A leading
+# "$" is not captured, so it is left out of the pattern.
+CURRENCY_PATTERN = re.compile(r'([\d,]+\.\d{2})')
+DIGIT_PATTERN = re.compile(r'\d')
+# Loosely formatted items, used only when no numbered item is found
+SEPARATOR_PATTERN = re.compile(r'[–-]')
+LEADING_NUMBER_PATTERN = re.compile(r'^\d+\.\s*')
+QTY_PATTERN = re.compile(r'Qty:\s*(\d+)')
+UNIT_PRICE_PATTERN = re.compile(r'Unit Price:\s*\$?([\d.]+)')
+
+
+def _item(name, qty, unit_price) -> dict:
+    return {
+        "name": name,
+        "qty": qty,
+        "unit_price": unit_price,
+        "total_price": str(float(qty) * float(unit_price)),
+    }
+
+
+class ProformaParser:
     """
-    Parse extracted text from proforma into structured data.
-    
-    Attempts to identify:
+    Incremental proforma parser: ``feed`` text page by page, read ``result()`` at any point.
+
+    Looks for:
     - Vendor/supplier name
     - Line items (name, qty, unit price, total)
     - Payment terms
     - Grand total
+
+    Every line is classified once: numbered lines are tried against the
+    precompiled ``ITEM_PATTERN``, and only lines mentioning a vendor, payment
+    or total go through the remaining checks. The parser keeps just enough state
+    to build the result, so extraction can stop as soon as ``complete`` is set.
+    """
+
+    def __init__(self):
+        self.lines_seen = 0
+        self._vendor = ""
+        self._vendor_fallback = None
+        self._items = []
+        self._fallback_items = []
+        self._payment_terms = ""
+        self._grand_total = None
+        self._total_line = None
+        # Text fed while no grand total was known, scanned for amounts only if
+        # the result ends up needing the last-resort fallback
+        self._unscanned = []
+
+    @property
+    def complete(self) -> bool:
+        """Vendor, items and an explicit grand total were all found."""
+        return bool(self._vendor and self._items and self._grand_total)
+
+    def feed(self, text: str):
+        items = self._items
+        index = self.lines_seen
+        for line in text.split('\n'):
+            line = line.strip()
+            if not line:
+                continue
+            # Items start with their number; a cheap test saves the regex call
+            match = line[0].isdigit() and ITEM_PATTERN.match(line)
+            if match:
+                name, qty, unit_price = match.groups()
+                items.append(_item(name.strip(), qty, unit_price))
+            # Fallback, used only when no structured items are found: lines
+            # with "–" or "-" separators and numbers
+            elif not items and ('–' in line or '- Qty:' in line) and DIGIT_PATTERN.search(line):
+                self._parse_fallback_item(line)
+            lower_line = line.lower()
+            # Only lines naming a vendor, payment terms or a total need the
+            # slower checks; plain substring tests beat a regex alternation here
+            if (
+                'vendor' in lower_line or 'from:' in lower_line or 'supplier:' in lower_line
+                or 'company:' in lower_line or 'payment' in lower_line or 'total' in lower_line
+            ):
+                self._parse_marker_line(line, lower_line, index)
+            index += 1
+        self.lines_seen = index
+
+        if self._grand_total:
+            self._unscanned.clear()
+        else:
+            self._unscanned.append(text)
+
+    def _parse_marker_line(self, line: str, lower_line: str, index: int):
+        # ===== VENDOR =====
+        # "Vendor:" prefix or similar within the first lines
+        if not self._vendor and index < VENDOR_SCAN_LINES:
+            for kw in VENDOR_KEYWORDS:
+                if kw in lower_line:
+                    # Extract everything after the keyword
+                    self._vendor = line.split(kw, 1)[-1].strip()
+                    break
+        # Fallback: the first "Vendor <name>" line anywhere
+        if self._vendor_fallback is None and lower_line.startswith('vendor'):
+            self._vendor_fallback = line.split(':', 1)[-1].strip() if ':' in line else line[6:].strip()
+
+        # ===== PAYMENT TERMS =====
+        if not self._payment_terms and 'payment' in lower_line and (
+            'term' in lower_line or 'due' in lower_line or 'day' in lower_line
+        ):
+            self._payment_terms = line
+
+        # ===== GRAND TOTAL =====
+        if self._grand_total is None and 'grand total' in lower_line:
+            amount_match = AMOUNT_PATTERN.search(line)
+            self._grand_total = amount_match.group(1).replace(',', '') if amount_match else ""
+        # Fallback: the last "Total:" line
+        if lower_line.startswith('total:'):
+            self._total_line = line
+
+    def _parse_fallback_item(self, line: str):
+        parts = SEPARATOR_PATTERN.split(line)
+        if len(parts) < 2:
+            return
+        # Remove leading numbers (1., 2., etc.)
+        name = LEADING_NUMBER_PATTERN.sub('', parts[0].strip())
+        remaining = ' '.join(parts[1:])
+        qty_match = QTY_PATTERN.search(remaining)
+        price_match = UNIT_PRICE_PATTERN.search(remaining)
+        if qty_match and price_match:
+            self._fallback_items.append(_item(name, qty_match.group(1), price_match.group(1)))
+
+    def result(self) -> dict:
+        grand_total = self._grand_total or ""
+        if not grand_total and self._total_line is not None:
+            amount_match = AMOUNT_PATTERN.search(self._total_line)
+            if amount_match:
+                grand_total = amount_match.group(1).replace(',', '')
+        # Last resort: the largest currency amount in the document
+        if not grand_total:
+            amounts = [
+                float(amount.replace(',', ''))
+                for text in self._unscanned
+                for amount in CURRENCY_PATTERN.findall(text)
+            ]
+            if amounts:
+                grand_total = str(max(amounts))
+        return {
+            "vendor": self._vendor or self._vendor_fallback or "",
+            "items": self._items or self._fallback_items,
+            "payment_terms": self._payment_terms,
+            "grand_total": grand_total,
+        }
+
+
+def parse_proforma_text(text: str) -> dict:
+    """
+    Parse extracted text from proforma into structured data.
     
     Args:
         text: Extracted text from OCR/PDF
@@ -76,130 +351,38 @@ def parse_proforma_text(text: str) -> dict:
     Returns:
         Dictionary with keys: vendor, items, payment_terms, grand_total
     """
-    parsed = {
-        "vendor": "",
-        "items": [],
-        "payment_terms": "",
-        "grand_total": ""
-    }
-    
-    if not text:
-        return parsed
-    
-    lines = text.split('\n')
-    cleaned_lines = [line.strip() for line in lines if line.strip()]
-    
-    # ===== VENDOR EXTRACTION =====
-    # Look for "Vendor:" prefix or similar
-    vendor_keywords = ['vendor:', 'from:', 'supplier:', 'company:', 'bill from:']
-    for i, line in enumerate(cleaned_lines[:20]):
-        lower_line = line.lower()
-        for kw in vendor_keywords:
-            if kw in lower_line:
-                # Extract everything after the keyword
-                parsed['vendor'] = line.split(kw, 1)[-1].strip()
-                break
-        if parsed['vendor']:
-            break
-    
-    # Fallback: if not found, check for "Vendor: <name>" pattern anywhere
-    if not parsed['vendor']:
-        for line in cleaned_lines:
-            if line.lower().startswith('vendor'):
-                parsed['vendor'] = line.split(':', 1)[-1].strip() if ':' in line else line[6:].strip()
-                break
-    
-    # ===== ITEMS EXTRACTION =====
-    # Look for numbered items (1. Item Name – Qty: X – Unit Price: $Y pattern)
-    # or lines with format: "Item Description – Qty: # – Unit Price: $price"
-    item_pattern = re.compile(
-        r'^\d+\.\s*(.+?)\s*[–-]\s*Qty:\s*(\d+)\s*[–-]\s*Unit Price:\s*\$?([\d.]+)',
-        re.IGNORECASE
+    parser = ProformaParser()
+    if text:
+        parser.feed(text)
+    return parser.result()
+
+
+def extraction_budget():
+    """``(max pages, max characters)`` read from one document before parsing stops."""
+    return (
+        getattr(settings, "OCR_MAX_PAGES", None) or 30,
+        getattr(settings, "OCR_MAX_CHARS", None) or 200_000,
     )
-    
-    for line in cleaned_lines:
-        match = item_pattern.match(line)
-        if match:
-            name, qty, unit_price = match.groups()
-            parsed['items'].append({
-                "name": name.strip(),
-                "qty": qty,
-                "unit_price": unit_price,
-                "total_price": str(float(qty) * float(unit_price))  # Calculate total
-            })
-    
-    # Fallback: if no structured items found, try simpler pattern
-    if not parsed['items']:
-        for line in cleaned_lines:
-            # Look for lines with "–" or "-" separators and numbers
-            if ('–' in line or '- Qty:' in line) and re.search(r'\$?\d+', line):
-                # Try to extract: name, qty, price
-                parts = re.split(r'[–-]', line)
-                if len(parts) >= 2:
-                    name = parts[0].strip()
-                    # Remove leading numbers (1., 2., etc.)
-                    name = re.sub(r'^\d+\.\s*', '', name)
-                    
-                    # Extract qty and price from remaining parts
-                    remaining = ' '.join(parts[1:])
-                    qty_match = re.search(r'Qty:\s*(\d+)', remaining)
-                    price_match = re.search(r'Unit Price:\s*\$?([\d.]+)', remaining)
-                    
-                    if qty_match and price_match:
-                        qty = qty_match.group(1)
-                        unit_price = price_match.group(1)
-                        parsed['items'].append({
-                            "name": name,
-                            "qty": qty,
-                            "unit_price": unit_price,
-                            "total_price": str(float(qty) * float(unit_price))
-                        })
-    
-    # ===== PAYMENT TERMS EXTRACTION =====
-    # Look for lines containing "Payment Terms:" or similar
-    for line in cleaned_lines:
-        lower_line = line.lower()
-        if 'payment' in lower_line and ('term' in lower_line or 'due' in lower_line or 'day' in lower_line):
-            parsed['payment_terms'] = line.strip()
-            break
-    
-    # ===== GRAND TOTAL EXTRACTION =====
-    # Look for "Grand Total:" or "Total:" with a currency amount
-    for line in cleaned_lines:
-        lower_line = line.lower()
-        if 'grand total' in lower_line:
-            # Extract the number (currency-prefixed or not)
-            amount_match = re.search(r'\$?([\d,]+\.?\d*)', line)
-            if amount_match:
-                parsed['grand_total'] = amount_match.group(1).replace(',', '')
-            break
-    
-    # Fallback: look for "Total:" if "Grand Total" not found
-    if not parsed['grand_total']:
-        for line in reversed(cleaned_lines):
-            if line.lower().strip().startswith('total:'):
-                amount_match = re.search(r'\$?([\d,]+\.?\d*)', line)
-                if amount_match:
-                    parsed['grand_total'] = amount_match.group(1).replace(',', '')
-                break
-    
-    # Last resort: find the largest currency amount in the document
-    if not parsed['grand_total']:
-        all_amounts = re.findall(r'\$?([\d,]+\.\d{2})', text)  # Amounts like 1,234.56
-        if all_amounts:
-            # Convert to float, find max
-            amounts = [float(a.replace(',', '')) for a in all_amounts]
-            parsed['grand_total'] = str(max(amounts))
-    
-    return parsed
 
 
-def extract_proforma_data(file: UploadedFile) -> dict:
+def extraction_fingerprint() -> str:
+    """Parser version plus extraction budget: everything besides the bytes that shapes a result."""
+    max_pages, max_chars = extraction_budget()
+    return f"{PARSER_VERSION}:{max_pages}:{max_chars}"
+
+
+def extract_proforma_data(file: UploadedFile, workers=None) -> dict:
     """
-    Main function: detect file type, extract text, and parse into structured data.
+    Main function: detect file type, then extract and parse page by page.
+
+    Pages are fed to a ``ProformaParser`` as they are extracted. Extraction
+    stops once vendor, items and grand total are found, or when the page or
+    character budget (``OCR_MAX_PAGES`` / ``OCR_MAX_CHARS``) is spent, so
+    trailing appendices and terms pages are never extracted.
     
     Args:
         file: Uploaded proforma file (PDF or image)
+        workers: Process count override; defaults to ``ocr_max_workers()``
     
     Returns:
         Dictionary with extracted_data and status
@@ -210,37 +393,50 @@ def extract_proforma_data(file: UploadedFile) -> dict:
         is_pdf = filename.endswith('.pdf')
         is_image = any(filename.endswith(ext) for ext in ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff'])
         
-        print(f"[OCR DEBUG] Processing file: {filename}, is_pdf={is_pdf}, is_image={is_image}")
+        logger.debug("Processing file: %s, is_pdf=%s, is_image=%s", filename, is_pdf, is_image)
         
-        # Extract text based on file type
-        extracted_text = ""
         if is_pdf:
-            extracted_text = extract_text_from_pdf(file)
-            print(f"[OCR DEBUG] PDF extraction completed, extracted {len(extracted_text)} characters")
+            pages = iter_pdf_pages(file, workers)
         elif is_image:
-            extracted_text = extract_text_from_image(file)
-            print(f"[OCR DEBUG] Image extraction completed, extracted {len(extracted_text)} characters")
+            pages = iter_image_pages(file, workers)
         else:
             error_msg = "Unsupported file type. Please upload a PDF or image."
-            print(f"[OCR DEBUG] {error_msg}")
+            logger.debug(error_msg)
             return {
                 "status": "error",
                 "message": error_msg,
                 "extracted_data": {}
             }
-        
-        # Parse structured data
-        parsed_data = parse_proforma_text(extracted_text)
+
+        parser = ProformaParser()
+        max_pages, max_chars = extraction_budget()
+        texts, chars = [], 0
+        try:
+            for page_text in pages:
+                parser.feed(page_text)
+                texts.append(page_text)
+                chars += len(page_text)
+                if parser.complete or len(texts) >= max_pages or chars >= max_chars:
+                    break
+        except Exception as e:
+            # keep what was read so far, as a failed page read always did
+            logger.warning("Error extracting text: %s", e)
+        finally:
+            pages.close()
+
+        extracted_text = "\n".join(texts).strip()
+        logger.debug("Read %d page(s), %d characters", len(texts), len(extracted_text))
         
         return {
             "status": "success",
             "message": "Proforma processed successfully",
-            "extracted_data": parsed_data,
+            "extracted_data": parser.result(),
+            "pages_read": len(texts),
             "raw_text": extracted_text[:500]  # Store first 500 chars for debugging
         }
     except Exception as e:
         error_msg = f"Extraction error: {str(e)}"
-        print(f"[OCR ERROR] {error_msg}")
+        logger.warning(error_msg)
         return {
             "status": "error",
             "message": error_msg,
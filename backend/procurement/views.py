@@ -1,6 +1,8 @@
 from django.contrib.auth import get_user_model
+from django.db import transaction
 from django.db.models import Prefetch
-from rest_framework import permissions, status, viewsets
+from django.urls import reverse
+from rest_framework import mixins, permissions, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
@@ -9,32 +11,48 @@ from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenObtainPairView
 import logging
 
-from .models import Approval, PurchaseRequest, Attachment, FinanceComment
+from .conditional import make_etag, not_modified, page_version, set_validators
+from .fast_serializers import compile_serializer
+from .models import Approval, DocumentJob, PurchaseRequest, Attachment, FinanceComment
+from .pagination import ApprovalHistoryPagination, PurchaseRequestPagination
 from .permissions import IsApprover, IsFinance, IsStaff
 from .serializers import (
     ApprovalDecisionSerializer,
+    BulkDecisionSerializer,
+    ClaimSerializer,
+    DocumentJobSerializer,
+    ExportFilterSerializer,
+    ApprovalHistoryFilterSerializer,
+    ApprovalHistorySerializer,
     FileUploadSerializer,
     ProformaUploadSerializer,
     PurchaseRequestCreateSerializer,
     PurchaseRequestSerializer,
     PurchaseRequestUpdateSerializer,
     ReceiptUrlSerializer,
+    ReleaseClaimSerializer,
     AttachmentUploadSerializer,
+    AttachmentUrlsSerializer,
     RegisterSerializer,
 )
-from .services import ai
-from .services.workflows import apply_approval, ensure_staff_owner, handle_receipt_upload
-from .utils.ocr import extract_proforma_data
-import mimetypes
-import os
-import boto3
-import requests
-import io
+from .services import ai, counters
+from .services import export as request_export
+from .services.attachments import probe_content_types
+from .services.delivery import document_response
+from .services.documents import enqueue_proforma, enqueue_receipt
+from .services.policy import get_policy
+from .services.workflows import (
+    apply_approval,
+    apply_bulk_approvals,
+    claim_requests,
+    ensure_staff_owner,
+    release_claims,
+)
 
 # Setup logging
 logger = logging.getLogger(__name__)
-from django.http import FileResponse, Http404, HttpResponseRedirect, StreamingHttpResponse
-from django.conf import settings
+from django.http import Http404, StreamingHttpResponse
+from django.utils import timezone
 
 User = get_user_model()
 
@@ -89,6 +107,9 @@ class RegisterView(APIView):
 
 class PurchaseRequestViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = PurchaseRequestPagination
+    # Queue endpoints always page by (created_at, id) keyset
+    keyset_actions = {"pending", "approved", "rejected", "finance_pending", "receipt_mismatches"}
 
     def dispatch(self, request, *args, **kwargs):
         print(f"\n[VIEWSET DEBUG] dispatch() called")
@@ -96,11 +117,13 @@ class PurchaseRequestViewSet(viewsets.ModelViewSet):
         print(f"[VIEWSET DEBUG] method: {request.method}")
         return super().dispatch(request, *args, **kwargs)
 
+    def base_queryset(self):
+        """Requests loaded for PurchaseRequestSerializer, honouring any sparse fieldset."""
+        fields = PurchaseRequestSerializer.requested_fields(self.request.query_params)
+        return PurchaseRequestSerializer.setup_eager_loading(PurchaseRequest.objects.all(), fields)
+
     def get_queryset(self):
-        qs = PurchaseRequest.objects.select_related("created_by").prefetch_related(
-            Prefetch("approvals", queryset=Approval.objects.select_related("approver")),
-            Prefetch("finance_comments", queryset=FinanceComment.objects.select_related("user"))
-        )
+        qs = self.base_queryset()
         user = self.request.user
         if user.role == User.Role.STAFF:
             # Staff can see their own PENDING, REJECTED, and APPROVED requests
@@ -118,11 +141,59 @@ class PurchaseRequestViewSet(viewsets.ModelViewSet):
             return PurchaseRequestCreateSerializer
         if self.action in {"update", "partial_update"}:
             return PurchaseRequestUpdateSerializer
+        if self.action == "my_approvals":
+            return ApprovalHistorySerializer
         return PurchaseRequestSerializer
 
     def perform_create(self, serializer):
         serializer.save()
 
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        counters.record_deleted(instance)
+        instance.delete()
+
+    def list(self, request, *args, **kwargs):
+        return self._paginated_response(self.filter_queryset(self.get_queryset()))
+
+    def retrieve(self, request, *args, **kwargs):
+        updated_at = self.get_queryset().filter(pk=kwargs["pk"]).values_list("updated_at", flat=True).first()
+        if updated_at is None:
+            return super().retrieve(request, *args, **kwargs)
+        etag = make_etag(request, kwargs["pk"], updated_at.isoformat())
+        cached = not_modified(request, etag, updated_at)
+        if cached is not None:
+            return cached
+        return set_validators(super().retrieve(request, *args, **kwargs), etag, updated_at)
+
+    def _serialize_many(self, rows):
+        # Same output as PurchaseRequestSerializer(many=True), via a cached compiled plan
+        fields = PurchaseRequestSerializer.requested_fields(self.request.query_params)
+        plan = compile_serializer(PurchaseRequestSerializer, None if fields is None else frozenset(fields))
+        return plan.serialize_many(rows, self.request)
+
+    def _paginated_response(self, queryset):
+        page = self.paginate_queryset(queryset)
+        rows = page if page is not None else list(queryset)
+        parts = self.paginator.version_parts() if page is not None else ()
+        # No Last-Modified on lists: a row leaving the page need not change the newest updated_at
+        etag = make_etag(self.request, page_version(rows, *parts))
+        cached = not_modified(self.request, etag)
+        if cached is not None:
+            return cached
+
+        if page is not None:
+            response = self.get_paginated_response(self._serialize_many(page))
+        else:
+            response = Response(self._serialize_many(rows))
+        return set_validators(response, etag)
+
+    def _detail_response(self, pk, status_code=status.HTTP_200_OK):
+        # Re-read after a write so prefetched relations are fresh and batch-loaded
+        purchase_request = self.base_queryset().get(pk=pk)
+        serializer = PurchaseRequestSerializer(purchase_request, context={"request": self.request})
+        return Response(serializer.data, status=status_code)
+
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -142,13 +213,21 @@ class PurchaseRequestViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=["get"], url_path="pending", permission_classes=[permissions.IsAuthenticated, IsApprover])
     def pending(self, request):
-        queryset = PurchaseRequest.objects.filter(status=PurchaseRequest.Status.PENDING)
-        if request.user.role == User.Role.APPROVER_LEVEL_1:
-            queryset = queryset.filter(current_level=1)
-        else:
-            queryset = queryset.filter(current_level=2)
-        serializer = PurchaseRequestSerializer(queryset, many=True)
-        return Response(serializer.data)
+        queryset = self.base_queryset().filter(
+            status=PurchaseRequest.Status.PENDING,
+            current_level__in=get_policy().levels_for(request.user.role),
+        )
+        return self._paginated_response(queryset)
+
+    @action(detail=False, methods=["get"], url_path="stats")
+    def stats(self, request):
+        """Counts and amount sums per status, pending level and creator, served from counters."""
+        user = request.user
+        if user.role == User.Role.STAFF:
+            return Response(counters.request_stats(created_by=user))
+        if user.role in {User.Role.FINANCE, User.Role.APPROVER_LEVEL_1, User.Role.APPROVER_LEVEL_2}:
+            return Response(counters.request_stats())
+        return Response({"detail": "Not allowed"}, status=status.HTTP_403_FORBIDDEN)
 
     @action(
         detail=False,
@@ -157,9 +236,8 @@ class PurchaseRequestViewSet(viewsets.ModelViewSet):
         permission_classes=[permissions.IsAuthenticated, IsFinance],
     )
     def approved(self, request):
-        queryset = PurchaseRequest.objects.filter(status=PurchaseRequest.Status.APPROVED)
-        serializer = PurchaseRequestSerializer(queryset, many=True)
-        return Response(serializer.data)
+        queryset = self.base_queryset().filter(status=PurchaseRequest.Status.APPROVED)
+        return self._paginated_response(queryset)
 
     @action(
         detail=False,
@@ -169,9 +247,8 @@ class PurchaseRequestViewSet(viewsets.ModelViewSet):
     )
     def rejected(self, request):
         """Finance can view rejected requests."""
-        queryset = PurchaseRequest.objects.filter(status=PurchaseRequest.Status.REJECTED)
-        serializer = PurchaseRequestSerializer(queryset, many=True)
-        return Response(serializer.data)
+        queryset = self.base_queryset().filter(status=PurchaseRequest.Status.REJECTED)
+        return self._paginated_response(queryset)
 
     @action(
         detail=False,
@@ -181,9 +258,39 @@ class PurchaseRequestViewSet(viewsets.ModelViewSet):
     )
     def finance_pending(self, request):
         """Finance can view pending requests (read-only)."""
-        queryset = PurchaseRequest.objects.filter(status=PurchaseRequest.Status.PENDING)
-        serializer = PurchaseRequestSerializer(queryset, many=True)
-        return Response(serializer.data)
+        queryset = self.base_queryset().filter(status=PurchaseRequest.Status.PENDING)
+        return self._paginated_response(queryset)
+
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="receipt-mismatches",
+        permission_classes=[permissions.IsAuthenticated, IsFinance],
+    )
+    def receipt_mismatches(self, request):
+        """Finance can list requests whose receipt total does not match the PO."""
+        queryset = self.base_queryset().filter(receipt_status=PurchaseRequest.Reconciliation.MISMATCH)
+        return self._paginated_response(queryset)
+
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="export",
+        permission_classes=[permissions.IsAuthenticated, IsFinance],
+    )
+    def export(self, request):
+        """Finance can download every matching request as one CSV or NDJSON file, streamed."""
+        filters = ExportFilterSerializer(data=request.query_params)
+        filters.is_valid(raise_exception=True)
+        options = filters.validated_data
+        file_format = options["file_format"]
+        rows = request_export.export_rows(options.get("status"), options.get("created_after"), options.get("created_before"))
+        response = StreamingHttpResponse(
+            request_export.render(rows, file_format), content_type=request_export.FORMATS[file_format]
+        )
+        filename = f"purchase-requests-{timezone.now():%Y%m%d}.{file_format}"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
 
     @action(
         detail=False,
@@ -192,20 +299,27 @@ class PurchaseRequestViewSet(viewsets.ModelViewSet):
         permission_classes=[permissions.IsAuthenticated, IsApprover],
     )
     def my_approvals(self, request):
-        """Approvers can view their own approval history."""
-        approver = request.user
-        approvals = Approval.objects.filter(approver=approver).select_related("purchase_request", "approver").order_by("-decided_at")
-        result = []
-        for approval in approvals:
-            result.append({
-                "id": approval.id,
-                "request": PurchaseRequestSerializer(approval.purchase_request, context={"request": request}).data,
-                "decision": approval.decision,
-                "comments": approval.comments,
-                "level": approval.level,
-                "decided_at": approval.decided_at,
-            })
-        return Response(result)
+        """Approvers can view their own approval history, newest first."""
+        filters = ApprovalHistoryFilterSerializer(data=request.query_params)
+        filters.is_valid(raise_exception=True)
+        approvals = (
+            Approval.objects.filter(approver=request.user)
+            .select_related("purchase_request__created_by")
+            .prefetch_related(
+                Prefetch("purchase_request__approvals", queryset=Approval.objects.select_related("approver")),
+                "purchase_request__attachments",
+                Prefetch("purchase_request__finance_comments", queryset=FinanceComment.objects.select_related("user")),
+            )
+        )
+        if "decided_after" in filters.validated_data:
+            approvals = approvals.filter(decided_at__gte=filters.validated_data["decided_after"])
+        if "decided_before" in filters.validated_data:
+            approvals = approvals.filter(decided_at__lt=filters.validated_data["decided_before"])
+
+        paginator = ApprovalHistoryPagination()
+        page = paginator.paginate_queryset(approvals, request, view=self)
+        data = compile_serializer(ApprovalHistorySerializer).serialize_many(page, request)
+        return paginator.get_paginated_response(data)
 
     @action(
         detail=True,
@@ -227,14 +341,18 @@ class PurchaseRequestViewSet(viewsets.ModelViewSet):
         serializer = ReceiptUrlSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        # Save the URL directly
-        purchase_request.receipt = serializer.validated_data["external_url"]
-        purchase_request.save()
-
+        # The URL is saved now; extraction and PO reconciliation run in a worker
+        # and fill in receipt_status / receipt_reconciliation
+        receipt_url = serializer.validated_data["external_url"]
+        job = enqueue_receipt(purchase_request, receipt_url, request.user)
+        status_url = request.build_absolute_uri(reverse("jobs-detail", args=[job.pk]))
         return Response({
-            "receipt_url": purchase_request.receipt,
-            "message": "Receipt URL saved successfully"
-        }, status=status.HTTP_200_OK)
+            "receipt_url": receipt_url,
+            "message": "Receipt URL saved, reconciliation queued",
+            "job_id": str(job.pk),
+            "status": job.status,
+            "status_url": status_url,
+        }, status=status.HTTP_202_ACCEPTED, headers={"Location": status_url})
 
 
     @action(
@@ -248,45 +366,34 @@ class PurchaseRequestViewSet(viewsets.ModelViewSet):
         ensure_staff_owner(purchase_request, request.user)
         # Accept either uploaded files (multipart) or external URLs (Cloudinary)
         files = request.FILES.getlist('files') or []
-        external_urls = request.data.get('external_urls') or []
-        created = []
-
-        # handle uploaded files
-        for f in files:
-            att = Attachment.objects.create(
-                purchase_request=purchase_request,
-                file=f,
-                content_type=getattr(f, 'content_type', ''),
-            )
-            created.append({
-                'id': att.id,
-                'file': att.file.url if att.file else None,
-                'external_url': att.external_url,
-                'content_type': att.content_type,
-                'uploaded_at': att.uploaded_at,
-            })
-
-        # handle external URLs (client uploaded to Cloudinary)
-        for url in external_urls:
-            # try to fetch headers/content-type
-            content_type = ''
-            try:
-                head = requests.head(url, timeout=5)
-                content_type = head.headers.get('content-type', '')
-            except Exception:
-                content_type = ''
-            att = Attachment.objects.create(
-                purchase_request=purchase_request,
-                external_url=url,
-                content_type=content_type,
-            )
-            created.append({
+        url_serializer = AttachmentUrlsSerializer(data=request.data)
+        url_serializer.is_valid(raise_exception=True)
+        external_urls = url_serializer.validated_data['external_urls']
+
+        attachments = [
+            Attachment(purchase_request=purchase_request, file=f, content_type=getattr(f, 'content_type', ''))
+            for f in files
+        ]
+        # external URLs (client uploaded to Cloudinary): content types are probed concurrently
+        attachments += [
+            Attachment(purchase_request=purchase_request, external_url=url, content_type=content_type)
+            for url, content_type in zip(external_urls, probe_content_types(external_urls))
+        ]
+        with transaction.atomic():
+            Attachment.objects.bulk_create(attachments)
+            if attachments:
+                # bulk_create sends no post_save, so bump the request's ETag here
+                PurchaseRequest.objects.filter(pk=purchase_request.pk).update(updated_at=timezone.now())
+        created = [
+            {
                 'id': att.id,
                 'file': att.file.url if att.file else None,
                 'external_url': att.external_url,
                 'content_type': att.content_type,
                 'uploaded_at': att.uploaded_at,
-            })
+            }
+            for att in attachments
+        ]
 
         if not created:
             return Response({"detail": "No files provided"}, status=status.HTTP_400_BAD_REQUEST)
@@ -300,9 +407,10 @@ class PurchaseRequestViewSet(viewsets.ModelViewSet):
     )
     def upload_proforma(self, request, pk=None):
         """
-        Upload and process proforma file (PDF or image).
+        Queue processing of a proforma file (PDF or image).
         Accepts external URL (Cloudinary) via JSON: {"external_url": "https://..."}
-        Extracts text and structured data (vendor, items, payment terms, grand total).
+        A background job downloads it and extracts structured data (vendor, items,
+        payment terms, grand total). Responds 202 with the job to poll.
         Only staff (request creator) can upload while request is PENDING.
         """
         purchase_request = self.get_object()
@@ -324,42 +432,16 @@ class PurchaseRequestViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Download the file from external URL
-        try:
-            resp = requests.get(external_url, timeout=10)
-            resp.raise_for_status()
-            file_content = resp.content
-        except Exception as e:
-            return Response(
-                {"detail": f"Failed to download from external URL: {str(e)}"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        # Create a file-like object for extraction
-        from io import BytesIO
-        file_obj = BytesIO(file_content)
-        fname = external_url.split('/')[-1].split('?')[0] or 'proforma.pdf'
-        file_obj.name = fname
-        
-        # Extract and parse proforma data
-        result = extract_proforma_data(file_obj)
-        
-        if result['status'] == 'error':
-            return Response(
-                {"detail": result['message']},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        # Save the URL and extracted data to model
-        purchase_request.proforma = external_url
-        purchase_request.proforma_extracted_data = result['extracted_data']
-        purchase_request.save(update_fields=['proforma', 'proforma_extracted_data'])
-        
+        # Download and extraction run in a worker; the URL and extracted data
+        # are saved on the request when the job succeeds
+        job = enqueue_proforma(purchase_request, external_url, request.user)
+        status_url = request.build_absolute_uri(reverse("jobs-detail", args=[job.pk]))
         return Response({
-            "message": "Proforma uploaded and processed successfully",
-            "proforma_url": purchase_request.proforma,
-            "extracted_data": result['extracted_data']
-        }, status=status.HTTP_200_OK)
+            "message": "Proforma queued for processing",
+            "job_id": str(job.pk),
+            "status": job.status,
+            "status_url": status_url,
+        }, status=status.HTTP_202_ACCEPTED, headers={"Location": status_url})
 
     def _has_file_access(self, user, purchase_request: PurchaseRequest):
         # Staff may only access their own files
@@ -380,25 +462,7 @@ class PurchaseRequestViewSet(viewsets.ModelViewSet):
             return Response({'detail': 'Not allowed'}, status=status.HTTP_403_FORBIDDEN)
         if not pr.proforma:
             raise Http404
-        # If S3 is configured, generate a presigned URL and redirect
-        if getattr(settings, 'AWS_STORAGE_BUCKET_NAME', None):
-            key = pr.proforma.name
-            client = boto3.client(
-                's3',
-                aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-                aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-                region_name=getattr(settings, 'AWS_S3_REGION_NAME', None),
-            )
-            presigned = client.generate_presigned_url(
-                'get_object',
-                Params={'Bucket': settings.AWS_STORAGE_BUCKET_NAME, 'Key': key},
-                ExpiresIn=3600,
-            )
-            return HttpResponseRedirect(presigned)
-        filepath = pr.proforma.path
-        filename = os.path.basename(filepath)
-        content_type, _ = mimetypes.guess_type(filename)
-        return FileResponse(open(filepath, 'rb'), as_attachment=True, filename=filename, content_type=content_type or 'application/octet-stream')
+        return document_response(request, pr.proforma)
 
     @action(detail=True, methods=['get'], url_path='download-receipt', permission_classes=[permissions.IsAuthenticated])
     def download_receipt(self, request, pk=None):
@@ -407,24 +471,7 @@ class PurchaseRequestViewSet(viewsets.ModelViewSet):
             return Response({'detail': 'Not allowed'}, status=status.HTTP_403_FORBIDDEN)
         if not pr.receipt:
             raise Http404
-        if getattr(settings, 'AWS_STORAGE_BUCKET_NAME', None):
-            key = pr.receipt.name
-            client = boto3.client(
-                's3',
-                aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-                aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-                region_name=getattr(settings, 'AWS_S3_REGION_NAME', None),
-            )
-            presigned = client.generate_presigned_url(
-                'get_object',
-                Params={'Bucket': settings.AWS_STORAGE_BUCKET_NAME, 'Key': key},
-                ExpiresIn=3600,
-            )
-            return HttpResponseRedirect(presigned)
-        filepath = pr.receipt.path
-        filename = os.path.basename(filepath)
-        content_type, _ = mimetypes.guess_type(filename)
-        return FileResponse(open(filepath, 'rb'), as_attachment=True, filename=filename, content_type=content_type or 'application/octet-stream')
+        return document_response(request, pr.receipt)
 
     @action(detail=True, methods=['get'], url_path='download-po', permission_classes=[permissions.IsAuthenticated])
     def download_po(self, request, pk=None):
@@ -432,25 +479,15 @@ class PurchaseRequestViewSet(viewsets.ModelViewSet):
         if not self._has_file_access(request.user, pr):
             return Response({'detail': 'Not allowed'}, status=status.HTTP_403_FORBIDDEN)
         if not pr.purchase_order_file:
+            if pr.purchase_order_status == PurchaseRequest.DocumentStatus.PENDING:
+                response = Response(
+                    {'detail': 'Purchase order is being generated.', 'purchase_order_status': pr.purchase_order_status},
+                    status=status.HTTP_202_ACCEPTED,
+                )
+                response['Retry-After'] = '5'
+                return response
             raise Http404
-        if getattr(settings, 'AWS_STORAGE_BUCKET_NAME', None):
-            key = pr.purchase_order_file.name
-            client = boto3.client(
-                's3',
-                aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-                aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-                region_name=getattr(settings, 'AWS_S3_REGION_NAME', None),
-            )
-            presigned = client.generate_presigned_url(
-                'get_object',
-                Params={'Bucket': settings.AWS_STORAGE_BUCKET_NAME, 'Key': key},
-                ExpiresIn=3600,
-            )
-            return HttpResponseRedirect(presigned)
-        filepath = pr.purchase_order_file.path
-        filename = os.path.basename(filepath)
-        content_type, _ = mimetypes.guess_type(filename)
-        return FileResponse(open(filepath, 'rb'), as_attachment=True, filename=filename, content_type=content_type or 'application/octet-stream')
+        return document_response(request, pr.purchase_order_file)
 
     @action(detail=True, methods=['get'], url_path='download-attachment/(?P<att_id>[^/.]+)', permission_classes=[permissions.IsAuthenticated])
     def download_attachment(self, request, pk=None, att_id=None):
@@ -461,39 +498,10 @@ class PurchaseRequestViewSet(viewsets.ModelViewSet):
             raise Http404
         if not self._has_file_access(request.user, pr):
             return Response({'detail': 'Not allowed'}, status=status.HTTP_403_FORBIDDEN)
-        # If attachment uses external_url (e.g., Cloudinary), proxy the file so we can set attachment headers
-        if att.external_url:
-            try:
-                resp = requests.get(att.external_url, stream=True, timeout=15)
-                resp.raise_for_status()
-            except Exception:
-                # fallback to redirect if we cannot proxy
-                return HttpResponseRedirect(att.external_url)
-
-            # determine filename
-            filename = os.path.basename(att.external_url.split('?')[0]) or f"attachment-{att.id}"
-            content_type = resp.headers.get('content-type', 'application/octet-stream')
-            streaming = StreamingHttpResponse(resp.iter_content(chunk_size=8192), content_type=content_type)
-            streaming['Content-Disposition'] = f'attachment; filename="{filename}"'
-            return streaming
-        if getattr(settings, 'AWS_STORAGE_BUCKET_NAME', None):
-            key = att.file.name
-            client = boto3.client(
-                's3',
-                aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-                aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-                region_name=getattr(settings, 'AWS_S3_REGION_NAME', None),
-            )
-            presigned = client.generate_presigned_url(
-                'get_object',
-                Params={'Bucket': settings.AWS_STORAGE_BUCKET_NAME, 'Key': key},
-                ExpiresIn=3600,
-            )
-            return HttpResponseRedirect(presigned)
-        filepath = att.file.path
-        filename = os.path.basename(filepath)
-        content_type, _ = mimetypes.guess_type(filename)
-        return FileResponse(open(filepath, 'rb'), as_attachment=True, filename=filename, content_type=content_type or 'application/octet-stream')
+        if not (att.external_url or att.file):
+            raise Http404
+        # External attachments (e.g., Cloudinary) are proxied so we can set attachment headers
+        return document_response(request, att.external_url or att.file, default_name=f"attachment-{att.id}")
 
     @action(
         detail=True,
@@ -510,7 +518,51 @@ class PurchaseRequestViewSet(viewsets.ModelViewSet):
             decision=serializer.validated_data["decision"],
             comments=serializer.validated_data.get("comments", ""),
         )
-        return Response(PurchaseRequestSerializer(purchase_request).data, status=status.HTTP_200_OK)
+        return self._detail_response(purchase_request.pk)
+
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="bulk-decision",
+        permission_classes=[permissions.IsAuthenticated, IsApprover],
+    )
+    def bulk_decision(self, request):
+        """Approve or reject up to 500 requests in one call, with a result per item."""
+        serializer = BulkDecisionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = apply_bulk_approvals(request.user, serializer.validated_data["decisions"])
+        applied = sum(1 for result in results if result["ok"])
+        return Response(
+            {"applied": applied, "failed": len(results) - applied, "results": results},
+            status=status.HTTP_200_OK,
+        )
+
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="claim",
+        permission_classes=[permissions.IsAuthenticated, IsApprover],
+    )
+    def claim(self, request):
+        """Lease the next ``limit`` unclaimed pending requests at the caller's level."""
+        serializer = ClaimSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids, expires_at = claim_requests(request.user, serializer.validated_data["limit"])
+        rows = self.base_queryset().filter(pk__in=ids).order_by("created_at", "pk")
+        return Response({"lease_expires_at": expires_at, "results": self._serialize_many(rows)})
+
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="release",
+        permission_classes=[permissions.IsAuthenticated, IsApprover],
+    )
+    def release(self, request):
+        """Give back the caller's leases on the listed requests."""
+        serializer = ReleaseClaimSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        released = release_claims(request.user, serializer.validated_data["ids"])
+        return Response({"released": released})
 
     @action(detail=True, methods=["post"], url_path="finance-comment", permission_classes=[permissions.IsAuthenticated, IsFinance])
     def add_finance_comment(self, request, pk=None):
@@ -519,9 +571,9 @@ class PurchaseRequestViewSet(viewsets.ModelViewSet):
         comment = request.data.get('comment')
         if not comment:
             return Response({"detail": "Comment is required"}, status=status.HTTP_400_BAD_REQUEST)
-        fc = FinanceComment.objects.create(purchase_request=pr, user=request.user, comment=comment)
+        FinanceComment.objects.create(purchase_request=pr, user=request.user, comment=comment)
         # Return the updated request with the new comment
-        return Response(PurchaseRequestSerializer(pr, context={'request': request}).data, status=status.HTTP_201_CREATED)
+        return self._detail_response(pr.pk, status.HTTP_201_CREATED)
 
     @action(detail=True, methods=["post"], url_path="add-comment", permission_classes=[permissions.IsAuthenticated])
     def add_comment(self, request, pk=None):
@@ -537,9 +589,9 @@ class PurchaseRequestViewSet(viewsets.ModelViewSet):
         comment = request.data.get('comment')
         if not comment:
             return Response({"detail": "Comment is required"}, status=status.HTTP_400_BAD_REQUEST)
-        fc = FinanceComment.objects.create(purchase_request=pr, user=request.user, comment=comment)
+        FinanceComment.objects.create(purchase_request=pr, user=request.user, comment=comment)
         # Return the updated request with the new comment
-        return Response(PurchaseRequestSerializer(pr, context={'request': request}).data, status=status.HTTP_201_CREATED)
+        return self._detail_response(pr.pk, status.HTTP_201_CREATED)
 
     @action(
         detail=True,
@@ -556,4 +608,18 @@ class PurchaseRequestViewSet(viewsets.ModelViewSet):
             decision=serializer.validated_data["decision"],
             comments=serializer.validated_data.get("comments", ""),
         )
-        return Response(PurchaseRequestSerializer(purchase_request).data, status=status.HTTP_200_OK)
+        return self._detail_response(purchase_request.pk)
+
+
+class DocumentJobViewSet(mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """Status and result of background document jobs, for polling."""
+
+    serializer_class = DocumentJobSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        user = self.request.user
+        queryset = DocumentJob.objects.all()
+        if user.role == User.Role.STAFF:
+            return queryset.filter(created_by=user)
+        return queryset
@@ -56,6 +56,19 @@ export const upload = async (url, formData, config = {}) => {
   });
 };
 
+// helper to read every row of a paginated list: follows `next` until it is null
+export const fetchAllPages = async (url, config = {}) => {
+  const items = [];
+  let next = url;
+  while (next) {
+    const { data } = await api.get(next, config);
+    if (Array.isArray(data)) return items.concat(data);
+    items.push(...(data.results || []));
+    next = data.next;
+  }
+  return items;
+};
+
 // helper to download files as blob
 export const downloadFile = async (url, config = {}) => {
   const response = await api.get(url, { responseType: 'blob', ...config });
@@ -0,0 +1,30 @@
+const ReceiptReconciliation = ({ request }) => {
+  const result = request.receipt_reconciliation;
+  switch (request.receipt_status) {
+    case 'PENDING':
+      return <p className="mt-2 text-sm text-slate-500">Reconciling receipt…</p>;
+    case 'MATCHED':
+      return (
+        <p className="mt-2 text-sm text-emerald-600">
+          Receipt matches PO ({result?.receipt_total})
+        </p>
+      );
+    case 'MISMATCH':
+      return (
+        <p className="mt-2 text-sm font-semibold text-rose-600">
+          Receipt {result?.receipt_total} vs PO {result?.po_total} (difference{' '}
+          {result?.difference})
+        </p>
+      );
+    case 'FAILED':
+      return (
+        <p className="mt-2 text-sm text-amber-600">
+          Receipt could not be read; check it manually
+        </p>
+      );
+    default:
+      return null;
+  }
+};
+
+export default ReceiptReconciliation;
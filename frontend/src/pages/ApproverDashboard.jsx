@@ -9,7 +9,7 @@
 
 import { useEffect, useState, useMemo } from 'react';
 import { FileText, Paperclip } from 'lucide-react';
-import api from '../api/client.js';
+import api, { fetchAllPages } from '../api/client.js';
 import DocumentViewer from '../components/DocumentViewer.jsx';
 import dayjs from 'dayjs';
 
@@ -29,8 +29,8 @@ const ApproverDashboard = () => {
     setLoading(true);
     setError(null);
     try {
-      const { data } = await api.get('/requests/pending/');
-      setRequests(data);
+      const items = await fetchAllPages('/requests/pending/');
+      setRequests(items);
     } catch (err) {
       setError(err.response?.data?.detail || 'Unable to fetch requests');
     } finally {
@@ -42,8 +42,7 @@ const ApproverDashboard = () => {
     setLoading(true);
     setError(null);
     try {
-      const { data } = await api.get('/requests/my-approvals/');
-      const items = Array.isArray(data) ? data : data.results || data;
+      const items = await fetchAllPages('/requests/my-approvals/');
       setApprovals(items);
     } catch (err) {
       console.error('Error fetching approvals:', err);
@@ -1,8 +1,9 @@
 import { useEffect, useState } from 'react';
-import api, { uploadToCloudinary } from '../api/client.js';
+import api, { fetchAllPages, uploadToCloudinary } from '../api/client.js';
 import { jsPDF } from 'jspdf';
 import toast, { Toaster } from 'react-hot-toast';
 import DocumentViewer from '../components/DocumentViewer.jsx';
+import ReceiptReconciliation from '../components/ReceiptReconciliation.jsx';
 
 const FinanceDashboard = () => {
   const [requests, setRequests] = useState([]);
@@ -25,8 +26,7 @@ const FinanceDashboard = () => {
         endpoint = '/requests/finance-pending/';
       }
 
-      const { data } = await api.get(endpoint);
-      const items = Array.isArray(data) ? data : data.results || data;
+      const items = await fetchAllPages(endpoint);
       setRequests(items);
     } catch (err) {
       setError(err.response?.data?.detail || 'Unable to load requests');
@@ -47,7 +47,7 @@ const FinanceDashboard = () => {
       await api.post(`/requests/${id}/submit-receipt/`, {
         external_url: url,
       });
-      toast.success('Receipt uploaded successfully');
+      toast.success('Receipt uploaded, reconciling against the PO');
       await fetchApproved();
     } catch (err) {
       toast.error('Unable to upload receipt');
@@ -229,12 +229,15 @@ const FinanceDashboard = () => {
                     {activeTab === 'pending' ? (
                       <p className="text-sm text-slate-500 mt-2">View only</p>
                     ) : request.receipt || request.receipt_url ? (
-                      <button
-                        className="btn-secondary mt-3 inline-flex"
-                        onClick={() => openViewer(request.receipt, 'Receipt')}
-                      >
-                        View receipt
-                      </button>
+                      <div className="mt-3">
+                        <button
+                          className="btn-secondary inline-flex"
+                          onClick={() => openViewer(request.receipt, 'Receipt')}
+                        >
+                          View receipt
+                        </button>
+                        <ReceiptReconciliation request={request} />
+                      </div>
                     ) : (
                       <div className="mt-2">
                         <label className="flex cursor-pointer flex-col gap-2 rounded-2xl border-2 border-dashed border-slate-300 p-4 text-sm text-slate-600">
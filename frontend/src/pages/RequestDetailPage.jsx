@@ -4,6 +4,7 @@ import { useParams } from 'react-router-dom';
 import api, { uploadToCloudinary } from '../api/client.js';
 import { useAuth } from '../hooks/useAuth.js';
 import DocumentViewer from '../components/DocumentViewer.jsx';
+import ReceiptReconciliation from '../components/ReceiptReconciliation.jsx';
 
 const amountFormatter = new Intl.NumberFormat('en-US', {
   style: 'currency',
@@ -28,6 +29,22 @@ const statusCopy = {
   },
 };
 
+const JOB_POLL_INTERVAL_MS = 2000;
+const JOB_POLL_ATTEMPTS = 60;
+
+// Uploads that are processed in the background answer 202 with a job to poll
+const waitForJob = async (statusUrl) => {
+  for (let attempt = 0; attempt < JOB_POLL_ATTEMPTS; attempt += 1) {
+    const { data } = await api.get(statusUrl);
+    if (data.status === 'SUCCEEDED') return data.result;
+    if (data.status === 'FAILED') {
+      throw new Error(data.error || 'Document processing failed');
+    }
+    await new Promise((resolve) => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+  }
+  throw new Error('Document processing is taking longer than expected');
+};
+
 const RequestDetailPage = () => {
   const { id } = useParams();
   const { user } = useAuth();
@@ -95,7 +112,8 @@ const RequestDetailPage = () => {
       const { data } = await api.post(endpoint, payload);
       console.log('[UPLOAD DEBUG] Backend response:', data);
 
-      setMessage(JSON.stringify(data, null, 2));
+      const result = data.status_url ? await waitForJob(data.status_url) : data;
+      setMessage(JSON.stringify(result, null, 2));
       await fetchRequest();
     } catch (err) {
       console.error('[UPLOAD ERROR] Upload failed:', err);
@@ -362,6 +380,10 @@ const RequestDetailPage = () => {
                 View PO
               </button>
             )}
+            {!request.purchase_order_file_url &&
+              request.purchase_order_status === 'PENDING' && (
+                <span className="text-sm text-slate-500">Generating PO…</span>
+              )}
             {request.receipt && (
               <button
                 type="button"
@@ -371,6 +393,7 @@ const RequestDetailPage = () => {
                 View receipt
               </button>
             )}
+            {request.receipt && <ReceiptReconciliation request={request} />}
 
             {Array.isArray(request.attachments) &&
               request.attachments.length === 0 && (